@@ -34,6 +34,7 @@ class Config:
     # Logging Configuration
     LOG_CHANNEL: int = int(os.getenv("LOG_CHANNEL", "-1002059929123"))
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_DIR: str = os.getenv("LOG_DIR", "logs")
     
     # Features Toggle
     ENABLE_PLUGINS: bool = os.getenv("ENABLE_PLUGINS", "true").lower() == "true"
@@ -47,6 +48,73 @@ class Config:
     # Performance Settings
     MAX_WORKERS: int = int(os.getenv("MAX_WORKERS", "4"))
     FLOOD_WAIT_THRESHOLD: int = int(os.getenv("FLOOD_WAIT_THRESHOLD", "10"))
+    PREWARM_IMPORTS: bool = os.getenv("PREWARM_IMPORTS", "true").lower() == "true"
+    IMPORT_BUDGET_MS: int = int(os.getenv("IMPORT_BUDGET_MS", "250"))
+    
+    # HTTP Configuration
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+    HTTP_TIMEOUT: float = float(os.getenv("HTTP_TIMEOUT", "15"))
+    HTTP_KEEPALIVE: float = float(os.getenv("HTTP_KEEPALIVE", "30"))
+    WEATHER_CACHE_TTL: int = int(os.getenv("WEATHER_CACHE_TTL", "600"))
+    
+    # Translation Configuration
+    TRANSLATE_WORKERS: int = int(os.getenv("TRANSLATE_WORKERS", "4"))
+    TRANSLATE_TIMEOUT: float = float(os.getenv("TRANSLATE_TIMEOUT", "10"))
+    TRANSLATE_CACHE_TTL: int = int(os.getenv("TRANSLATE_CACHE_TTL", "3600"))
+    
+    # Download Configuration
+    YT_API: str = os.getenv("YT_API", "http://103.25.175.231:5000")
+    YT_BACKEND: str = os.getenv("YT_BACKEND", "remote")
+    DOWNLOAD_DIR: str = os.getenv("DOWNLOAD_DIR", "downloads")
+    DOWNLOAD_CONCURRENCY: int = int(os.getenv("DOWNLOAD_CONCURRENCY", "3"))
+    # Downloads are I/O bound: one worker per download slot, plus one for metadata lookups
+    YT_WORKERS: int = int(os.getenv("YT_WORKERS", str(DOWNLOAD_CONCURRENCY + 1)))
+    DOWNLOAD_USER_LIMIT: int = int(os.getenv("DOWNLOAD_USER_LIMIT", "2"))
+    DOWNLOAD_TIMEOUT: float = float(os.getenv("DOWNLOAD_TIMEOUT", "600"))
+    DOWNLOAD_CHUNK_SIZE: int = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+    DOWNLOAD_SEGMENTS: int = int(os.getenv("DOWNLOAD_SEGMENTS", "4"))
+    DOWNLOAD_MIN_SEGMENT: int = int(os.getenv("DOWNLOAD_MIN_SEGMENT", str(1024 * 1024)))
+    DOWNLOAD_EDIT_INTERVAL: float = float(os.getenv("DOWNLOAD_EDIT_INTERVAL", "3"))
+    DOWNLOAD_QUOTA_MB: int = int(os.getenv("DOWNLOAD_QUOTA_MB", "2048"))
+    
+    # Audio Post-processing Configuration
+    POSTPROCESS_WORKERS: int = int(os.getenv("POSTPROCESS_WORKERS", "1"))
+    POSTPROCESS_TIMEOUT: float = float(os.getenv("POSTPROCESS_TIMEOUT", "30"))
+    POSTPROCESS_CACHE_TTL: int = int(os.getenv("POSTPROCESS_CACHE_TTL", "86400"))
+    THUMB_SIZE: int = int(os.getenv("THUMB_SIZE", "320"))
+    THUMB_QUALITY: int = int(os.getenv("THUMB_QUALITY", "85"))
+    
+    # Media Cache Configuration
+    MEDIA_CACHE_MAX_ENTRIES: int = int(os.getenv("MEDIA_CACHE_MAX_ENTRIES", "20000"))
+    MEDIA_CACHE_TTL_DAYS: int = int(os.getenv("MEDIA_CACHE_TTL_DAYS", "90"))
+    
+    # Calculator Configuration
+    CALC_WORKERS: int = int(os.getenv("CALC_WORKERS", "2"))
+    CALC_TIMEOUT: float = float(os.getenv("CALC_TIMEOUT", "3"))
+    CALC_MEMORY_MB: int = int(os.getenv("CALC_MEMORY_MB", "256"))
+    CALC_CACHE_SIZE: int = int(os.getenv("CALC_CACHE_SIZE", "1024"))
+    
+    # Restart Configuration
+    DRAIN_TIMEOUT: float = float(os.getenv("DRAIN_TIMEOUT", "15"))
+    STATE_SNAPSHOT_FILE: str = os.getenv("STATE_SNAPSHOT_FILE", "sessions/state_snapshot.pkl")
+    
+    # Broadcast Configuration
+    BROADCAST_RATE: float = float(os.getenv("BROADCAST_RATE", "25"))
+    BROADCAST_CONCURRENCY: int = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+    BROADCAST_BATCH_SIZE: int = int(os.getenv("BROADCAST_BATCH_SIZE", "500"))
+    
+    # Metrics Configuration
+    ENABLE_METRICS: bool = os.getenv("ENABLE_METRICS", "false").lower() == "true"
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9090"))
+    
+    # Tracing Configuration
+    ENABLE_TRACING: bool = os.getenv("ENABLE_TRACING", "false").lower() == "true"
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+    TRACE_SLOW_THRESHOLD: float = float(os.getenv("TRACE_SLOW_THRESHOLD", "2.0"))
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "logs/traces.jsonl")
+    TRACE_MAX_BYTES: int = int(os.getenv("TRACE_MAX_BYTES", str(10 * 1024 * 1024)))
+    TRACE_BACKUPS: int = int(os.getenv("TRACE_BACKUPS", "5"))
     
     # Bot Information
     BOT_NAME: str = "cku"
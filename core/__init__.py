@@ -5,6 +5,12 @@ Contains core bot functionality
 from .client import bot, BotClient
 from .database import db, Database
 from .logger import bot_logger, BotLogger
+from .metrics import metrics, MetricsRegistry, metrics_server, MetricsServer
+from .perf import perf_tracker, PerfTracker
+from .tracing import tracer, Tracer
+from .accounting import api_accounting, ApiAccounting
+from .lifecycle import lifecycle, Lifecycle
+from .state import state_registry, StateRegistry
 
 __all__ = [
     'bot',
@@ -12,5 +18,19 @@ __all__ = [
     'db',
     'Database',
     'bot_logger',
-    'BotLogger'
+    'BotLogger',
+    'metrics',
+    'MetricsRegistry',
+    'metrics_server',
+    'MetricsServer',
+    'perf_tracker',
+    'PerfTracker',
+    'tracer',
+    'Tracer',
+    'api_accounting',
+    'ApiAccounting',
+    'lifecycle',
+    'Lifecycle',
+    'state_registry',
+    'StateRegistry'
 ]
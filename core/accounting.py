@@ -0,0 +1,198 @@
+"""
+API Accounting Module
+Per-method accounting of Telegram API usage made through the bot client
+"""
+import contextvars
+import inspect
+import json
+import time
+from functools import wraps
+from typing import Dict, List, Optional
+from pyrogram import Client
+from pyrogram.errors import FloodWait
+from core.metrics import metrics
+
+# Method packages that are not Telegram API calls
+SKIPPED_PACKAGES = (
+    "pyrogram.methods.advanced",
+    "pyrogram.methods.auth",
+    "pyrogram.methods.decorators",
+    "pyrogram.methods.utilities",
+)
+
+API_CALLS = metrics.counter(
+    "bot_telegram_api_calls_total", "High-level Telegram API calls", ["method", "handler"]
+)
+API_ERRORS = metrics.counter(
+    "bot_telegram_api_errors_total", "Failed high-level Telegram API calls", ["method", "error"]
+)
+API_FLOOD_WAIT = metrics.counter(
+    "bot_telegram_flood_wait_seconds_total", "FloodWait seconds imposed by Telegram", ["method"]
+)
+
+_current_method: contextvars.ContextVar = contextvars.ContextVar("api_method", default=None)
+_current_handler: contextvars.ContextVar = contextvars.ContextVar("api_handler", default=None)
+
+
+class MethodStats:
+    """Counters for one API method"""
+
+    __slots__ = ("calls", "errors", "total_time", "max_time", "flood_wait", "rpcs")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors: Dict[str, int] = {}
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.flood_wait = 0
+        self.rpcs = 0
+
+    def to_dict(self) -> dict:
+        """Serialize to a plain dict"""
+        return {
+            'calls': self.calls,
+            'errors': dict(self.errors),
+            'error_count': sum(self.errors.values()),
+            'avg_ms': round(self.total_time / self.calls * 1000, 2) if self.calls else 0.0,
+            'max_ms': round(self.max_time * 1000, 2),
+            'total_s': round(self.total_time, 3),
+            'flood_wait_s': self.flood_wait,
+            'rpcs': self.rpcs
+        }
+
+
+class ApiAccounting:
+    """Records what every Telegram API method costs and who calls it"""
+
+    def __init__(self):
+        """Initialize accounting"""
+        self.methods: Dict[str, MethodStats] = {}
+        self.handlers: Dict[str, Dict[str, int]] = {}
+        self.started_at = time.time()
+
+    def _stats(self, method: str) -> MethodStats:
+        """Get or create stats for a method"""
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = MethodStats()
+        return stats
+
+    def record(self, method: str, duration: float, error: Exception = None):
+        """Record one completed API call"""
+        stats = self._stats(method)
+        stats.calls += 1
+        stats.total_time += duration
+        stats.max_time = max(stats.max_time, duration)
+
+        handler = _current_handler.get() or "background"
+        per_handler = self.handlers.setdefault(handler, {})
+        per_handler[method] = per_handler.get(method, 0) + 1
+        API_CALLS.inc(method=method, handler=handler)
+
+        if error is not None:
+            error_name = type(error).__name__
+            stats.errors[error_name] = stats.errors.get(error_name, 0) + 1
+            API_ERRORS.inc(method=method, error=error_name)
+            if isinstance(error, FloodWait):
+                stats.flood_wait += error.value
+                API_FLOOD_WAIT.inc(error.value, method=method)
+
+    def record_rpc(self):
+        """Attribute one raw RPC to the API method currently running"""
+        method = _current_method.get()
+        if method is not None:
+            self._stats(method).rpcs += 1
+
+    def _wrap(self, name: str, bound):
+        """Wrap a bound client method"""
+        @wraps(bound)
+        async def wrapper(*args, **kwargs):
+            # Nested calls (e.g. resolve_peer inside get_chat_member) count towards the outer one
+            if _current_method.get() is not None:
+                return await bound(*args, **kwargs)
+
+            token = _current_method.set(name)
+            start = time.perf_counter()
+            error = None
+            try:
+                return await bound(*args, **kwargs)
+            except Exception as e:
+                error = e
+                raise
+            finally:
+                _current_method.reset(token)
+                self.record(name, time.perf_counter() - start, error)
+
+        wrapper.__accounted__ = True
+        return wrapper
+
+    def instrument(self, app: Client) -> int:
+        """Wrap every public API coroutine method of a client instance"""
+        wrapped = 0
+        for name, attr in inspect.getmembers(type(app), inspect.iscoroutinefunction):
+            if name.startswith("_"):
+                continue
+            module = getattr(attr, "__module__", "") or ""
+            if not module.startswith("pyrogram.methods.") or module.startswith(SKIPPED_PACKAGES):
+                continue
+            bound = getattr(app, name)
+            if getattr(bound, "__accounted__", False):
+                continue
+            setattr(app, name, self._wrap(name, bound))
+            wrapped += 1
+        return wrapped
+
+    def totals(self) -> dict:
+        """Aggregate counters across all methods"""
+        return {
+            'calls': sum(s.calls for s in self.methods.values()),
+            'errors': sum(sum(s.errors.values()) for s in self.methods.values()),
+            'flood_wait_s': sum(s.flood_wait for s in self.methods.values()),
+            'rpcs': sum(s.rpcs for s in self.methods.values())
+        }
+
+    def top_methods(self, limit: int = 5, key: str = 'calls') -> List[tuple]:
+        """Methods ordered by a MethodStats.to_dict() field, largest first"""
+        ranked = sorted(
+            ((name, stats.to_dict()) for name, stats in self.methods.items()),
+            key=lambda item: item[1][key],
+            reverse=True
+        )
+        return ranked[:limit]
+
+    def top_handlers(self, limit: int = 5) -> List[tuple]:
+        """Handlers ordered by the number of API calls they made"""
+        ranked = sorted(
+            ((name, sum(calls.values())) for name, calls in self.handlers.items()),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        return ranked[:limit]
+
+    def snapshot(self) -> dict:
+        """Machine-readable view of all accounting data"""
+        return {
+            'since': self.started_at,
+            'generated_at': time.time(),
+            'totals': self.totals(),
+            'methods': {name: stats.to_dict() for name, stats in self.methods.items()},
+            'handlers': {name: dict(calls) for name, calls in self.handlers.items()}
+        }
+
+    def export_json(self, indent: Optional[int] = 2) -> str:
+        """Snapshot serialized as JSON"""
+        return json.dumps(self.snapshot(), indent=indent, sort_keys=True)
+
+
+def set_current_handler(name: str):
+    """Attribute API calls in the current context to a handler, returns a reset token"""
+    return _current_handler.set(name)
+
+
+def reset_current_handler(token):
+    """Undo set_current_handler"""
+    _current_handler.reset(token)
+
+
+# Create accounting instance
+api_accounting = ApiAccounting()
@@ -0,0 +1,328 @@
+"""
+Broadcast Module
+Concurrent, rate-limited and resumable broadcast jobs
+"""
+import asyncio
+import time
+import uuid
+from typing import Dict, List, Optional
+from pyrogram import Client
+from pyrogram.errors import FloodWait, UserIsBlocked, InputUserDeactivated
+from config import config
+from core.database import db
+from core.logger import bot_logger
+
+# Job states
+RUNNING = "running"
+PAUSED = "paused"
+CANCELLED = "cancelled"
+COMPLETED = "completed"
+FAILED = "failed"
+
+ACTIVE_STATES = [RUNNING, PAUSED]
+
+# Errors after which a user can never receive messages again. PeerIdInvalid is
+# not one: it means this session lacks the user's access hash, e.g. after the
+# session file was reset, not that the account is gone
+PERMANENT_ERRORS = {
+    UserIsBlocked: "blocked",
+    InputUserDeactivated: "deleted",
+}
+
+# Minimum seconds between progress message edits
+STATUS_EDIT_INTERVAL = 5
+
+# Delivered users between checkpoints, bounds duplicates after a restart
+CHECKPOINT_EVERY = 25
+
+
+class RateLimiter:
+    """Spaces out acquisitions to a global rate, shared by all senders"""
+
+    def __init__(self, rate: float):
+        """Initialize limiter with a rate in acquisitions per second"""
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._blocked_until = 0.0
+
+    async def acquire(self):
+        """Wait for the next free slot"""
+        now = time.monotonic()
+        slot = max(now, self._next_slot, self._blocked_until)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    def block(self, seconds: float):
+        """Hold every sender back, e.g. after a FloodWait"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+
+class BroadcastJob:
+    """In-memory handle on a persisted broadcast job"""
+
+    def __init__(self, doc: dict):
+        """Initialize job from its database document"""
+        self.id: str = doc["_id"]
+        self.doc = doc
+        self.task: Optional[asyncio.Task] = None
+        self.cancelled = False
+        self._resume_event = asyncio.Event()
+        if doc.get("status") != PAUSED:
+            self._resume_event.set()
+        self._last_report = 0.0
+
+    @property
+    def status(self) -> str:
+        return self.doc["status"]
+
+    @property
+    def processed(self) -> int:
+        return self.doc["success"] + self.doc["failed"]
+
+    async def wait_if_paused(self):
+        """Block while the job is paused"""
+        await self._resume_event.wait()
+
+    def progress_text(self) -> str:
+        """Human readable progress"""
+        total = max(self.doc["total"], self.processed)
+        elapsed = max(time.time() - self.doc["started_at"], 1)
+        text = (
+            f"📢 **Broadcast `{self.id}`** — {self.status.title()}\n\n"
+            f"✅ Success: {self.doc['success']}\n"
+            f"❌ Failed: {self.doc['failed']}\n"
+            f"📊 Progress: {self.processed}/{total}\n"
+            f"⚡ Rate: {self.processed / elapsed:.1f} msg/s"
+        )
+        failures = self.doc.get("failures") or {}
+        if failures:
+            text += "\n🚫 " + ", ".join(f"{reason}: {count}" for reason, count in failures.items())
+        return text
+
+
+class BroadcastEngine:
+    """Runs broadcast jobs with bounded concurrency under a global send rate"""
+
+    def __init__(self):
+        """Initialize engine from configuration"""
+        self.concurrency = config.BROADCAST_CONCURRENCY
+        self.batch_size = config.BROADCAST_BATCH_SIZE
+        self.limiter = RateLimiter(config.BROADCAST_RATE)
+        self.jobs: Dict[str, BroadcastJob] = {}
+
+    def _launch(self, client: Client, doc: dict) -> BroadcastJob:
+        """Start the worker task for a job"""
+        job = BroadcastJob(doc)
+        job.task = asyncio.create_task(self._run(client, job))
+        self.jobs[job.id] = job
+        return job
+
+    async def create(self, client: Client, status_msg, text: str = None,
+                     source_chat: int = None, source_message: int = None) -> BroadcastJob:
+        """Persist and start a new broadcast job"""
+        now = time.time()
+        doc = {
+            "_id": uuid.uuid4().hex[:8],
+            "status": RUNNING,
+            "text": text,
+            "source_chat": source_chat,
+            "source_message": source_message,
+            "status_chat": status_msg.chat.id,
+            "status_message": status_msg.id,
+            "last_user_id": None,
+            "success": 0,
+            "failed": 0,
+            "failures": {},
+            "total": await db.count_users(reachable_only=True),
+            "created_at": now,
+            "started_at": now,
+            "updated_at": now
+        }
+        await db.save_broadcast(doc["_id"], **{k: v for k, v in doc.items() if k != "_id"})
+        bot_logger.info(f"Broadcast {doc['_id']} created for ~{doc['total']} users")
+        return self._launch(client, doc)
+
+    async def resume_all(self, client: Client) -> int:
+        """Relaunch jobs that were running or paused when the process stopped"""
+        docs = await db.get_broadcasts(ACTIVE_STATES)
+        for doc in docs:
+            # Jobs stopped by shutdown() without a process restart are relaunched too
+            job = self.jobs.get(doc["_id"])
+            if job and job.task and not job.task.done():
+                continue
+            doc["started_at"] = time.time() - max(doc["updated_at"] - doc["started_at"], 0)
+            self._launch(client, doc)
+            bot_logger.info(f"Resumed broadcast {doc['_id']} after user {doc['last_user_id']}")
+        return len(docs)
+
+    def get(self, job_id: str = None) -> Optional[BroadcastJob]:
+        """Get a job by ID, or the most recent active one"""
+        if job_id:
+            return self.jobs.get(job_id)
+        active = [job for job in self.jobs.values() if job.status in ACTIVE_STATES]
+        return max(active, key=lambda job: job.doc["created_at"]) if active else None
+
+    def active(self) -> List[BroadcastJob]:
+        """Jobs that have not finished"""
+        return [job for job in self.jobs.values() if job.status in ACTIVE_STATES]
+
+    async def _set_status(self, job: BroadcastJob, status: str):
+        """Update and persist job status"""
+        job.doc["status"] = status
+        job.doc["updated_at"] = time.time()
+        await db.save_broadcast(job.id, status=status, updated_at=job.doc["updated_at"])
+
+    async def pause(self, job: BroadcastJob):
+        """Pause a running job"""
+        if job.status == RUNNING:
+            job._resume_event.clear()
+            await self._set_status(job, PAUSED)
+
+    async def resume(self, job: BroadcastJob):
+        """Resume a paused job"""
+        if job.status == PAUSED:
+            await self._set_status(job, RUNNING)
+            job._resume_event.set()
+
+    async def cancel(self, job: BroadcastJob):
+        """Cancel a job; in-flight sends finish, queued ones are dropped"""
+        if job.status in ACTIVE_STATES:
+            job.cancelled = True
+            job._resume_event.set()
+            await self._set_status(job, CANCELLED)
+
+    async def shutdown(self):
+        """Stop workers without changing persisted state, so jobs resume on next start"""
+        tasks = [job.task for job in self.active() if job.task and not job.task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _deliver(self, client: Client, job: BroadcastJob, user_id: int) -> Optional[tuple]:
+        """Send to one user, returns (status, reason, permanent) or None if cancelled first"""
+        await job.wait_if_paused()
+        if job.cancelled:
+            return None
+
+        for _ in range(3):
+            # Also after a FloodWait, so waiting senders do not all fire at once
+            await self.limiter.acquire()
+            try:
+                if job.doc.get("source_message"):
+                    await client.forward_messages(
+                        user_id, job.doc["source_chat"], job.doc["source_message"]
+                    )
+                else:
+                    await client.send_message(user_id, job.doc["text"])
+                return ("ok", None, False)
+            except FloodWait as e:
+                self.limiter.block(e.value)
+                await asyncio.sleep(e.value)
+            except tuple(PERMANENT_ERRORS) as e:
+                reason = next(r for cls, r in PERMANENT_ERRORS.items() if isinstance(e, cls))
+                return ("failed", reason, True)
+            except Exception as e:
+                return ("failed", type(e).__name__, False)
+        return ("failed", "FloodWait", False)
+
+    async def _report(self, client: Client, job: BroadcastJob, force: bool = False):
+        """Edit the status message, at most every STATUS_EDIT_INTERVAL seconds"""
+        now = time.monotonic()
+        if not force and now - job._last_report < STATUS_EDIT_INTERVAL:
+            return
+        job._last_report = now
+        try:
+            await client.edit_message_text(
+                job.doc["status_chat"], job.doc["status_message"], job.progress_text()
+            )
+        except Exception:
+            pass
+
+    async def _checkpoint(self, job: BroadcastJob, user_ids: List[int], outcomes: Dict[int, tuple]):
+        """Count and persist a contiguous run of finished users, then advance last_user_id"""
+        failures = job.doc.setdefault("failures", {})
+        finished = {user_id: outcomes[user_id] for user_id in user_ids if user_id in outcomes}
+        for status, reason, _ in finished.values():
+            if status == "ok":
+                job.doc["success"] += 1
+            else:
+                job.doc["failed"] += 1
+                failures[reason] = failures.get(reason, 0) + 1
+
+        job.doc["last_user_id"] = user_ids[-1]
+        job.doc["updated_at"] = time.time()
+        await db.record_deliveries(job.id, finished)
+        await db.save_broadcast(
+            job.id,
+            last_user_id=job.doc["last_user_id"],
+            success=job.doc["success"],
+            failed=job.doc["failed"],
+            failures=failures,
+            updated_at=job.doc["updated_at"]
+        )
+
+    async def _send_page(self, client: Client, job: BroadcastJob, user_ids: List[int]):
+        """
+        Deliver to one page of users concurrently.
+
+        Sends finish out of order, so the checkpoint only covers the prefix of
+        the page in which every user is done, saved every CHECKPOINT_EVERY users.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        checkpoint_lock = asyncio.Lock()
+        done = [False] * len(user_ids)
+        outcomes: Dict[int, tuple] = {}
+        progress = {"frontier": 0, "saved": 0}
+
+        async def save(force: bool = False):
+            async with checkpoint_lock:
+                frontier, saved = progress["frontier"], progress["saved"]
+                if frontier > saved and (force or frontier - saved >= CHECKPOINT_EVERY):
+                    progress["saved"] = frontier
+                    await self._checkpoint(job, user_ids[saved:frontier], outcomes)
+
+        async def deliver(index: int, user_id: int):
+            async with semaphore:
+                outcome = await self._deliver(client, job, user_id)
+            if outcome is not None:
+                outcomes[user_id] = outcome
+            done[index] = True
+            while progress["frontier"] < len(done) and done[progress["frontier"]]:
+                progress["frontier"] += 1
+            try:
+                await save()
+            except Exception as e:
+                # Counters and last_user_id are persisted again by the next checkpoint
+                bot_logger.warning(f"Broadcast {job.id} checkpoint failed: {e}")
+
+        await asyncio.gather(*(deliver(index, user_id) for index, user_id in enumerate(user_ids)))
+        await save(force=True)
+
+    async def _run(self, client: Client, job: BroadcastJob):
+        """Stream recipients page by page, checkpointing as deliveries finish"""
+        try:
+            while not job.cancelled:
+                users = await db.get_users_after(job.doc["last_user_id"], self.batch_size)
+                if not users:
+                    break
+
+                await self._send_page(client, job, [user["user_id"] for user in users])
+                await self._report(client, job)
+
+            if not job.cancelled:
+                await self._set_status(job, COMPLETED)
+                bot_logger.info(
+                    f"Broadcast {job.id} completed: {job.doc['success']} sent, {job.doc['failed']} failed"
+                )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            bot_logger.error(f"Broadcast {job.id} failed: {e}")
+            await self._set_status(job, FAILED)
+
+        await self._report(client, job, force=True)
+
+
+# Create broadcast engine instance
+broadcaster = BroadcastEngine()
@@ -0,0 +1,121 @@
+"""
+Cache Module
+In-memory TTL cache with LRU eviction and coalescing of concurrent misses
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from core.metrics import metrics, record_cache
+from core.state import state_registry
+
+CACHE_COALESCED = metrics.counter(
+    "bot_cache_coalesced_total", "Cache misses served by an already running fetch", ["cache"]
+)
+
+
+class TTLCache:
+    """Bounded mapping whose entries expire after `ttl` seconds"""
+
+    def __init__(self, name: str, ttl: float, maxsize: int = 1024, persist: bool = True):
+        """
+        Initialize cache; `name` labels its metrics.
+
+        With `persist`, live entries are handed over across graceful restarts,
+        so values must be picklable.
+        """
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        if persist:
+            state_registry.register(f"cache.{name}", self.dump, self.load)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable):
+        """Return (found, value) without recording metrics"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry, or `default`"""
+        found, value = self._lookup(key)
+        record_cache(self.name, found)
+        return value if found else default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Store an entry, evicting the least recently used beyond `maxsize`"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        """Drop an entry"""
+        self._entries.pop(key, None)
+
+    def clear(self):
+        """Drop every entry"""
+        self._entries.clear()
+
+    def dump(self) -> List[tuple]:
+        """Live entries as (key, seconds left, value), least recently used first"""
+        now = time.monotonic()
+        return [(key, expires - now, value) for key, (expires, value) in self._entries.items() if expires > now]
+
+    def load(self, entries: List[tuple]):
+        """Restore entries from dump(), keeping their remaining lifetime"""
+        for key, remaining, value in entries:
+            if remaining > 0:
+                self.set(key, value, ttl=remaining)
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        should_cache: Callable[[Any], bool] = None
+    ) -> Any:
+        """
+        Return a cached value or fetch it, sharing one fetch between concurrent callers.
+
+        Results are only stored when `should_cache(result)` is true (always by
+        default). A fetch that raises is not cached and every waiter sees the error.
+        """
+        found, value = self._lookup(key)
+        record_cache(self.name, found)
+        if found:
+            return value
+
+        future = self._inflight.get(key)
+        if future is not None:
+            CACHE_COALESCED.inc(cache=self.name)
+        else:
+            future = asyncio.ensure_future(self._fetch(key, fetch, should_cache))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._done(key, done))
+
+        # One caller giving up must not cancel the fetch for the others
+        return await asyncio.shield(future)
+
+    def _done(self, key: Hashable, future: asyncio.Future):
+        """Forget a finished fetch; its error is re-raised to waiters, never left unretrieved"""
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            future.exception()
+
+    async def _fetch(self, key: Hashable, fetch, should_cache) -> Any:
+        """Run a fetch and store its result"""
+        value = await fetch()
+        if should_cache is None or should_cache(value):
+            self.set(key, value)
+        return value
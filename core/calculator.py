@@ -0,0 +1,172 @@
+"""
+Calculator Module
+Expression evaluation in a pre-warmed process pool with time/memory limits and an LRU result cache
+"""
+import os
+import re
+import signal
+import time
+from collections import OrderedDict
+from typing import Tuple
+from config import config
+from core.logger import bot_logger
+from core.metrics import metrics, record_cache
+from core.state import state_registry
+from core.workers import WorkerPool, WorkerCrashed, WorkerTimeout
+
+CALC_LATENCY = metrics.histogram(
+    "bot_calc_seconds", "Expression evaluation time, cache misses only", ["outcome"]
+)
+
+CACHE_NAME = "calc"
+
+# Wall-clock allowance on top of the in-worker timer before a worker is killed
+KILL_GRACE = 1.0
+
+# Allowed input when sympy is not installed
+BASIC_ARITHMETIC = re.compile(r"^[0-9+\-*/().\s]+$")
+
+
+# ==================== WORKER SIDE ====================
+
+def _limit_memory(limit: int):
+    """Cap the worker's address space at its current size plus `limit` bytes"""
+    try:
+        import resource
+        with open("/proc/self/statm") as f:
+            current = int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+        resource.setrlimit(resource.RLIMIT_AS, (current + limit, current + limit))
+    except (ImportError, OSError, ValueError):
+        # Not Linux: rely on the wall-clock limit only
+        pass
+
+
+def _init_worker(memory_limit: int):
+    """Import sympy once per worker, then apply the memory limit"""
+    # The parent's handlers make no sense in a worker
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        import sympy  # noqa: F401
+    except ImportError:
+        pass
+    if memory_limit:
+        _limit_memory(memory_limit)
+
+
+def _on_alarm(signum, frame):
+    raise TimeoutError
+
+
+def _evaluate(expression: str, timeout: float) -> Tuple[bool, str, bool]:
+    """
+    Evaluate one expression inside a worker, returns (ok, result or error, final).
+
+    `final` is False for time and memory limits, which depend on load and on
+    other workers as much as on the expression.
+    """
+    signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        try:
+            import sympy
+        except ImportError:
+            if not BASIC_ARITHMETIC.match(expression):
+                return False, "Only basic arithmetic operations are allowed", True
+            try:
+                return True, str(eval(expression, {"__builtins__": {}})), True
+            except (TimeoutError, MemoryError):
+                raise
+            except Exception as e:
+                return False, str(e), True
+
+        try:
+            return True, str(sympy.sympify(expression).evalf()), True
+        except (TimeoutError, MemoryError):
+            raise
+        except Exception:
+            return False, "Invalid expression", True
+    except TimeoutError:
+        return False, f"Evaluation took longer than {timeout:g}s", False
+    except MemoryError:
+        return False, "Evaluation used too much memory", False
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ==================== SERVICE ====================
+
+def normalize(expression: str) -> str:
+    """Cache key for an expression: surrounding and repeated whitespace removed"""
+    return " ".join(expression.split())
+
+
+class Calculator:
+    """Process pool evaluator with an LRU cache of results"""
+
+    def __init__(self):
+        """Initialize calculator"""
+        self.workers = config.CALC_WORKERS
+        self.timeout = config.CALC_TIMEOUT
+        self.memory_limit = config.CALC_MEMORY_MB * 1024 * 1024
+        self.cache_size = config.CALC_CACHE_SIZE
+        self._cache: "OrderedDict[str, Tuple[bool, str]]" = OrderedDict()
+        # Keep the result cache warm across graceful restarts
+        state_registry.register("calc.results", lambda: list(self._cache.items()), self._restore)
+        self._workers = WorkerPool(
+            "Calculator", self.workers, initializer=_init_worker, initargs=(self.memory_limit,)
+        )
+
+    async def start(self):
+        """Spawn every worker now so the first /calc does not pay for it"""
+        seconds = await self._workers.start()
+        bot_logger.info(f"🧮 Calculator pool ready: {self.workers} worker(s) in {seconds:.2f}s")
+
+    def _remember(self, key: str, result: Tuple[bool, str]):
+        """Store a result, evicting the least recently used"""
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _restore(self, items):
+        """Load cached results handed over by a restart"""
+        for key, result in items:
+            self._remember(key, result)
+
+    async def _run(self, expression: str) -> Tuple[bool, str, bool]:
+        """Evaluate in a worker, enforcing the hard deadline, returns (ok, result or error, final)"""
+        try:
+            return await self._workers.run(
+                _evaluate, expression, self.timeout, timeout=self.timeout + KILL_GRACE
+            )
+        except WorkerTimeout:
+            return False, f"Evaluation took longer than {self.timeout:g}s", False
+        except WorkerCrashed:
+            return False, "Evaluation used too much memory", False
+
+    async def evaluate(self, expression: str) -> Tuple[bool, str]:
+        """Evaluate an expression, returns (ok, result or error message)"""
+        key = normalize(expression)
+
+        cached = self._cache.get(key)
+        record_cache(CACHE_NAME, cached is not None)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        start = time.perf_counter()
+        ok, text, final = await self._run(key)
+        CALC_LATENCY.observe(time.perf_counter() - start, outcome="ok" if ok else "error")
+
+        # A limit hit under load may pass next time, so only final results are cached
+        if final:
+            self._remember(key, (ok, text))
+        return ok, text
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self._workers.shutdown()
+
+
+# Create calculator instance
+calculator = Calculator()
@@ -2,11 +2,29 @@
 Bot Client Module
 Handles Pyrogram client initialization and management
 """
+import os
+import sys
+import time
+import asyncio
 from pyrogram import Client, idle
 from pyrogram.enums import ParseMode
 from config import config
 from core.logger import bot_logger
 from core.database import db
+from core.instrumentation import instrument_client, install_update_gate
+from core.metrics import metrics_server
+from core.tracing import tracer
+from core.broadcast import broadcaster
+from core.lifecycle import lifecycle
+from core.state import state_registry
+from core.startup import StartupTimer, preload_plugins
+from core import lazy
+from core.calculator import calculator
+from core.http import http_client
+from core.translation import translator
+from core.downloads import downloads
+from core.postprocess import postprocessor
+from core.storage import storage
 
 
 class BotClient:
@@ -37,15 +55,45 @@ class BotClient:
                 bot_logger.critical("❌ Invalid configuration. Please check .env file")
                 return False
             
-            # Connect to database
+            timer = StartupTimer()
+            
+            # Remove partial downloads left by the last run before any new job can start
+            timer.measure("download_sweep", storage.sweep)
+            
+            # Updates wait in the dispatcher until the database, instrumentation and
+            # restored state are ready, so pyrogram can start alongside the rest
+            lifecycle.hold_updates()
+            install_update_gate(self.app)
+            
+            # Connect to database, open the HTTP pool, pre-import plugins and start pyrogram concurrently
+            independent = [
+                timer.run("telegram", self.app.start()),
+                timer.run("http_pool", http_client.start())
+            ]
             if config.ENABLE_DATABASE:
-                await db.connect()
+                independent.append(timer.run("database", db.connect()))
+            if config.ENABLE_PLUGINS:
+                independent.append(
+                    timer.run("plugin_imports", asyncio.to_thread(preload_plugins, "plugins"))
+                )
+            await asyncio.gather(*independent)
+            
+            # Instrument handlers and RPC calls
+            timer.measure("instrumentation", instrument_client, self.app)
+            
+            # Restore state handed over by a graceful restart
+            snapshot = timer.measure("state_restore", state_registry.restore, config.STATE_SNAPSHOT_FILE)
+            
+            # Start trace exporter
+            tracer.start()
             
-            # Start pyrogram client
-            await self.app.start()
+            lifecycle.release_updates()
             
-            # Get bot info
-            me = await self.app.get_me()
+            # Get bot info and start metrics endpoint
+            phases = [timer.run("get_me", self.app.get_me())]
+            if config.ENABLE_METRICS:
+                phases.append(timer.run("metrics", metrics_server.start()))
+            me = (await asyncio.gather(*phases))[0]
             bot_logger.success(f"✅ Bot started as @{me.username}")
             bot_logger.info(f"📊 Bot ID: {me.id}")
             bot_logger.info(f"👤 Owner ID: {config.OWNER_ID}")
@@ -54,20 +102,22 @@ class BotClient:
             
             self.started = True
             
-            # Send startup message to owner
+            # Report how long a restart took and resume interrupted broadcasts
+            await asyncio.gather(
+                timer.run("restart_report", self._report_restart(snapshot.get("restart"))),
+                timer.run("broadcast_resume", self._resume_broadcasts())
+            )
+            
+            bot_logger.info(f"⏱️ Startup v{config.BOT_VERSION}: {timer.report()}")
+            
+            # Import heavy dependencies in the background so first use is fast
+            if config.PREWARM_IMPORTS:
+                lifecycle.create_task(lazy.prewarm(), name="prewarm-imports")
+                lifecycle.create_task(calculator.start(), name="prewarm-calculator")
+            
+            # Send startup message to owner without holding up startup
             if config.OWNER_ID:
-                try:
-                    await self.app.send_message(
-                        config.OWNER_ID,
-                        f"✅ **Bot Started Successfully!**\n\n"
-                        f"🤖 **Username:** @{me.username}\n"
-                        f"🆔 **Bot ID:** `{me.id}`\n"
-                        f"📦 **Version:** `{config.BOT_VERSION}`\n"
-                        f"🔧 **Prefix:** `{config.COMMAND_PREFIX}`\n\n"
-                        f"Type `{config.COMMAND_PREFIX}help` to see available commands."
-                    )
-                except Exception as e:
-                    bot_logger.warning(f"Could not send startup message: {e}")
+                lifecycle.create_task(self._notify_owner(me), name="startup-notification")
             
             return True
             
@@ -75,21 +125,78 @@ class BotClient:
             bot_logger.critical(f"❌ Failed to start bot: {e}")
             return False
     
+    async def _resume_broadcasts(self):
+        """Resume broadcasts interrupted by a restart"""
+        if not db.connected:
+            return
+        resumed = await broadcaster.resume_all(self.app)
+        if resumed:
+            bot_logger.info(f"📢 Resumed {resumed} broadcast job(s)")
+    
+    async def _notify_owner(self, me):
+        """Send startup message to owner"""
+        try:
+            await self.app.send_message(
+                config.OWNER_ID,
+                f"✅ **Bot Started Successfully!**\n\n"
+                f"🤖 **Username:** @{me.username}\n"
+                f"🆔 **Bot ID:** `{me.id}`\n"
+                f"📦 **Version:** `{config.BOT_VERSION}`\n"
+                f"🔧 **Prefix:** `{config.COMMAND_PREFIX}`\n\n"
+                f"Type `{config.COMMAND_PREFIX}help` to see available commands."
+            )
+        except Exception as e:
+            bot_logger.warning(f"Could not send startup message: {e}")
+    
     async def stop(self):
-        """Stop the bot"""
+        """Stop the bot, draining in-flight work first"""
         try:
             bot_logger.info("🛑 Stopping bot...")
             
+            # Stop accepting updates and let running handlers and tasks finish
+            report = await lifecycle.shutdown(config.DRAIN_TIMEOUT)
+            
+            # Stop broadcasts, they resume from their checkpoint on next start
+            await broadcaster.shutdown()
+            
+            abandoned = []
+            if report["handlers"]:
+                abandoned.append(f"{report['handlers']} handler(s)")
+            if report["tasks"]:
+                abandoned.append(f"{len(report['tasks'])} task(s): {', '.join(report['tasks'])}")
+            if abandoned:
+                bot_logger.warning(f"⚠️ Abandoned at shutdown: {'; '.join(abandoned)}")
+            else:
+                bot_logger.info("✅ Drained all in-flight work")
+            # The dispatcher cannot stop while updates are held
+            lifecycle.discard_held()
+            if report["held"]:
+                abandoned.append(f"{report['held']} update(s) received while draining")
+            
             # Send shutdown message to owner
             if config.OWNER_ID and self.started:
                 try:
                     await self.app.send_message(
                         config.OWNER_ID,
                         "🛑 **Bot Stopped**"
+                        + (f"\n\n⚠️ **Abandoned:** {'; '.join(abandoned)}" if abandoned else "")
                     )
                 except Exception:
                     pass
             
+            # Stop worker pools and close pooled HTTP connections
+            calculator.shutdown()
+            translator.shutdown()
+            downloads.shutdown()
+            postprocessor.shutdown()
+            await http_client.close()
+            
+            # Stop metrics endpoint
+            await metrics_server.stop()
+            
+            # Flush pending traces
+            await tracer.stop()
+            
             # Disconnect from database
             if config.ENABLE_DATABASE:
                 await db.disconnect()
@@ -97,22 +204,126 @@ class BotClient:
             # Stop pyrogram client
             await self.app.stop()
             
+            self.started = False
             bot_logger.success("✅ Bot stopped successfully")
             
         except Exception as e:
             bot_logger.error(f"❌ Error while stopping bot: {e}")
+        finally:
+            await bot_logger.flush()
+    
+    async def _report_restart(self, restart_info: dict = None):
+        """Edit the message that requested a restart with the measured downtime"""
+        if not restart_info and db.connected:
+            restart_info = await db.get_data("bot_state", "restart")
+        if db.connected:
+            await db.delete_data("bot_state", "restart")
+        if not restart_info:
+            return
+        
+        downtime = time.time() - restart_info["stopped_at"]
+        bot_logger.info(f"🔄 Restart completed, downtime {downtime:.2f}s")
+        
+        text = f"✅ **Bot Restarted**\n\n⏱️ **Downtime:** `{downtime:.2f}s`"
+        if restart_info.get("unhandled"):
+            text += f"\n📭 **Unhandled:** `{restart_info['unhandled']}` updates received while restarting"
+        if restart_info.get("graceful"):
+            text += (
+                f"\n🧊 **State restored:** `{restart_info.get('providers', 0)}` providers\n"
+                f"⚠️ **Abandoned:** `{restart_info.get('abandoned', 0)}` handlers/tasks"
+            )
+        
+        try:
+            await self.app.edit_message_text(
+                restart_info["chat_id"], restart_info["message_id"], text
+            )
+        except Exception as e:
+            bot_logger.warning(f"Could not update restart message: {e}")
+    
+    async def graceful_restart(self, chat_id: int, message_id: int, graceful: bool = True):
+        """Re-exec the process, draining handlers and handing over state when graceful"""
+        restart_info = {
+            "chat_id": chat_id,
+            "message_id": message_id,
+            "graceful": graceful
+        }
+        
+        # Updates stop being handled once draining starts: any failure must bring the bot back
+        try:
+            if graceful:
+                bot_logger.info("🔄 Draining in-flight updates before restart...")
+                report = await lifecycle.shutdown(config.DRAIN_TIMEOUT)
+                restart_info["abandoned"] = report["handlers"] + len(report["tasks"])
+                
+                # Broadcasts resume from their checkpoint after the restart
+                await broadcaster.shutdown()
+            
+            restart_info["stopped_at"] = lifecycle.stopped_at or time.time()
+            # Held updates are handled if the restart fails, lost with this process otherwise
+            restart_info["unhandled"] = lifecycle.held
+            
+            if graceful:
+                restart_info["providers"] = state_registry.snapshot(
+                    config.STATE_SNAPSHOT_FILE,
+                    restart=restart_info
+                )
+                await tracer.stop()
+                await metrics_server.stop()
+            
+            if db.connected:
+                await db.set_data("bot_state", "restart", restart_info)
+            
+            bot_logger.info("🔄 Re-executing bot process")
+            await bot_logger.flush()
+            os.execv(sys.executable, ['python'] + sys.argv)
+        except Exception as e:
+            bot_logger.error(f"❌ Restart failed, resuming: {e}")
+            await self._abort_restart(chat_id, message_id, e)
+    
+    async def _abort_restart(self, chat_id: int, message_id: int, error: Exception):
+        """Undo a failed restart: accept updates again and restart what was stopped"""
+        lifecycle.resume_accepting()
+        
+        # A stale snapshot or restart record must not be picked up by a later start
+        if os.path.exists(config.STATE_SNAPSHOT_FILE):
+            os.remove(config.STATE_SNAPSHOT_FILE)
+        
+        tracer.start()
+        if config.ENABLE_METRICS:
+            await metrics_server.start()
+        
+        try:
+            if db.connected:
+                await db.delete_data("bot_state", "restart")
+            await self._resume_broadcasts()
+        except Exception as e:
+            bot_logger.warning(f"Could not resume after failed restart: {e}")
+        
+        try:
+            await self.app.edit_message_text(
+                chat_id,
+                message_id,
+                f"❌ **Restart failed:** `{error}`\n\nThe bot is still running."
+            )
+        except Exception as e:
+            bot_logger.warning(f"Could not update restart message: {e}")
     
     async def restart(self):
         """Restart the bot"""
         bot_logger.info("🔄 Restarting bot...")
         await self.stop()
+        lifecycle.resume_accepting()
         await self.start()
     
+    async def _run_until_stopped(self):
+        """Start the bot and wait for a stop signal"""
+        if await self.start():
+            await idle()
+    
     def run(self):
         """Run the bot (blocking)"""
         try:
-            self.app.run(self.start())
-            idle()
+            self.app.run(self._run_until_stopped())
         except KeyboardInterrupt:
             bot_logger.info("🛑 Bot stopped by user (Ctrl+C)")
         except Exception as e:
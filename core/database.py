@@ -2,10 +2,40 @@
 Database Module
 MongoDB integration for data persistence
 """
+import time
+import asyncio
+from datetime import datetime
+from functools import wraps
 from typing import Optional, Dict, Any, List
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 from config import config
 from core.logger import bot_logger
+from core.metrics import DB_OPERATIONS, DB_LATENCY
+from core.tracing import tracer, KIND_CLIENT
+
+
+def _instrumented(func):
+    """Record count, outcome, latency and a trace span of a database operation"""
+    operation = func.__name__
+
+    @wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if not self.connected:
+            return await func(self, *args, **kwargs)
+
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            with tracer.span(f"db {operation}", KIND_CLIENT, **{"db.operation": operation}):
+                return await func(self, *args, **kwargs)
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            DB_LATENCY.observe(time.perf_counter() - start, operation=operation)
+            DB_OPERATIONS.inc(operation=operation, status=status)
+    return wrapper
 
 
 class Database:
@@ -31,6 +61,9 @@ class Database:
             await self.client.admin.command('ping')
             self.connected = True
             bot_logger.success("✅ Connected to MongoDB")
+            
+            await self.ensure_indexes()
+            await self.migrate()
             return True
         except Exception as e:
             bot_logger.error(f"❌ Failed to connect to MongoDB: {e}")
@@ -43,13 +76,60 @@ class Database:
             self.client.close()
             bot_logger.info("Disconnected from MongoDB")
     
+    async def ensure_indexes(self):
+        """Create indexes used by paged queries"""
+        try:
+            await self.db.users.create_index("user_id")
+            await self.db.users.create_index([("unreachable", 1), ("user_id", 1)])
+            await self.db.broadcasts.create_index("status")
+            # TTL indexes need a datetime field, hence datetime rather than time.time()
+            await self.db.media_cache.create_index(
+                "last_used", expireAfterSeconds=config.MEDIA_CACHE_TTL_DAYS * 86400
+            )
+        except Exception as e:
+            bot_logger.warning(f"Could not create indexes: {e}")
+    
+    async def migrate(self):
+        """Apply one-off data migrations not yet recorded in bot_state"""
+        migrations = [
+            ("users_unreachable_field", self._backfill_unreachable),
+            ("users_peer_id_invalid_reachable", self._clear_invalid_peers),
+        ]
+        try:
+            applied = await self.get_data("bot_state", "migrations") or []
+            for name, migration in migrations:
+                if name in applied:
+                    continue
+                await migration()
+                applied.append(name)
+                await self.set_data("bot_state", "migrations", applied)
+                bot_logger.info(f"🗃️ Applied database migration {name}")
+        except Exception as e:
+            bot_logger.warning(f"Database migration failed: {e}")
+    
+    async def _backfill_unreachable(self):
+        """Older user documents predate delivery tracking"""
+        await self.db.users.update_many(
+            {"unreachable": {"$exists": False}},
+            {"$set": {"unreachable": False}}
+        )
+    
+    async def _clear_invalid_peers(self):
+        """PeerIdInvalid used to mark users unreachable, it only means the session lost their access hash"""
+        await self.db.users.update_many(
+            {"unreachable": True, "unreachable_reason": "invalid"},
+            {"$set": {"unreachable": False}, "$unset": {"unreachable_reason": "", "unreachable_at": ""}}
+        )
+    
     # User Data Methods
+    @_instrumented
     async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user data from database"""
         if not self.connected:
             return None
         return await self.db.users.find_one({"user_id": user_id})
     
+    @_instrumented
     async def add_user(self, user_id: int, username: str = None, **kwargs):
         """Add or update user in database"""
         if not self.connected:
@@ -58,6 +138,7 @@ class Database:
         user_data = {
             "user_id": user_id,
             "username": username,
+            "unreachable": False,
             **kwargs
         }
         
@@ -67,13 +148,152 @@ class Database:
             upsert=True
         )
     
+    @_instrumented
     async def get_all_users(self) -> List[Dict[str, Any]]:
         """Get all users from database"""
         if not self.connected:
             return []
         return await self.db.users.find().to_list(length=None)
     
+    @_instrumented
+    async def get_users_after(self, after_id: Optional[int] = None, limit: int = 500,
+                              reachable_only: bool = True) -> List[Dict[str, Any]]:
+        """Get the next page of user IDs, ordered by user_id"""
+        if not self.connected:
+            return []
+        
+        query = {"unreachable": False} if reachable_only else {}
+        if after_id is not None:
+            query["user_id"] = {"$gt": after_id}
+        
+        cursor = self.db.users.find(query, {"_id": 0, "user_id": 1}).sort("user_id", 1).limit(limit)
+        return await cursor.to_list(length=limit)
+    
+    @_instrumented
+    async def count_users(self, reachable_only: bool = False) -> int:
+        """Get the user count, estimated from metadata unless reachable_only"""
+        if not self.connected:
+            return 0
+        if reachable_only:
+            return await self.db.users.count_documents({"unreachable": False})
+        return await self.db.users.estimated_document_count()
+    
+    @_instrumented
+    async def record_deliveries(self, job_id: str, outcomes: Dict[int, tuple]):
+        """Store per-user delivery outcomes, {user_id: (status, reason, permanent)}"""
+        if not self.connected or not outcomes:
+            return
+        
+        now = time.time()
+        requests = []
+        for user_id, (status, reason, permanent) in outcomes.items():
+            fields = {
+                "last_delivery": {"job": job_id, "status": status, "reason": reason, "at": now}
+            }
+            if permanent:
+                fields.update(unreachable=True, unreachable_reason=reason, unreachable_at=now)
+            requests.append(UpdateOne({"user_id": user_id}, {"$set": fields}))
+        
+        await self.db.users.bulk_write(requests, ordered=False)
+    
+    @_instrumented
+    async def get_reachability(self) -> Dict[str, Any]:
+        """Count reachable users and unreachable ones by reason"""
+        if not self.connected:
+            return {"reachable": 0, "unreachable": 0, "reasons": {}}
+        
+        reachable = await self.db.users.count_documents({"unreachable": False})
+        pipeline = [
+            {"$match": {"unreachable": True}},
+            {"$group": {"_id": "$unreachable_reason", "count": {"$sum": 1}}}
+        ]
+        reasons = {
+            doc["_id"] or "unknown": doc["count"]
+            async for doc in self.db.users.aggregate(pipeline)
+        }
+        return {
+            "reachable": reachable,
+            "unreachable": sum(reasons.values()),
+            "reasons": reasons
+        }
+    
+    # Broadcast Job Methods
+    @_instrumented
+    async def save_broadcast(self, job_id: str, **fields):
+        """Create or update a broadcast job"""
+        if not self.connected:
+            return
+        
+        await self.db.broadcasts.update_one(
+            {"_id": job_id},
+            {"$set": fields},
+            upsert=True
+        )
+    
+    @_instrumented
+    async def get_broadcast(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a broadcast job"""
+        if not self.connected:
+            return None
+        return await self.db.broadcasts.find_one({"_id": job_id})
+    
+    @_instrumented
+    async def get_broadcasts(self, statuses: List[str]) -> List[Dict[str, Any]]:
+        """Get broadcast jobs in any of the given states"""
+        if not self.connected:
+            return []
+        return await self.db.broadcasts.find({"status": {"$in": statuses}}).to_list(length=None)
+    
+    # Media Cache Methods
+    @_instrumented
+    async def get_media(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a cached upload and mark it as used"""
+        if not self.connected:
+            return None
+        return await self.db.media_cache.find_one_and_update(
+            {"_id": key},
+            {"$set": {"last_used": datetime.utcnow()}, "$inc": {"hits": 1}}
+        )
+    
+    @_instrumented
+    async def save_media(self, key: str, file_id: str, **fields):
+        """Remember the file_id of an upload"""
+        if not self.connected:
+            return
+        
+        now = datetime.utcnow()
+        await self.db.media_cache.update_one(
+            {"_id": key},
+            {
+                "$set": {"file_id": file_id, "last_used": now, **fields},
+                "$setOnInsert": {"created_at": now, "hits": 0}
+            },
+            upsert=True
+        )
+    
+    @_instrumented
+    async def delete_media(self, key: str):
+        """Forget a cached upload"""
+        if not self.connected:
+            return
+        await self.db.media_cache.delete_one({"_id": key})
+    
+    @_instrumented
+    async def trim_media(self, max_entries: int) -> int:
+        """Delete the least recently used uploads beyond `max_entries`, returns how many"""
+        if not self.connected:
+            return 0
+        
+        excess = await self.db.media_cache.estimated_document_count() - max_entries
+        if excess <= 0:
+            return 0
+        
+        oldest = await self.db.media_cache.find({}, {"_id": 1}).sort("last_used", 1).limit(excess).to_list(length=excess)
+        result = await self.db.media_cache.delete_many({"_id": {"$in": [doc["_id"] for doc in oldest]}})
+        return result.deleted_count
+    
     # Plugin Data Methods
+    @_instrumented
     async def set_data(self, collection: str, key: str, value: Any):
         """Set data in a collection"""
         if not self.connected:
@@ -85,6 +305,7 @@ class Database:
             upsert=True
         )
     
+    @_instrumented
     async def get_data(self, collection: str, key: str) -> Optional[Any]:
         """Get data from a collection"""
         if not self.connected:
@@ -93,6 +314,7 @@ class Database:
         result = await self.db[collection].find_one({"key": key})
         return result.get("value") if result else None
     
+    @_instrumented
     async def delete_data(self, collection: str, key: str):
         """Delete data from a collection"""
         if not self.connected:
@@ -100,7 +322,51 @@ class Database:
         
         await self.db[collection].delete_one({"key": key})
     
+    # Storage Methods
+    async def _collection_stats(self, name: str, exact: bool) -> Dict[str, Any]:
+        """Count and storage statistics for one collection"""
+        collection = self.db[name]
+        stats = {"name": name}
+        
+        try:
+            pipeline = [{"$collStats": {"storageStats": {}}}]
+            async for doc in collection.aggregate(pipeline):
+                storage = doc.get("storageStats", {})
+                stats.update(
+                    count=storage.get("count", 0),
+                    size=storage.get("size", 0),
+                    storage_size=storage.get("storageSize", 0),
+                    avg_obj_size=storage.get("avgObjSize", 0),
+                    index_size=storage.get("totalIndexSize", 0),
+                    indexes=storage.get("nindexes", 0)
+                )
+        except Exception:
+            # Storage stats need the collStats privilege
+            stats["count"] = await collection.estimated_document_count()
+        
+        if exact:
+            stats["count"] = await collection.count_documents({})
+        
+        return stats
+    
+    @_instrumented
+    async def get_storage_stats(self, exact: bool = False) -> List[Dict[str, Any]]:
+        """Per-collection counts and sizes, gathered concurrently"""
+        if not self.connected:
+            return []
+        
+        names = await self.db.list_collection_names()
+        results = await asyncio.gather(
+            *(self._collection_stats(name, exact) for name in names),
+            return_exceptions=True
+        )
+        return [
+            result if not isinstance(result, Exception) else {"name": name, "error": str(result)}
+            for name, result in zip(names, results)
+        ]
+    
     # Statistics Methods
+    @_instrumented
     async def increment_stat(self, stat_name: str, value: int = 1):
         """Increment a statistic"""
         if not self.connected:
@@ -112,6 +378,7 @@ class Database:
             upsert=True
         )
     
+    @_instrumented
     async def get_stat(self, stat_name: str) -> int:
         """Get a statistic value"""
         if not self.connected:
@@ -0,0 +1,314 @@
+"""
+Downloads Module
+Media download job queue: bounded concurrency, per-user quotas and pluggable backends
+"""
+import asyncio
+import hashlib
+import os
+import time
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urljoin
+from config import config
+from core.http import http_client
+from core import transfer
+from core.lifecycle import lifecycle
+from core.logger import bot_logger
+from core.metrics import metrics
+from core.storage import storage, RESUME_PREFIX
+
+# Job states
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+UPLOADING = "uploading"
+DONE = "done"
+FAILED = "failed"
+
+DOWNLOAD_JOBS = metrics.counter(
+    "bot_download_jobs_total", "Finished download jobs", ["backend", "status"]
+)
+DOWNLOAD_BYTES = metrics.counter(
+    "bot_download_bytes_total", "Bytes downloaded by download jobs", ["backend"]
+)
+DOWNLOAD_SECONDS = metrics.histogram(
+    "bot_download_seconds", "Time from a job starting to its file being ready", ["backend"],
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+)
+
+
+class DownloadError(Exception):
+    """Raised by a backend when a download fails"""
+
+
+class QuotaExceeded(Exception):
+    """Raised when a user already has the maximum number of jobs"""
+
+
+class DownloadJob:
+    """One queued or running download"""
+
+    def __init__(self, job_id: str, user_id: int, url: str):
+        """Initialize job"""
+        self.id = job_id
+        self.user_id = user_id
+        self.url = url
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.downloaded = 0
+        self.total: Optional[int] = None
+        self.path: Optional[str] = None
+        self.title: Optional[str] = None
+        # Optional metadata from the backend, used as upload hints
+        self.performer: Optional[str] = None
+        self.duration: Optional[float] = None
+        self.thumbnail: Optional[str] = None
+        self.error: Optional[str] = None
+        self.cache_key: Optional[str] = None
+        self.cached = False
+        self.task: Optional[asyncio.Task] = None
+
+    def set_progress(self, downloaded: int, total: Optional[int] = None):
+        """Progress callback for backends"""
+        self.downloaded = downloaded
+        if total:
+            self.total = total
+
+    @property
+    def hints(self) -> Dict[str, Any]:
+        """Metadata the backend reported, for post-processing"""
+        return {
+            "title": self.title,
+            "performer": self.performer,
+            "duration": self.duration,
+            "thumbnail": self.thumbnail
+        }
+
+    @property
+    def speed(self) -> float:
+        """Average download speed in bytes per second"""
+        if not self.started:
+            return 0.0
+        return self.downloaded / max(time.time() - self.started, 0.001)
+
+
+class RemoteBackend:
+    """Downloads through the external download API"""
+
+    name = "remote"
+
+    def __init__(self, api: str):
+        """Initialize backend with the API base URL"""
+        self.api = api.rstrip("/")
+        # One writer per partial file when several jobs want the same media
+        self._locks = weakref.WeakValueDictionary()
+
+    async def fetch(self, job: DownloadJob, directory: str) -> str:
+        """Ask the API for the file, then stream it to `directory`, returns the local path"""
+        import aiohttp
+
+        timeout = aiohttp.ClientTimeout(total=config.DOWNLOAD_TIMEOUT)
+        status, data = await http_client.post_json(
+            f"{self.api}/download", json={"url": job.url}, timeout=timeout
+        )
+        if status != 200 or not isinstance(data, dict) or data.get("status") != "ok":
+            error = data.get("error") if isinstance(data, dict) else None
+            raise DownloadError(error or f"Download API returned HTTP {status}")
+
+        job.title = data.get("title")
+        job.performer = data.get("artist") or data.get("uploader")
+        job.duration = data.get("duration")
+        job.thumbnail = data.get("thumbnail")
+        remote_file = data.get("file") or ""
+
+        # Preferred: the API exposes the file over HTTP
+        file_url = data.get("url") or data.get("download_url")
+        if file_url:
+            filename = os.path.basename(remote_file) or "audio.mp3"
+            path = os.path.join(directory, f"{job.id}_{filename}")
+            # Named after the media rather than the job, so a retry resumes where a failed attempt stopped
+            source = hashlib.sha1((job.cache_key or job.url).encode()).hexdigest()[:16]
+            partial = os.path.join(directory, f"{RESUME_PREFIX}{source}_{filename}")
+            lock = self._locks.get(partial)
+            if lock is None:
+                lock = self._locks[partial] = asyncio.Lock()
+            async with lock:
+                try:
+                    await transfer.download(
+                        urljoin(f"{self.api}/", file_url),
+                        partial,
+                        progress=job.set_progress,
+                        timeout=timeout
+                    )
+                except BaseException:
+                    # Ranged downloads keep their segments for the next attempt, anything else is dropped
+                    if not transfer.resumable(partial):
+                        transfer.discard(partial)
+                    raise
+                os.replace(partial, path)
+            return path
+
+        # Otherwise the API must share our filesystem
+        if remote_file and os.path.exists(remote_file):
+            job.set_progress(os.path.getsize(remote_file), os.path.getsize(remote_file))
+            return remote_file
+
+        raise DownloadError("Download API returned no file")
+
+
+def create_backend(name: str = None):
+    """Backend selected by YT_BACKEND: 'remote' (download API) or 'local' (yt-dlp)"""
+    name = (name or config.YT_BACKEND).lower()
+    if name == "local":
+        from core.ytdlp import LocalBackend
+        try:
+            return LocalBackend()
+        except RuntimeError as e:
+            bot_logger.warning(f"Local download backend unavailable ({e}), using the download API")
+    return RemoteBackend(config.YT_API)
+
+
+class DownloadQueue:
+    """Runs download jobs with bounded concurrency and per-user limits"""
+
+    def __init__(self, backend=None):
+        """Initialize queue"""
+        self.backend = backend or create_backend()
+        self.directory = config.DOWNLOAD_DIR
+        self.concurrency = config.DOWNLOAD_CONCURRENCY
+        self.per_user = config.DOWNLOAD_USER_LIMIT
+        self.update_interval = config.DOWNLOAD_EDIT_INTERVAL
+        self._slots = asyncio.Semaphore(self.concurrency)
+        self._jobs: Dict[str, DownloadJob] = {}
+
+    def jobs(self, user_id: int = None) -> List[DownloadJob]:
+        """Unfinished jobs in submission order, optionally for one user"""
+        return [job for job in self._jobs.values() if user_id is None or job.user_id == user_id]
+
+    def position(self, job: DownloadJob) -> int:
+        """1-based place of a queued job, 0 once it has started"""
+        if job.status != QUEUED:
+            return 0
+        queued = [other for other in self._jobs.values() if other.status == QUEUED]
+        return queued.index(job) + 1
+
+    def submit(
+        self,
+        user_id: int,
+        url: str,
+        deliver: Callable[[DownloadJob], Awaitable[None]],
+        on_update: Callable[[DownloadJob], Awaitable[None]] = None,
+        cache_key: str = None
+    ) -> DownloadJob:
+        """
+        Queue a download.
+
+        `deliver(job)` is awaited once the file is at `job.path`. Without a
+        `cache_key` the file is removed afterwards; with one it is kept in the
+        downloads directory and reused by later jobs with the same key until
+        the disk quota evicts it. `on_update(job)` is awaited periodically
+        while the job waits or downloads, and once more when it fails.
+        """
+        if len(self.jobs(user_id)) >= self.per_user:
+            raise QuotaExceeded(
+                f"You already have {self.per_user} download(s) in progress, wait for them to finish"
+            )
+
+        job = DownloadJob(uuid.uuid4().hex[:8], user_id, url)
+        job.cache_key = cache_key
+        self._jobs[job.id] = job
+        job.task = lifecycle.create_task(self._run(job, deliver, on_update), name=f"download-{job.id}")
+        return job
+
+    async def _report(self, job: DownloadJob, on_update):
+        """Call on_update every interval while the job waits or downloads"""
+        while job.status in (QUEUED, DOWNLOADING):
+            await self._notify(job, on_update)
+            await asyncio.sleep(self.update_interval)
+
+    @staticmethod
+    async def _notify(job: DownloadJob, on_update):
+        """Call on_update, a failing status edit must not fail the job"""
+        if on_update is None:
+            return
+        try:
+            await on_update(job)
+        except Exception as e:
+            bot_logger.debug(f"Download {job.id} update failed: {e}")
+
+    async def _fetch(self, job: DownloadJob):
+        """Set `job.path`, from the disk cache or by downloading"""
+        cached = storage.lookup(job.cache_key) if job.cache_key else None
+        if cached:
+            job.path = cached
+            job.cached = True
+            storage.pin(cached)
+            # The backend is skipped, so its metadata comes from the cache entry
+            hints = storage.hints(job.cache_key)
+            job.title = hints.get("title")
+            job.performer = hints.get("performer")
+            job.duration = hints.get("duration")
+            job.thumbnail = hints.get("thumbnail")
+            size = os.path.getsize(cached)
+            job.set_progress(size, size)
+            return
+
+        backend = self.backend.name
+        async with self._slots:
+            job.status = DOWNLOADING
+            job.started = time.time()
+            os.makedirs(self.directory, exist_ok=True)
+            storage.begin(job.id)
+            job.path = await self.backend.fetch(job, self.directory)
+            DOWNLOAD_SECONDS.observe(time.time() - job.started, backend=backend)
+            DOWNLOAD_BYTES.inc(job.downloaded, backend=backend)
+
+    def _cleanup(self, job: DownloadJob):
+        """Keep a delivered file as cached media or delete it"""
+        if job.cached:
+            storage.unpin(job.path)
+            return
+        if job.status == DONE and job.cache_key and job.path and storage.owns(job.path):
+            storage.store(job.cache_key, job.path, job.hints)
+        else:
+            storage.remove(job.path)
+        storage.end(job.id)
+
+    async def _run(self, job: DownloadJob, deliver, on_update):
+        """Wait for a slot, download, deliver and clean up"""
+        backend = self.backend.name
+        reporter = asyncio.create_task(self._report(job, on_update)) if on_update else None
+        try:
+            await self._fetch(job)
+
+            job.status = UPLOADING
+            await deliver(job)
+            job.status = DONE
+        except asyncio.CancelledError:
+            job.status = FAILED
+            job.error = "Cancelled"
+            raise
+        except Exception as e:
+            job.status = FAILED
+            job.error = str(e) or type(e).__name__
+            bot_logger.warning(f"Download {job.id} failed for {job.url}: {job.error}")
+        finally:
+            if reporter:
+                reporter.cancel()
+            self._cleanup(job)
+            self._jobs.pop(job.id, None)
+            DOWNLOAD_JOBS.inc(backend=backend, status=job.status)
+
+        if job.status == FAILED:
+            await self._notify(job, on_update)
+
+    def shutdown(self):
+        """Release backend resources such as worker processes"""
+        shutdown = getattr(self.backend, "shutdown", None)
+        if shutdown:
+            shutdown()
+
+
+# Create download queue instance
+downloads = DownloadQueue()
@@ -0,0 +1,167 @@
+"""
+HTTP Module
+Process-wide pooled aiohttp session with keep-alive
+"""
+import asyncio
+import time
+from typing import Any, Callable, Optional, Tuple
+from urllib.parse import urlsplit
+from config import config
+from core.logger import bot_logger
+from core.metrics import metrics
+from core.tracing import tracer, KIND_CLIENT
+
+HTTP_REQUESTS = metrics.counter(
+    "bot_http_requests_total", "Outgoing HTTP requests", ["host", "status"]
+)
+HTTP_LATENCY = metrics.histogram(
+    "bot_http_request_seconds", "Outgoing HTTP request latency", ["host"]
+)
+
+
+class HttpClient:
+    """Shared connection pool for outgoing HTTP requests"""
+
+    def __init__(self):
+        """Initialize HTTP client"""
+        self._session = None
+
+    async def start(self):
+        """Open the pooled session"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_POOL_SIZE,
+            ttl_dns_cache=300,
+            keepalive_timeout=config.HTTP_KEEPALIVE
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=config.HTTP_TIMEOUT)
+        )
+        bot_logger.info(f"🌐 HTTP pool opened ({config.HTTP_POOL_SIZE} connections)")
+
+    async def close(self):
+        """Close the session and every pooled connection"""
+        if self._session is None:
+            return
+        if not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def session(self):
+        """Get the shared session, opening it if needed (e.g. after a plugin reload)"""
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def get_json(self, url: str, params: Optional[dict] = None, **kwargs) -> Tuple[int, Any]:
+        """GET a URL, returns (status, decoded JSON or None)"""
+        return await self.request_json("GET", url, params=params, **kwargs)
+
+    async def post_json(self, url: str, json: Any = None, **kwargs) -> Tuple[int, Any]:
+        """POST a JSON body, returns (status, decoded JSON or None)"""
+        return await self.request_json("POST", url, json=json, **kwargs)
+
+    async def request_json(self, method: str, url: str, **kwargs) -> Tuple[int, Any]:
+        """Send a request, returns (status, decoded JSON or None)"""
+        session = await self.session()
+        host = urlsplit(url).hostname or "unknown"
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"http {method} {host}", KIND_CLIENT, **{"http.host": host}) as span:
+                async with session.request(method, url, **kwargs) as resp:
+                    status = str(resp.status)
+                    span.set_attribute("http.status_code", resp.status)
+                    try:
+                        data = await resp.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    return resp.status, data
+        finally:
+            HTTP_REQUESTS.inc(host=host, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - start, host=host)
+
+    async def get_bytes(self, url: str, max_size: int = None, **kwargs) -> Tuple[int, Optional[bytes]]:
+        """GET a small body, returns (status, bytes or None if not 200 or larger than `max_size`)"""
+        session = await self.session()
+        host = urlsplit(url).hostname or "unknown"
+        status = "error"
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"http GET {host}", KIND_CLIENT, **{"http.host": host}) as span:
+                async with session.get(url, **kwargs) as resp:
+                    status = str(resp.status)
+                    span.set_attribute("http.status_code", resp.status)
+                    if resp.status != 200:
+                        return resp.status, None
+                    if max_size and (resp.content_length or 0) > max_size:
+                        return resp.status, None
+                    body = bytearray()
+                    async for chunk in resp.content.iter_chunked(64 * 1024):
+                        body += chunk
+                        if max_size and len(body) > max_size:
+                            return resp.status, None
+                    return resp.status, bytes(body)
+        finally:
+            HTTP_REQUESTS.inc(host=host, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - start, host=host)
+
+    async def download(
+        self,
+        url: str,
+        path: str,
+        progress: Callable[[int, Optional[int]], None] = None,
+        chunk_size: int = 256 * 1024,
+        **kwargs
+    ) -> int:
+        """
+        Stream a response body to `path`, returns bytes written.
+
+        Disk writes run in a worker thread, buffered up to `chunk_size` so a
+        slow disk neither blocks the event loop nor costs a thread hop per
+        network read.
+        """
+        session = await self.session()
+        host = urlsplit(url).hostname or "unknown"
+        status = "error"
+        start = time.perf_counter()
+        written = 0
+        # Compressed bodies would not match Content-Length
+        headers = {"Accept-Encoding": "identity", **kwargs.pop("headers", {})}
+        try:
+            with tracer.span(f"http download {host}", KIND_CLIENT, **{"http.host": host}) as span:
+                async with session.get(url, headers=headers, **kwargs) as resp:
+                    status = str(resp.status)
+                    resp.raise_for_status()
+                    total = resp.content_length
+                    f = await asyncio.to_thread(open, path, "wb")
+                    try:
+                        buffer = bytearray()
+                        async for chunk in resp.content.iter_chunked(chunk_size):
+                            buffer += chunk
+                            written += len(chunk)
+                            if len(buffer) >= chunk_size:
+                                await asyncio.to_thread(f.write, bytes(buffer))
+                                buffer.clear()
+                            if progress:
+                                progress(written, total)
+                        if buffer:
+                            await asyncio.to_thread(f.write, bytes(buffer))
+                    finally:
+                        await asyncio.to_thread(f.close)
+                    span.set_attribute("http.response_bytes", written)
+            if total is not None and written != total:
+                raise IOError(f"Incomplete download: {written} of {total} bytes")
+            return written
+        finally:
+            HTTP_REQUESTS.inc(host=host, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - start, host=host)
+
+
+# Create HTTP client instance
+http_client = HttpClient()
@@ -0,0 +1,163 @@
+"""
+Instrumentation Module
+Hooks metrics into the Pyrogram client: updates, handlers, API methods and RPC calls
+"""
+import inspect
+import time
+from functools import wraps
+from pyrogram import Client, StopPropagation, ContinuePropagation
+from pyrogram.handlers import RawUpdateHandler
+from core.metrics import (
+    UPDATES_RECEIVED,
+    HANDLER_CALLS,
+    HANDLER_LATENCY,
+    RPC_REQUESTS,
+    RPC_ERRORS,
+    RPC_LATENCY
+)
+from core.perf import perf_tracker
+from core.accounting import api_accounting, set_current_handler, reset_current_handler
+from core.tracing import tracer, KIND_SERVER, KIND_CLIENT
+from core.lifecycle import lifecycle
+
+# Runs before every plugin handler group
+UPDATE_COUNTER_GROUP = -1000
+
+
+def _filter_commands(flt) -> list:
+    """Collect command names from a (possibly combined) filter"""
+    if flt is None:
+        return []
+
+    commands = getattr(flt, "commands", None)
+    if commands:
+        return sorted(commands)
+
+    found = []
+    for attr in ("base", "other"):
+        found.extend(_filter_commands(getattr(flt, attr, None)))
+    return found
+
+
+def handler_name(handler) -> str:
+    """Get a readable name for a registered handler"""
+    commands = _filter_commands(getattr(handler, "filters", None))
+    if commands:
+        return "/".join(commands)
+    return getattr(handler.callback, "__name__", type(handler).__name__)
+
+
+def rpc_method_name(query) -> str:
+    """Get the TL method name of a raw query"""
+    name = getattr(query, "QUALNAME", type(query).__name__)
+    return name[len("functions."):] if name.startswith("functions.") else name
+
+
+def _wrap_handler(handler):
+    """Wrap a handler callback to record latency and outcome"""
+    callback = handler.callback
+    name = handler_name(handler)
+
+    @wraps(callback)
+    async def wrapper(client, *args):
+        start = time.perf_counter()
+        status = "ok"
+        token = set_current_handler(name)
+        lifecycle.begin()
+        try:
+            with tracer.span(f"handler {name}", KIND_SERVER, handler=name) as span:
+                chat = getattr(args[0], "chat", None) if args else None
+                if chat is not None:
+                    span.set_attribute("chat.id", chat.id)
+                return await callback(client, *args)
+        except (StopPropagation, ContinuePropagation):
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            lifecycle.end()
+            reset_current_handler(token)
+            elapsed = time.perf_counter() - start
+            HANDLER_LATENCY.observe(elapsed, handler=name)
+            HANDLER_CALLS.inc(handler=name, status=status)
+            perf_tracker.record(name, elapsed, status == "error")
+
+    wrapper.__instrumented__ = True
+    handler.callback = wrapper
+
+
+def instrument_handler(handler) -> bool:
+    """Wrap a single coroutine handler unless it already is, returns whether it was wrapped"""
+    callback = handler.callback
+    if getattr(callback, "__instrumented__", False):
+        return False
+    if not inspect.iscoroutinefunction(callback):
+        return False
+    _wrap_handler(handler)
+    return True
+
+
+def instrument_handlers(app: Client) -> int:
+    """Wrap every registered coroutine handler, returns how many were wrapped"""
+    wrapped = 0
+    for group in app.dispatcher.groups.values():
+        for handler in group:
+            wrapped += instrument_handler(handler)
+    return wrapped
+
+
+def instrument_rpc(app: Client):
+    """Wrap Client.invoke to count and time every Telegram RPC"""
+    if getattr(app.invoke, "__instrumented__", False):
+        return
+
+    original_invoke = app.invoke
+
+    @wraps(original_invoke)
+    async def invoke(query, *args, **kwargs):
+        method = rpc_method_name(query)
+        api_accounting.record_rpc()
+        start = time.perf_counter()
+        try:
+            with tracer.span(f"rpc {method}", KIND_CLIENT, **{"rpc.method": method}):
+                return await original_invoke(query, *args, **kwargs)
+        except Exception as e:
+            RPC_ERRORS.inc(method=method, error=type(e).__name__)
+            raise
+        finally:
+            RPC_REQUESTS.inc(method=method)
+            RPC_LATENCY.observe(time.perf_counter() - start, method=method)
+
+    invoke.__instrumented__ = True
+    app.invoke = invoke
+
+
+async def _count_update(client, update, users, chats):
+    """Count every raw update, holding it during startup and while draining"""
+    UPDATES_RECEIVED.inc(type=type(update).__name__)
+    await lifecycle.wait_ready()
+    # Handled if a restart fails and the bot resumes, discarded if it stops
+    if not lifecycle.accepting and not await lifecycle.hold_update():
+        raise StopPropagation
+
+
+# The counter itself should not show up as a handler
+_count_update.__instrumented__ = True
+
+
+def install_update_gate(app: Client):
+    """Add the update counter, which also holds updates; call before start()"""
+    # Safe to call on every start: the dispatcher drops its handlers on stop, but
+    # one left in place must not count and hold each update twice
+    installed = app.dispatcher.groups.get(UPDATE_COUNTER_GROUP, [])
+    if any(getattr(handler, "callback", None) is _count_update for handler in installed):
+        return
+    app.add_handler(RawUpdateHandler(_count_update), group=UPDATE_COUNTER_GROUP)
+
+
+def instrument_client(app: Client) -> int:
+    """Install all instrumentation on a started client"""
+    instrument_rpc(app)
+    api_accounting.instrument(app)
+    return instrument_handlers(app)
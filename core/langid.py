@@ -0,0 +1,360 @@
+"""
+Language Identification Module
+Offline language detection: Unicode script ranges plus a character trigram model for Latin scripts
+"""
+import math
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Only the start of long messages is scored
+MAX_CHARS = 400
+# Additive smoothing for trigram probabilities
+ALPHA = 0.5
+
+# Below these a Latin-script guess is reported as unknown rather than shown as fact:
+# fewer letters, a lower top probability, or too close a runner-up
+MIN_LETTERS = 4
+MIN_CONFIDENCE = 0.5
+MIN_MARGIN = 0.35
+
+# Short everyday text per language; trigram profiles are built from these once
+SAMPLES: Dict[str, str] = {
+    "en": (
+        "All human beings are born free and equal in dignity and rights. They are endowed "
+        "with reason and conscience and should act towards one another in a spirit of "
+        "brotherhood. Hello, how are you doing today? I think that we should meet tomorrow "
+        "at the station, because the weather will be better and I have some time after work. "
+        "Thank you very much for your help, it was really nice of you. What do you want to eat "
+        "tonight? Please let me know when you are ready. The quick brown fox jumps over the lazy "
+        "dog while the children are playing with their friends in the garden. "
+        "I don't understand what you mean. Can you say that again, please? I am going to the "
+        "shop to buy some bread, milk and eggs. Where is the nearest bus stop? My brother works "
+        "in a hospital and my sister is still at school. We have been waiting for an hour and "
+        "nobody has called us yet. It's raining again, so I'll stay at home and read a book. Do "
+        "you know what time the film starts? I'm sorry, I can't come to the party on Saturday. "
+        "The new phone is much faster than the old one, but the battery is worse. Could you "
+        "send me the file before the meeting? I would like a cup of coffee with sugar, thanks. "
+        "Never mind, see you tomorrow then."
+    ),
+    "es": (
+        "Todos los seres humanos nacen libres e iguales en dignidad y derechos y, dotados como "
+        "están de razón y conciencia, deben comportarse fraternalmente los unos con los otros. "
+        "Hola, ¿cómo estás hoy? Creo que deberíamos vernos mañana en la estación, porque el "
+        "tiempo será mejor y tengo un poco de tiempo después del trabajo. Muchas gracias por tu "
+        "ayuda, fue muy amable de tu parte. ¿Qué quieres comer esta noche? Por favor avísame "
+        "cuando estés listo. Los niños están jugando con sus amigos en el jardín de la casa. "
+        "No entiendo lo que quieres decir. ¿Puedes repetirlo, por favor? Voy a la tienda a "
+        "comprar pan, leche y huevos. ¿Dónde está la parada de autobús más cercana? Mi hermano "
+        "trabaja en un hospital y mi hermana todavía va al colegio. Llevamos una hora esperando "
+        "y nadie nos ha llamado todavía. Está lloviendo otra vez, así que me quedo en casa a "
+        "leer un libro. ¿Sabes a qué hora empieza la película? Lo siento, no puedo ir a la "
+        "fiesta el sábado. El teléfono nuevo es mucho más rápido que el viejo, pero la batería "
+        "es peor. ¿Me puedes enviar el archivo antes de la reunión? Quisiera un café con "
+        "azúcar, gracias. No pasa nada, nos vemos mañana entonces."
+    ),
+    "fr": (
+        "Tous les êtres humains naissent libres et égaux en dignité et en droits. Ils sont doués "
+        "de raison et de conscience et doivent agir les uns envers les autres dans un esprit de "
+        "fraternité. Bonjour, comment ça va aujourd'hui ? Je pense que nous devrions nous voir "
+        "demain à la gare, parce qu'il fera plus beau et que j'ai un peu de temps après le "
+        "travail. Merci beaucoup pour ton aide, c'était vraiment gentil. Qu'est-ce que tu veux "
+        "manger ce soir ? Dis-moi quand tu es prêt. Les enfants jouent avec leurs amis dans le jardin. "
+        "Je ne comprends pas ce que tu veux dire. Tu peux répéter, s'il te plaît ? Je vais au "
+        "magasin pour acheter du pain, du lait et des œufs. Où est l'arrêt de bus le plus "
+        "proche ? Mon frère travaille dans un hôpital et ma sœur est encore à l'école. Nous "
+        "attendons depuis une heure et personne ne nous a encore appelés. Il pleut encore, "
+        "alors je reste à la maison pour lire un livre. Tu sais à quelle heure commence le film "
+        "? Je suis désolé, je ne peux pas venir à la fête samedi. Le nouveau téléphone est "
+        "beaucoup plus rapide que l'ancien, mais la batterie est moins bonne. Peux-tu m'envoyer "
+        "le fichier avant la réunion ? Je voudrais un café avec du sucre, merci. Ce n'est pas "
+        "grave, on se voit demain alors."
+    ),
+    "de": (
+        "Alle Menschen sind frei und gleich an Würde und Rechten geboren. Sie sind mit Vernunft "
+        "und Gewissen begabt und sollen einander im Geist der Brüderlichkeit begegnen. Hallo, "
+        "wie geht es dir heute? Ich denke, wir sollten uns morgen am Bahnhof treffen, weil das "
+        "Wetter besser wird und ich nach der Arbeit etwas Zeit habe. Vielen Dank für deine Hilfe, "
+        "das war wirklich nett von dir. Was möchtest du heute Abend essen? Sag mir bitte Bescheid, "
+        "wenn du fertig bist. Die Kinder spielen mit ihren Freunden im Garten hinter dem Haus. "
+        "Ich verstehe nicht, was du meinst. Kannst du das bitte noch einmal sagen? Ich gehe in "
+        "den Supermarkt, um Milch, Butter und Eier zu holen. Wo ist die nächste Bushaltestelle? "
+        "Mein Bruder arbeitet in einem Krankenhaus und meine Schwester geht noch zur Schule. "
+        "Wir warten schon seit einer Stunde und niemand hat uns angerufen. Es regnet schon "
+        "wieder, also bleibe ich zu Hause und lese ein Buch. Weißt du, wann der Film anfängt? "
+        "Es tut mir leid, ich kann am Samstag nicht zur Party kommen. Das neue Handy ist viel "
+        "schneller als das alte, aber der Akku ist schlechter. Kannst du mir die Datei vor der "
+        "Besprechung schicken? Ich hätte gern einen Kaffee mit Zucker, danke. Das ist nicht so "
+        "schlimm, wir sehen uns dann morgen."
+    ),
+    "it": (
+        "Tutti gli esseri umani nascono liberi ed eguali in dignità e diritti. Essi sono dotati "
+        "di ragione e di coscienza e devono agire gli uni verso gli altri in spirito di "
+        "fratellanza. Ciao, come stai oggi? Penso che dovremmo vederci domani alla stazione, "
+        "perché il tempo sarà migliore e ho un po' di tempo dopo il lavoro. Grazie mille per il "
+        "tuo aiuto, è stato davvero gentile da parte tua. Cosa vuoi mangiare stasera? Per favore "
+        "fammi sapere quando sei pronto. I bambini giocano con i loro amici nel giardino della casa. "
+        "Non so cosa vuoi dire. Puoi ripetere, per favore? Vado al negozio a comprare il pane, "
+        "il latte e le uova. Dov'è la fermata dell'autobus più vicina? Mio fratello lavora in "
+        "un ospedale e mia sorella va ancora a scuola. Aspettiamo da un'ora e nessuno ci ha "
+        "ancora chiamato. Piove di nuovo, quindi resto a casa a leggere un libro. Sai a che ora "
+        "comincia il film? Mi dispiace, non posso venire alla festa sabato. Il nuovo telefono è "
+        "molto più veloce di quello vecchio, ma la batteria è peggiore. Mi puoi mandare il file "
+        "prima della riunione? Vorrei un caffè con lo zucchero, grazie. Non fa niente, ci "
+        "vediamo domani allora. Capisci quello che dico?"
+    ),
+    "pt": (
+        "Todos os seres humanos nascem livres e iguais em dignidade e em direitos. Dotados de "
+        "razão e de consciência, devem agir uns para com os outros em espírito de fraternidade. "
+        "Olá, como você está hoje? Acho que deveríamos nos encontrar amanhã na estação, porque o "
+        "tempo vai estar melhor e eu tenho um pouco de tempo depois do trabalho. Muito obrigado "
+        "pela sua ajuda, foi muito gentil da sua parte. O que você quer comer hoje à noite? Por "
+        "favor, me avise quando estiver pronto. As crianças estão brincando com os amigos no jardim. "
+        "Não entendo o que você quer dizer. Pode repetir, por favor? Vou à loja comprar pão, "
+        "leite e ovos. Onde fica o ponto de ônibus mais próximo? O meu irmão trabalha num "
+        "hospital e a minha irmã ainda está na escola. Estamos esperando há uma hora e ninguém "
+        "nos chamou ainda. Está chovendo de novo, então vou ficar em casa lendo um livro. Você "
+        "sabe a que horas começa o filme? Desculpe, não posso ir à festa no sábado. O telefone "
+        "novo é muito mais rápido do que o antigo, mas a bateria é pior. Você pode me mandar o "
+        "arquivo antes da reunião? Eu queria um café com açúcar, obrigado. Não faz mal, a gente "
+        "se vê amanhã então."
+    ),
+    "nl": (
+        "Alle mensen worden vrij en gelijk in waardigheid en rechten geboren. Zij zijn begiftigd "
+        "met verstand en geweten, en behoren zich jegens elkander in een geest van broederschap "
+        "te gedragen. Hallo, hoe gaat het vandaag met je? Ik denk dat we elkaar morgen op het "
+        "station moeten zien, omdat het weer beter wordt en ik na het werk wat tijd heb. Heel "
+        "erg bedankt voor je hulp, dat was echt aardig van je. Wat wil je vanavond eten? Laat me "
+        "alsjeblieft weten wanneer je klaar bent. De kinderen spelen met hun vrienden in de tuin. "
+        "Ik begrijp niet wat je bedoelt. Kun je dat nog een keer zeggen, alsjeblieft? Ik ga "
+        "naar de winkel om brood, melk en eieren te kopen. Waar is de dichtstbijzijnde "
+        "bushalte? Mijn broer werkt in een ziekenhuis en mijn zus zit nog op school. We wachten "
+        "al een uur en niemand heeft ons nog gebeld. Het regent weer, dus ik blijf thuis en "
+        "lees een boek. Weet jij hoe laat de film begint? Het spijt me, ik kan zaterdag niet "
+        "naar het feestje komen. De nieuwe telefoon is veel sneller dan de oude, maar de "
+        "batterij is slechter. Kun je me het bestand voor de vergadering sturen? Ik wil graag "
+        "een kopje koffie met suiker, dank je. Het maakt niet uit, we zien elkaar morgen wel."
+    ),
+    "id": (
+        "Semua orang dilahirkan merdeka dan mempunyai martabat dan hak-hak yang sama. Mereka "
+        "dikaruniai akal dan hati nurani dan hendaknya bergaul satu sama lain dalam semangat "
+        "persaudaraan. Halo, apa kabar hari ini? Saya pikir kita harus bertemu besok di stasiun, "
+        "karena cuacanya akan lebih baik dan saya punya sedikit waktu setelah bekerja. Terima "
+        "kasih banyak atas bantuanmu, kamu sangat baik. Kamu mau makan apa malam ini? Tolong "
+        "beri tahu saya kalau kamu sudah siap. Anak-anak sedang bermain dengan teman-teman mereka di kebun. "
+        "Saya tidak mengerti apa maksudmu. Bisakah kamu mengulanginya? Saya pergi ke toko untuk "
+        "membeli roti, susu dan telur. Di mana halte bus yang paling dekat? Kakak saya bekerja "
+        "di rumah sakit dan adik saya masih sekolah. Kami sudah menunggu selama satu jam dan "
+        "belum ada yang memanggil kami. Hujan turun lagi, jadi saya tinggal di rumah dan "
+        "membaca buku. Apakah kamu tahu jam berapa filmnya mulai? Maaf, saya tidak bisa datang "
+        "ke pesta hari Sabtu. Ponsel yang baru jauh lebih cepat daripada yang lama, tetapi "
+        "baterainya lebih buruk. Bisakah kamu mengirim berkasnya sebelum rapat? Saya mau "
+        "secangkir kopi dengan gula, terima kasih. Tidak apa-apa, sampai jumpa besok."
+    ),
+    "tr": (
+        "Bütün insanlar hür, haysiyet ve haklar bakımından eşit doğarlar. Akıl ve vicdana "
+        "sahiptirler ve birbirlerine karşı kardeşlik zihniyeti ile hareket etmelidirler. Merhaba, "
+        "bugün nasılsın? Bence yarın istasyonda buluşmalıyız, çünkü hava daha güzel olacak ve "
+        "işten sonra biraz vaktim var. Yardımın için çok teşekkür ederim, gerçekten çok naziktin. "
+        "Bu akşam ne yemek istiyorsun? Lütfen hazır olduğunda bana haber ver. Çocuklar bahçede "
+        "arkadaşlarıyla oynuyorlar ve annem mutfakta yemek yapıyor. "
+        "Ne demek istediğini anlamıyorum. Lütfen tekrar söyler misin? Süt ve yumurta almak için "
+        "bakkala gidiyorum. En yakın otobüs durağı nerede? Ağabeyim bir hastanede çalışıyor ve "
+        "kız kardeşim hâlâ okula gidiyor. Bir saattir bekliyoruz ve henüz kimse bizi aramadı. "
+        "Yine yağmur yağıyor, bu yüzden evde kalıp kitap okuyacağım. Filmin saat kaçta "
+        "başladığını biliyor musun? Üzgünüm, cumartesi günü partiye gelemem. Yeni telefon "
+        "eskisinden çok daha hızlı ama pili daha kötü. Dosyayı toplantıdan önce bana "
+        "gönderebilir misin? Şekerli bir kahve istiyorum, teşekkürler. Önemli değil, yarın "
+        "görüşürüz o zaman."
+    ),
+    "pl": (
+        "Wszyscy ludzie rodzą się wolni i równi pod względem swej godności i swych praw. Są oni "
+        "obdarzeni rozumem i sumieniem i powinni postępować wobec innych w duchu braterstwa. "
+        "Cześć, jak się dzisiaj masz? Myślę, że powinniśmy spotkać się jutro na dworcu, bo "
+        "pogoda będzie lepsza i mam trochę czasu po pracy. Bardzo dziękuję za pomoc, to było "
+        "naprawdę miłe z twojej strony. Co chcesz zjeść dziś wieczorem? Daj mi znać, kiedy "
+        "będziesz gotowy. Dzieci bawią się ze swoimi przyjaciółmi w ogrodzie za domem. "
+        "Nie rozumiem, co masz na myśli. Czy możesz to powtórzyć? Jutro pójdę na zakupy i kupię "
+        "mleko, masło i jajka. Gdzie jest najbliższy przystanek autobusowy? Mój brat pracuje w "
+        "szpitalu, a moja siostra jeszcze chodzi do szkoły. Czekamy już od godziny i nikt do "
+        "nas jeszcze nie zadzwonił. Znowu pada deszcz, więc zostanę w domu i przeczytam "
+        "książkę. Wiesz, o której zaczyna się film? Przepraszam, nie mogę przyjść na imprezę w "
+        "sobotę. Nowy telefon jest dużo szybszy niż stary, ale bateria jest gorsza. Czy możesz "
+        "wysłać mi plik przed spotkaniem? Poproszę kawę z cukrem, dziękuję. Nic się nie stało, "
+        "do zobaczenia jutro."
+    ),
+    "sv": (
+        "Alla människor är födda fria och lika i värde och rättigheter. De är utrustade med "
+        "förnuft och samvete och bör handla gentemot varandra i en anda av broderskap. Hej, hur "
+        "mår du idag? Jag tycker att vi borde träffas i morgon vid stationen, eftersom vädret "
+        "blir bättre och jag har lite tid efter jobbet. Tack så mycket för din hjälp, det var "
+        "verkligen snällt av dig. Vad vill du äta i kväll? Säg till när du är klar. Barnen "
+        "leker med sina vänner i trädgården bakom huset. "
+        "Jag förstår inte vad du menar. Kan du säga det en gång till? Jag går till affären för "
+        "att köpa bröd, mjölk och ägg. Var ligger närmaste busshållplats? Min bror jobbar på "
+        "ett sjukhus och min syster går fortfarande i skolan. Vi har väntat i en timme och "
+        "ingen har ringt oss än. Det regnar igen, så jag stannar hemma och läser en bok. Vet du "
+        "när filmen börjar? Förlåt, jag kan inte komma på festen på lördag. Den nya telefonen "
+        "är mycket snabbare än den gamla, men batteriet är sämre. Kan du skicka filen till mig "
+        "före mötet? Jag vill ha en kopp kaffe med socker, tack. Det gör ingenting, vi ses i "
+        "morgon då."
+    ),
+    "vi": (
+        "Tất cả mọi người sinh ra đều được tự do và bình đẳng về nhân phẩm và quyền lợi. Mọi "
+        "con người đều được tạo hóa ban cho lý trí và lương tâm và cần phải đối xử với nhau "
+        "trong tình anh em. Xin chào, hôm nay bạn khỏe không? Tôi nghĩ chúng ta nên gặp nhau "
+        "ngày mai ở nhà ga, vì thời tiết sẽ đẹp hơn và tôi có một chút thời gian sau giờ làm. "
+        "Cảm ơn bạn rất nhiều vì đã giúp đỡ. Tối nay bạn muốn ăn gì? Các em nhỏ đang chơi với "
+        "bạn bè trong vườn. "
+        "Tôi không hiểu bạn muốn nói gì. Bạn có thể nói lại được không? Tôi đi đến cửa hàng để "
+        "mua bánh mì, sữa và trứng. Trạm xe buýt gần nhất ở đâu? Anh trai tôi làm việc ở bệnh "
+        "viện và em gái tôi vẫn còn đi học. Chúng tôi đã đợi một tiếng rồi mà chưa có ai gọi. "
+        "Trời lại mưa nên tôi sẽ ở nhà đọc sách. Bạn có biết mấy giờ phim bắt đầu không? Xin "
+        "lỗi, tôi không thể đến bữa tiệc vào thứ bảy. Điện thoại mới nhanh hơn cái cũ nhiều "
+        "nhưng pin thì kém hơn. Bạn có thể gửi tệp cho tôi trước cuộc họp không? Cho tôi một ly "
+        "cà phê có đường, cảm ơn. Không sao đâu, hẹn gặp lại ngày mai."
+    ),
+}
+
+# (language, first code point, last code point) for languages identified by script alone
+SCRIPTS: List[Tuple[str, int, int]] = [
+    ("ru", 0x0400, 0x04FF),
+    ("el", 0x0370, 0x03FF),
+    ("hy", 0x0530, 0x058F),
+    ("he", 0x0590, 0x05FF),
+    ("ar", 0x0600, 0x06FF),
+    ("hi", 0x0900, 0x097F),
+    ("bn", 0x0980, 0x09FF),
+    ("ta", 0x0B80, 0x0BFF),
+    ("te", 0x0C00, 0x0C7F),
+    ("th", 0x0E00, 0x0E7F),
+    ("ka", 0x10A0, 0x10FF),
+    ("ko", 0xAC00, 0xD7AF),
+    ("ja", 0x3040, 0x30FF),
+    ("zh", 0x4E00, 0x9FFF),
+]
+
+# Letters that single out a language within a shared script
+MARKERS: Dict[str, Tuple[str, str]] = {
+    "ru": ("uk", "іїєґ"),
+    "ar": ("fa", "پچژگ"),
+}
+
+NAMES = {
+    "en": "English", "es": "Spanish", "fr": "French", "de": "German", "it": "Italian",
+    "pt": "Portuguese", "nl": "Dutch", "id": "Indonesian", "tr": "Turkish", "pl": "Polish",
+    "sv": "Swedish", "vi": "Vietnamese", "ru": "Russian", "uk": "Ukrainian", "el": "Greek",
+    "hy": "Armenian", "he": "Hebrew", "ar": "Arabic", "fa": "Persian", "hi": "Hindi",
+    "bn": "Bengali", "ta": "Tamil", "te": "Telugu", "th": "Thai", "ka": "Georgian",
+    "ko": "Korean", "ja": "Japanese", "zh": "Chinese",
+}
+
+_NON_LETTERS = re.compile(r"[^\w']+|[\d_]+")
+
+
+def _trigrams(text: str) -> List[str]:
+    """Padded character trigrams of every word"""
+    grams = []
+    for word in _NON_LETTERS.sub(" ", text.lower()).split():
+        padded = f" {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _script(char: str) -> Optional[str]:
+    """Language whose script contains a character, None for Latin and everything else"""
+    code = ord(char)
+    for language, first, last in SCRIPTS:
+        if first <= code <= last:
+            return language
+    return None
+
+
+class LanguageIdentifier:
+    """Character trigram model, built once and stored as one flat float array"""
+
+    def __init__(self, samples: Dict[str, str] = SAMPLES):
+        """Build log-probability rows for every trigram seen in the samples"""
+        self.languages = sorted(samples)
+        counts = {language: Counter(_trigrams(text)) for language, text in samples.items()}
+        vocabulary = sorted(set().union(*counts.values()))
+        self._index: Dict[str, int] = {gram: row for row, gram in enumerate(vocabulary)}
+
+        width = len(self.languages)
+        self._weights = array("f", bytes(4 * width * len(vocabulary)))
+        for column, language in enumerate(self.languages):
+            grams = counts[language]
+            denominator = sum(grams.values()) + ALPHA * len(vocabulary)
+            for gram, row in self._index.items():
+                self._weights[row * width + column] = math.log((grams.get(gram, 0) + ALPHA) / denominator)
+
+    def _score(self, text: str) -> List[Tuple[str, float]]:
+        """(language, probability) for Latin-script languages, most likely first"""
+        width = len(self.languages)
+        scores = [0.0] * width
+        weights = self._weights
+        seen = 0
+        for gram in _trigrams(text):
+            row = self._index.get(gram)
+            if row is None:
+                continue
+            offset = row * width
+            for column in range(width):
+                scores[column] += weights[offset + column]
+            seen += 1
+
+        if not seen:
+            return []
+
+        # Per-trigram average keeps long texts from looking absurdly certain
+        top = max(scores)
+        exps = [math.exp((score - top) / math.sqrt(seen)) for score in scores]
+        total = sum(exps)
+        ranked = sorted(zip(self.languages, (value / total for value in exps)), key=lambda item: item[1], reverse=True)
+        return ranked
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        """Return (language code, confidence 0..1), or (None, 0.0) if undecidable"""
+        text = unicodedata.normalize("NFC", text[:MAX_CHARS])
+
+        letters = [char for char in text if char.isalpha()]
+        if not letters:
+            return None, 0.0
+
+        scripts = Counter(_script(char) for char in letters)
+        script, count = scripts.most_common(1)[0]
+        if script is not None:
+            # Kana anywhere means Japanese even when Han characters dominate
+            if script == "zh" and scripts.get("ja"):
+                script, count = "ja", count + scripts["ja"]
+            marker = MARKERS.get(script)
+            if marker and any(char in marker[1] for char in letters):
+                script = marker[0]
+            return script, count / len(letters)
+
+        ranked = self._score(text) if count >= MIN_LETTERS else []
+        if not ranked:
+            return None, 0.0
+        language, probability = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if probability < MIN_CONFIDENCE or probability - runner_up < MIN_MARGIN:
+            return None, 0.0
+        return language, probability * count / len(letters)
+
+
+def language_name(code: Optional[str]) -> str:
+    """Human readable language name"""
+    return NAMES.get(code, code or "Unknown")
+
+
+_identifier: Optional[LanguageIdentifier] = None
+
+
+def detect(text: str) -> Tuple[Optional[str], float]:
+    """Detect the language of a text with the shared, lazily built model"""
+    global _identifier
+    if _identifier is None:
+        _identifier = LanguageIdentifier()
+    return _identifier.detect(text)
@@ -0,0 +1,103 @@
+"""
+Lazy Import Module
+Deferred imports for heavy dependencies, background pre-warming and import-time budgets
+"""
+import asyncio
+import importlib
+import importlib.util
+import time
+import types
+from typing import Dict, List
+from config import config
+from core.logger import bot_logger
+from core.metrics import metrics
+
+IMPORT_TIME = metrics.gauge(
+    "bot_import_seconds", "Time spent importing a module", ["module"]
+)
+
+# Import durations in seconds, by module name
+import_times: Dict[str, float] = {}
+
+
+def record_import(name: str, seconds: float):
+    """Record an import duration and flag it if it exceeds the budget"""
+    import_times[name] = seconds
+    IMPORT_TIME.set(seconds, module=name)
+
+    budget_ms = config.IMPORT_BUDGET_MS
+    if budget_ms and seconds * 1000 > budget_ms:
+        bot_logger.warning(
+            f"🐢 Importing {name} took {seconds * 1000:.0f}ms (budget {budget_ms}ms)"
+        )
+
+
+def over_budget() -> List[tuple]:
+    """Modules whose import exceeded the budget, slowest first"""
+    budget = config.IMPORT_BUDGET_MS / 1000
+    slow = [(name, seconds) for name, seconds in import_times.items() if seconds > budget]
+    return sorted(slow, key=lambda item: item[1], reverse=True)
+
+
+def is_available(name: str) -> bool:
+    """Check whether a module is installed without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule(types.ModuleType):
+    """Module proxy that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_module = None
+
+    def _load(self) -> types.ModuleType:
+        """Import (once) and return the real module"""
+        module = self._lazy_module
+        if module is None:
+            start = time.perf_counter()
+            module = importlib.import_module(self.__name__)
+            record_import(self.__name__, time.perf_counter() - start)
+            self._lazy_module = module
+        return module
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the real module has been imported"""
+        return self._lazy_module is not None
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+# All lazy modules, by name
+_lazy_modules: Dict[str, LazyModule] = {}
+
+
+def lazy_import(name: str) -> LazyModule:
+    """Get a proxy for `name` that defers the import until first use"""
+    module = _lazy_modules.get(name)
+    if module is None:
+        module = _lazy_modules[name] = LazyModule(name)
+    return module
+
+
+async def prewarm():
+    """Import every lazy module in a worker thread, so first use is fast"""
+    for name, module in list(_lazy_modules.items()):
+        if module.loaded or not is_available(name):
+            continue
+        try:
+            await asyncio.to_thread(module._load)
+        except Exception as e:
+            bot_logger.warning(f"Could not pre-warm {name}: {e}")
+
+    warmed = [name for name, module in _lazy_modules.items() if module.loaded]
+    if warmed:
+        bot_logger.info(f"🔥 Pre-warmed imports: {', '.join(warmed)}")
@@ -0,0 +1,127 @@
+"""
+Lifecycle Module
+Tracks in-flight handlers and background tasks so the bot can drain before stopping
+"""
+import asyncio
+import time
+from typing import Dict, Optional, Set
+
+
+class Lifecycle:
+    """Admission gate and in-flight counter for update handlers"""
+
+    def __init__(self):
+        """Initialize lifecycle state"""
+        self.accepting = True
+        self.inflight = 0
+        # Updates waiting while not accepting, and those discarded when stopping
+        self.held = 0
+        self.dropped = 0
+        self.stopped_at: Optional[float] = None
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._ready = asyncio.Event()
+        self._ready.set()
+        self._resumed = asyncio.Event()
+        self._resumed.set()
+        self._discarding = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def begin(self):
+        """Mark a handler as started"""
+        self.inflight += 1
+        self._idle.clear()
+
+    def end(self):
+        """Mark a handler as finished"""
+        self.inflight -= 1
+        if self.inflight <= 0:
+            self.inflight = 0
+            self._idle.set()
+
+    def stop_accepting(self):
+        """Hold new updates from now on"""
+        if self.accepting:
+            self.accepting = False
+            self.stopped_at = time.time()
+            self._resumed.clear()
+
+    def resume_accepting(self):
+        """Accept updates again, including held ones"""
+        self.accepting = True
+        self.stopped_at = None
+        self._discarding = False
+        self._resumed.set()
+
+    async def hold_update(self) -> bool:
+        """Wait while not accepting, returns False if the update was discarded instead"""
+        self.held += 1
+        try:
+            await self._resumed.wait()
+        finally:
+            self.held -= 1
+        if self._discarding:
+            self.dropped += 1
+            return False
+        return True
+
+    def discard_held(self):
+        """Let held updates go unhandled, e.g. so the dispatcher can stop"""
+        self._discarding = True
+        self._resumed.set()
+
+    def hold_updates(self):
+        """Make updates wait in the dispatcher until release_updates()"""
+        self._ready.clear()
+
+    def release_updates(self):
+        """Let held and new updates through"""
+        self._ready.set()
+
+    async def wait_ready(self):
+        """Wait while updates are held"""
+        await self._ready.wait()
+
+    def create_task(self, coro, name: str = None) -> asyncio.Task:
+        """Start a background task that shutdown should wait for"""
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def drain(self, timeout: float) -> int:
+        """Wait up to `timeout` seconds for in-flight handlers, returns how many are left"""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return self.inflight
+
+    async def shutdown(self, timeout: float) -> Dict[str, object]:
+        """Stop accepting, wait for handlers and tracked tasks, cancel what is left at the deadline"""
+        self.stop_accepting()
+        deadline = time.monotonic() + timeout
+
+        handlers = await self.drain(timeout)
+
+        # A tracked task may be the one shutting down, e.g. a restart
+        current = asyncio.current_task()
+        tasks = [task for task in self._tasks if not task.done() and task is not current]
+        if tasks:
+            await asyncio.wait(tasks, timeout=max(deadline - time.monotonic(), 0))
+
+        abandoned = [task for task in tasks if not task.done()]
+        for task in abandoned:
+            task.cancel()
+        if abandoned:
+            await asyncio.gather(*abandoned, return_exceptions=True)
+
+        return {
+            "handlers": handlers,
+            "tasks": [task.get_name() for task in abandoned],
+            "held": self.held
+        }
+
+
+# Create lifecycle instance
+lifecycle = Lifecycle()
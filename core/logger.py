@@ -2,9 +2,11 @@
 Logging Module
 Advanced logging system with multiple handlers
 """
+import os
 import sys
 from loguru import logger
 from config import config
+from core.logsearch import compress_and_index
 
 
 class BotLogger:
@@ -28,20 +30,20 @@ class BotLogger:
         
         # Add file handler
         logger.add(
-            "logs/bot_{time:YYYY-MM-DD}.log",
+            os.path.join(config.LOG_DIR, "bot_{time:YYYY-MM-DD}.log"),
             rotation="1 day",
             retention="7 days",
-            compression="zip",
+            compression=compress_and_index,
             format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
             level="DEBUG"
         )
         
         # Add error file handler
         logger.add(
-            "logs/errors_{time:YYYY-MM-DD}.log",
+            os.path.join(config.LOG_DIR, "errors_{time:YYYY-MM-DD}.log"),
             rotation="1 day",
             retention="30 days",
-            compression="zip",
+            compression=compress_and_index,
             format="{time:YYYY-MM-DD HH:mm:ss} | {level: <8} | {name}:{function}:{line} | {message}",
             level="ERROR"
         )
@@ -71,6 +73,10 @@ class BotLogger:
     def success(self, message: str):
         """Log success message"""
         self.logger.success(message)
+    
+    async def flush(self):
+        """Wait for every queued log message to be written"""
+        await self.logger.complete()
 
 
 # Create logger instance
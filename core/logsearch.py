@@ -0,0 +1,297 @@
+"""
+Log Search Module
+Reverse tail reading and indexed time-range search over current and rotated logs
+"""
+import json
+import os
+import re
+import zipfile
+from collections import deque
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+HEADER = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) \| (\w+)\s*\|")
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+LEVELS = {
+    "TRACE": 5,
+    "DEBUG": 10,
+    "INFO": 20,
+    "SUCCESS": 25,
+    "WARNING": 30,
+    "ERROR": 40,
+    "CRITICAL": 50,
+}
+
+# Seconds of log time between two index checkpoints
+INDEX_INTERVAL = 60
+INDEX_SUFFIX = ".idx"
+BLOCK_SIZE = 64 * 1024
+
+
+class LogEntry:
+    """One log record, including continuation lines such as tracebacks"""
+
+    __slots__ = ("time", "level", "text")
+
+    def __init__(self, time: Optional[float], level: Optional[str], text: str):
+        self.time = time
+        self.level = level
+        self.text = text
+
+    def matches(self, min_level: int = 0, pattern: Optional[re.Pattern] = None,
+                since: float = None, until: float = None) -> bool:
+        """Check the entry against all filters"""
+        if min_level and LEVELS.get(self.level, 0) < min_level:
+            return False
+        if since is not None and (self.time is None or self.time < since):
+            return False
+        if until is not None and (self.time is None or self.time > until):
+            return False
+        return not pattern or bool(pattern.search(self.text))
+
+
+def _parse_header(line: str):
+    """Return (timestamp, level) for a record header line, else None"""
+    match = HEADER.match(line)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), TIME_FORMAT).timestamp(), match.group(2)
+
+
+def reverse_lines(path: str, block_size: int = BLOCK_SIZE) -> Iterator[str]:
+    """Yield lines of a file from last to first, reading blocks backwards"""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b"\n")
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                yield line.decode("utf-8", errors="replace").rstrip("\r")
+
+        yield remainder.decode("utf-8", errors="replace").rstrip("\r")
+
+
+def reverse_entries(path: str) -> Iterator[LogEntry]:
+    """Yield log entries from newest to oldest"""
+    continuation: List[str] = []
+    for line in reverse_lines(path):
+        header = _parse_header(line)
+        if header is None:
+            if line or continuation:
+                continuation.append(line)
+            continue
+        text = "\n".join([line] + continuation[::-1]).rstrip("\n")
+        continuation = []
+        yield LogEntry(header[0], header[1], text)
+
+    if any(continuation):
+        yield LogEntry(None, None, "\n".join(continuation[::-1]).strip("\n"))
+
+
+def forward_entries(stream) -> Iterator[LogEntry]:
+    """Yield log entries from a binary stream, oldest first"""
+    current: Optional[LogEntry] = None
+    lines: List[str] = []
+
+    for raw in stream:
+        line = raw.decode("utf-8", errors="replace").rstrip("\r\n")
+        header = _parse_header(line)
+        if header is None:
+            lines.append(line)
+            continue
+        if current is not None or any(lines):
+            yield LogEntry(
+                current.time if current else None,
+                current.level if current else None,
+                "\n".join(lines).rstrip("\n")
+            )
+        current = LogEntry(header[0], header[1], "")
+        lines = [line]
+
+    if current is not None or any(lines):
+        yield LogEntry(
+            current.time if current else None,
+            current.level if current else None,
+            "\n".join(lines).rstrip("\n")
+        )
+
+
+# ==================== INDEX ====================
+
+def build_index(path: str) -> dict:
+    """Scan a log file once, recording time bounds, level counts and checkpoints"""
+    checkpoints = []
+    levels = {}
+    start = end = None
+    offset = 0
+    next_checkpoint = None
+    lines = 0
+
+    with open(path, "rb") as f:
+        for raw in f:
+            header = _parse_header(raw.decode("utf-8", errors="replace"))
+            if header is not None:
+                timestamp, level = header
+                levels[level] = levels.get(level, 0) + 1
+                start = timestamp if start is None else start
+                end = timestamp
+                if next_checkpoint is None or timestamp >= next_checkpoint:
+                    checkpoints.append([timestamp, offset])
+                    next_checkpoint = timestamp + INDEX_INTERVAL
+            offset += len(raw)
+            lines += 1
+
+    return {
+        "file": os.path.basename(path),
+        "start": start,
+        "end": end,
+        "lines": lines,
+        "bytes": offset,
+        "levels": levels,
+        "checkpoints": checkpoints
+    }
+
+
+def index_path(log_path: str) -> str:
+    """Sidecar index location for a rotated log (before or after compression)"""
+    if log_path.endswith(".zip"):
+        log_path = log_path[:-len(".zip")]
+    return log_path + INDEX_SUFFIX
+
+
+def load_index(log_path: str) -> Optional[dict]:
+    """Read the sidecar index of a rotated log, if present"""
+    try:
+        with open(index_path(log_path), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def compress_and_index(path: str):
+    """Loguru compression hook: write the sidecar index, then zip the rotated file"""
+    index = build_index(path)
+    with open(index_path(path), "w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+    with zipfile.ZipFile(path + ".zip", "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.write(path, arcname=os.path.basename(path))
+    os.remove(path)
+
+
+# ==================== SEARCH ====================
+
+def _log_date(filename: str) -> Optional[float]:
+    """Start of the day encoded in a log file name"""
+    match = re.search(r"(\d{4}-\d{2}-\d{2})", filename)
+    if not match:
+        return None
+    return datetime.strptime(match.group(1), "%Y-%m-%d").timestamp()
+
+
+def log_files(log_dir: str, prefix: str) -> List[str]:
+    """Current and rotated logs with a prefix, newest first"""
+    if not os.path.isdir(log_dir):
+        return []
+
+    files = [
+        os.path.join(log_dir, name)
+        for name in os.listdir(log_dir)
+        if name.startswith(prefix) and (name.endswith(".log") or name.endswith(".log.zip"))
+    ]
+    return sorted(files, key=lambda path: (_log_date(path) or 0, os.path.getmtime(path)), reverse=True)
+
+
+def _overlaps(path: str, index: Optional[dict], since: float, until: float) -> bool:
+    """Whether a file can contain entries in [since, until]"""
+    if index and index.get("start") is not None:
+        start, end = index["start"], index["end"]
+    else:
+        day = _log_date(os.path.basename(path))
+        if day is None:
+            return True
+        # Daily rotation: a file starts on its date and may spill a little past midnight
+        start, end = day, max(day + 86400, os.path.getmtime(path))
+    return (since is None or end >= since) and (until is None or start <= until)
+
+
+def _checkpoint_offset(index: Optional[dict], since: Optional[float]) -> int:
+    """Byte offset of the last checkpoint at or before `since`"""
+    if not index or since is None:
+        return 0
+    offset = 0
+    for timestamp, position in index.get("checkpoints", []):
+        if timestamp > since:
+            break
+        offset = position
+    return offset
+
+
+def _search_rotated(path: str, index: Optional[dict], limit: int, predicate,
+                    until: Optional[float], since: Optional[float]) -> List[str]:
+    """Latest `limit` matches from a rotated (possibly zipped) file, oldest first"""
+    found = deque(maxlen=limit)
+    offset = _checkpoint_offset(index, since)
+
+    def scan(stream):
+        stream.seek(offset)
+        for entry in forward_entries(stream):
+            if until is not None and entry.time is not None and entry.time > until:
+                break
+            if predicate(entry):
+                found.append(entry.text)
+
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            with archive.open(archive.namelist()[0]) as stream:
+                scan(stream)
+    else:
+        with open(path, "rb") as stream:
+            scan(stream)
+    return list(found)
+
+
+def search(log_dir: str, prefix: str, limit: int = 50, min_level: int = 0,
+           pattern: Optional[str] = None, since: float = None, until: float = None) -> List[str]:
+    """Latest `limit` entries across current and rotated logs matching every filter"""
+    compiled = re.compile(pattern, re.IGNORECASE) if pattern else None
+
+    def predicate(entry: LogEntry) -> bool:
+        return entry.matches(min_level, compiled, since, until)
+
+    results: List[List[str]] = []
+    remaining = limit
+
+    for path in log_files(log_dir, prefix):
+        index = load_index(path) if path.endswith(".zip") else None
+        if not _overlaps(path, index, since, until):
+            continue
+
+        if path.endswith(".zip"):
+            matches = _search_rotated(path, index, remaining, predicate, until, since)
+        else:
+            matches = []
+            for entry in reverse_entries(path):
+                if since is not None and entry.time is not None and entry.time < since:
+                    break
+                if predicate(entry):
+                    matches.append(entry.text)
+                    if len(matches) >= remaining:
+                        break
+            matches.reverse()
+
+        results.append(matches)
+        remaining -= len(matches)
+        if remaining <= 0:
+            break
+
+    # Files were visited newest first
+    return [text for matches in reversed(results) for text in matches]
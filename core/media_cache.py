@@ -0,0 +1,72 @@
+"""
+Media Cache Module
+Reuse of Telegram file_ids for media that was already uploaded once
+"""
+import re
+from typing import Any, Dict, Optional
+from config import config
+from core.cache import TTLCache
+from core.database import db
+from core.logger import bot_logger
+
+# Trim the collection to its size limit after this many new entries
+TRIM_EVERY = 100
+
+YOUTUBE_ID = re.compile(
+    r"(?:youtube(?:-nocookie)?\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)"
+    r"([A-Za-z0-9_-]{11})"
+)
+
+
+def youtube_id(url: str) -> Optional[str]:
+    """Canonical video ID of any common YouTube URL form"""
+    match = YOUTUBE_ID.search(url)
+    return match.group(1) if match else None
+
+
+class MediaCache:
+    """Maps (source id, format) to the file_id of its first upload"""
+
+    def __init__(self):
+        """Initialize media cache"""
+        # Hot entries, also the only store while the database is unavailable
+        self._memory = TTLCache("media_file_id", ttl=3600, maxsize=2048)
+        self._saved = 0
+
+    @staticmethod
+    def key(source_id: str, fmt: str) -> str:
+        """Storage key of a source and format"""
+        return f"{source_id}:{fmt}"
+
+    async def get(self, source_id: str, fmt: str) -> Optional[Dict[str, Any]]:
+        """Cached upload record ({'file_id', ...}) or None"""
+        key = self.key(source_id, fmt)
+        entry = self._memory.get(key)
+        if entry is None:
+            entry = await db.get_media(key)
+            if entry is not None:
+                self._memory.set(key, entry)
+        return entry
+
+    async def put(self, source_id: str, fmt: str, file_id: str, **fields):
+        """Remember an upload"""
+        key = self.key(source_id, fmt)
+        self._memory.set(key, {"file_id": file_id, **fields})
+        await db.save_media(key, file_id, **fields)
+
+        self._saved += 1
+        if self._saved % TRIM_EVERY == 0:
+            evicted = await db.trim_media(config.MEDIA_CACHE_MAX_ENTRIES)
+            if evicted:
+                bot_logger.info(f"🗂️ Evicted {evicted} least recently used media cache entries")
+
+    async def invalidate(self, source_id: str, fmt: str):
+        """Forget an upload whose file_id no longer works"""
+        key = self.key(source_id, fmt)
+        self._memory.invalidate(key)
+        await db.delete_media(key)
+        bot_logger.info(f"🗂️ Invalidated media cache entry {key}")
+
+
+# Create media cache instance
+media_cache = MediaCache()
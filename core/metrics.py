@@ -0,0 +1,333 @@
+"""
+Metrics Module
+In-process counters, gauges and histograms exposed in Prometheus text format
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import config
+from core.logger import bot_logger
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the exposition format"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    """Render a label set as {a="1",b="2"}"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    """Render a sample value"""
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class for all metric types"""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """Build the sample key from keyword labels"""
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        """Return exposition lines for this metric"""
+        raise NotImplementedError
+
+    def render(self) -> str:
+        """Render HELP, TYPE and sample lines"""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0}
+
+    def inc(self, amount: float = 1, **labels):
+        """Increment the counter"""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        """Get the current value for a label set"""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {} if self.labelnames else {(): 0}
+
+    def set(self, value: float, **labels):
+        """Set the gauge"""
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        """Increment the gauge"""
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        """Decrement the gauge"""
+        self.inc(-amount, **labels)
+
+    def get(self, **labels) -> float:
+        """Get the current value for a label set"""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed histogram"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[Tuple[str, ...], List[int]] = {}
+        self._sums: Dict[Tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels):
+        """Record an observation"""
+        key = self._key(labels)
+        counts = self._counts.get(key)
+        if counts is None:
+            counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+            self._sums[key] = 0.0
+
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+                break
+        else:
+            counts[-1] += 1
+        self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        """Get the number of observations for a label set"""
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def samples(self) -> List[str]:
+        lines = []
+        for key, counts in self._counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(self._sums[key])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of named metrics"""
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        """Register a metric, returning the existing one on name clash"""
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        """Create or get a counter"""
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        """Create or get a gauge"""
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Create or get a histogram"""
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Render every metric in Prometheus exposition format"""
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+
+# Create registry instance
+metrics = MetricsRegistry()
+
+# Bot metrics
+UPDATES_RECEIVED = metrics.counter(
+    "bot_updates_received_total", "Raw updates received from Telegram", ["type"]
+)
+HANDLER_CALLS = metrics.counter(
+    "bot_handler_calls_total", "Handler invocations", ["handler", "status"]
+)
+HANDLER_LATENCY = metrics.histogram(
+    "bot_handler_duration_seconds", "Handler execution time", ["handler"]
+)
+RPC_REQUESTS = metrics.counter(
+    "bot_telegram_rpc_total", "Telegram RPC calls", ["method"]
+)
+RPC_ERRORS = metrics.counter(
+    "bot_telegram_rpc_errors_total", "Failed Telegram RPC calls", ["method", "error"]
+)
+RPC_LATENCY = metrics.histogram(
+    "bot_telegram_rpc_duration_seconds", "Telegram RPC round-trip time", ["method"]
+)
+DB_OPERATIONS = metrics.counter(
+    "bot_db_operations_total", "Database operations", ["operation", "status"]
+)
+DB_LATENCY = metrics.histogram(
+    "bot_db_operation_duration_seconds", "Database operation time", ["operation"]
+)
+CACHE_REQUESTS = metrics.counter(
+    "bot_cache_requests_total", "Cache lookups", ["cache", "result"]
+)
+LOOP_LAG = metrics.gauge(
+    "bot_event_loop_lag_seconds", "Most recent event loop scheduling delay"
+)
+LOOP_LAG_HISTOGRAM = metrics.histogram(
+    "bot_event_loop_lag_distribution_seconds", "Event loop scheduling delay",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+UPTIME = metrics.gauge("bot_uptime_seconds", "Seconds since the metrics module loaded")
+
+_START_TIME = time.time()
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a cache lookup result"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def cache_hit_ratio(cache: str) -> float:
+    """Get the hit ratio of a cache (0.0 when unused)"""
+    hits = CACHE_REQUESTS.get(cache=cache, result="hit")
+    total = hits + CACHE_REQUESTS.get(cache=cache, result="miss")
+    return hits / total if total else 0.0
+
+
+class MetricsServer:
+    """Local HTTP endpoint serving /metrics"""
+
+    def __init__(self, registry: MetricsRegistry = metrics, lag_interval: float = 1.0):
+        """Initialize metrics server"""
+        self.registry = registry
+        self.lag_interval = lag_interval
+        self._runner = None
+        self._lag_task: Optional[asyncio.Task] = None
+
+    async def _handle_metrics(self, request):
+        """Serve the exposition text"""
+        from aiohttp import web
+
+        UPTIME.set(time.time() - _START_TIME)
+        return web.Response(
+            text=self.registry.render(),
+            content_type="text/plain",
+            charset="utf-8",
+            headers={"X-Content-Type-Options": "nosniff"}
+        )
+
+    async def _monitor_loop_lag(self):
+        """Measure how late the event loop wakes a sleeping task"""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            lag = max(loop.time() - started - self.lag_interval, 0.0)
+            LOOP_LAG.set(lag)
+            LOOP_LAG_HISTOGRAM.observe(lag)
+
+    async def start(self, host: str = None, port: int = None) -> bool:
+        """Start serving metrics"""
+        if self._runner:
+            return True
+
+        host = host or config.METRICS_HOST
+        port = port or config.METRICS_PORT
+
+        try:
+            from aiohttp import web
+
+            app = web.Application()
+            app.router.add_get("/metrics", self._handle_metrics)
+            self._runner = web.AppRunner(app, access_log=None)
+            await self._runner.setup()
+            await web.TCPSite(self._runner, host, port).start()
+        except Exception as e:
+            bot_logger.error(f"❌ Failed to start metrics endpoint: {e}")
+            self._runner = None
+            return False
+
+        self._lag_task = asyncio.create_task(self._monitor_loop_lag())
+        bot_logger.info(f"📈 Metrics available at http://{host}:{port}/metrics")
+        return True
+
+    async def stop(self):
+        """Stop serving metrics"""
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# Create metrics server instance
+metrics_server = MetricsServer()
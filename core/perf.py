@@ -0,0 +1,134 @@
+"""
+Performance Module
+Sliding-window latency statistics for registered handlers
+"""
+import random
+import time
+from typing import Dict, List, Optional
+
+SLOT_SECONDS = 10
+MAX_WINDOW = 900  # 15 minutes
+SAMPLES_PER_SLOT = 256
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(int(fraction * len(sorted_values)), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class _Slot:
+    """Observations that fell into one time slot"""
+
+    __slots__ = ("index", "count", "errors", "total", "samples")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.samples: List[float] = []
+
+    def add(self, duration: float, error: bool):
+        """Record one observation, reservoir-sampling past the cap"""
+        self.count += 1
+        self.total += duration
+        if error:
+            self.errors += 1
+
+        if len(self.samples) < SAMPLES_PER_SLOT:
+            self.samples.append(duration)
+        else:
+            replace = random.randrange(self.count)
+            if replace < SAMPLES_PER_SLOT:
+                self.samples[replace] = duration
+
+
+class LatencyWindow:
+    """Ring of time slots covering the last MAX_WINDOW seconds"""
+
+    def __init__(self):
+        """Initialize an empty window"""
+        self._slots: List[Optional[_Slot]] = [None] * (MAX_WINDOW // SLOT_SECONDS)
+
+    def _slot(self, now: float) -> _Slot:
+        """Get the slot for a timestamp, recycling stale ones"""
+        index = int(now // SLOT_SECONDS)
+        position = index % len(self._slots)
+        slot = self._slots[position]
+        if slot is None or slot.index != index:
+            slot = self._slots[position] = _Slot(index)
+        return slot
+
+    def add(self, duration: float, error: bool = False, now: float = None):
+        """Record an observation"""
+        self._slot(now if now is not None else time.monotonic()).add(duration, error)
+
+    def summary(self, window: int = 300, now: float = None) -> dict:
+        """Summarize observations from the last `window` seconds"""
+        now = now if now is not None else time.monotonic()
+        oldest = int(now // SLOT_SECONDS) - max(window // SLOT_SECONDS, 1) + 1
+
+        count = errors = 0
+        total = 0.0
+        samples: List[float] = []
+        for slot in self._slots:
+            if slot is None or slot.index < oldest:
+                continue
+            count += slot.count
+            errors += slot.errors
+            total += slot.total
+            samples.extend(slot.samples)
+
+        samples.sort()
+        return {
+            'count': count,
+            'errors': errors,
+            'error_rate': errors / count if count else 0.0,
+            'avg': total / count if count else 0.0,
+            'p50': percentile(samples, 0.50),
+            'p95': percentile(samples, 0.95),
+            'p99': percentile(samples, 0.99),
+            'max': samples[-1] if samples else 0.0
+        }
+
+
+class PerfTracker:
+    """Per-handler latency windows"""
+
+    def __init__(self):
+        """Initialize tracker"""
+        self._windows: Dict[str, LatencyWindow] = {}
+
+    def record(self, name: str, duration: float, error: bool = False):
+        """Record one handler invocation"""
+        window = self._windows.get(name)
+        if window is None:
+            window = self._windows[name] = LatencyWindow()
+        window.add(duration, error)
+
+    def summary(self, window: int = 300) -> Dict[str, dict]:
+        """Summaries for every handler seen within the window"""
+        window = min(max(window, SLOT_SECONDS), MAX_WINDOW)
+        result = {}
+        for name, latency in self._windows.items():
+            stats = latency.summary(window)
+            if stats['count']:
+                result[name] = stats
+        return result
+
+    def slowest(self, window: int = 300, limit: int = 10, key: str = 'p95') -> List[tuple]:
+        """Handlers ordered by the given statistic, slowest first"""
+        stats = self.summary(window)
+        ranked = sorted(stats.items(), key=lambda item: item[1][key], reverse=True)
+        return ranked[:limit]
+
+    def reset(self):
+        """Forget all recorded observations"""
+        self._windows.clear()
+
+
+# Create tracker instance
+perf_tracker = PerfTracker()
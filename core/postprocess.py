@@ -0,0 +1,388 @@
+"""
+Post-processing Module
+Audio metadata and thumbnail generation in a process pool, cached by content hash
+"""
+import hashlib
+import io
+import os
+import signal
+import struct
+import time
+from typing import Any, Dict, Optional, Tuple
+from config import config
+from core.cache import TTLCache
+from core.http import http_client
+from core.lazy import is_available
+from core.logger import bot_logger
+from core.metrics import metrics
+from core.workers import WorkerPool
+
+POSTPROCESS_SECONDS = metrics.histogram(
+    "bot_postprocess_seconds", "Audio metadata and thumbnail generation time, cache misses only"
+)
+
+# Telegram rejects audio thumbnails over 200 KB
+THUMB_MAX_BYTES = 200 * 1024
+
+# Largest remote thumbnail or embedded cover worth decoding
+SOURCE_MAX_BYTES = 10 * 1024 * 1024
+
+HASH_CHUNK = 1024 * 1024
+
+# Containers on the path to the iTunes metadata in an MP4/M4A file
+MP4_CONTAINERS = {b"moov", b"udta", b"meta", b"ilst"}
+MP4_TAGS = {b"\xa9nam": "title", b"\xa9ART": "performer", b"aART": "performer", b"covr": "cover"}
+
+ID3_TEXT_FRAMES = {"TIT2": "title", "TPE1": "performer", "TLEN": "length"}
+ID3_ENCODINGS = {0: "latin-1", 1: "utf-16", 2: "utf-16-be", 3: "utf-8"}
+
+# ID3 tag header flags
+ID3_UNSYNCHRONISED = 0x80
+ID3_EXTENDED_HEADER = 0x40
+ID3_FOOTER = 0x10
+# Frame format flags that change how frame data is laid out, by major version:
+# 2.3 compression, encryption, grouping; 2.4 grouping, compression, encryption,
+# unsynchronisation, data length indicator
+ID3_FRAME_ENCODED = {3: 0xE0, 4: 0x4F}
+
+# MPEG-1 Layer III bitrates in kbit/s and sample rates in Hz by header index
+MP3_BITRATES = (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320)
+MP3_SAMPLE_RATES = (44100, 48000, 32000)
+MP3_FRAME_SAMPLES = 1152
+
+
+# ==================== WORKER SIDE ====================
+
+def _init_worker():
+    """Import Pillow once per worker"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        from PIL import Image  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _digest(path: str) -> str:
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _mp4_atoms(f, start: int, end: int):
+    """Yield (type, payload offset, payload end) of the atoms in [start, end)"""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, min(offset + size, end)
+        offset += size
+
+
+def _probe_mp4(f, size: int) -> Dict[str, Any]:
+    """Duration from mvhd and title, performer and cover art from the ilst atom"""
+    result: Dict[str, Any] = {}
+
+    def walk(start: int, end: int):
+        for kind, body, body_end in _mp4_atoms(f, start, end):
+            if kind == b"mvhd":
+                f.seek(body)
+                # Version 1 uses 64-bit creation, modification and duration fields
+                if f.read(1)[0] == 1:
+                    f.seek(body + 20)
+                    timescale, duration = struct.unpack(">IQ", f.read(12))
+                else:
+                    f.seek(body + 12)
+                    timescale, duration = struct.unpack(">II", f.read(8))
+                if timescale:
+                    result["duration"] = duration / timescale
+            elif kind in MP4_TAGS:
+                for data_kind, data, data_end in _mp4_atoms(f, body, body_end):
+                    if data_kind != b"data" or MP4_TAGS[kind] in result:
+                        continue
+                    # 4 bytes type indicator, 4 bytes locale
+                    f.seek(data + 8)
+                    value = f.read(min(data_end - data - 8, SOURCE_MAX_BYTES))
+                    if MP4_TAGS[kind] != "cover":
+                        value = value.decode("utf-8", "replace").strip()
+                    result[MP4_TAGS[kind]] = value
+            elif kind in MP4_CONTAINERS:
+                if kind == b"meta":
+                    # iTunes meta is a full atom with version and flags before its
+                    # children, QuickTime meta starts directly with hdlr
+                    f.seek(body + 4)
+                    if f.read(4) != b"hdlr":
+                        body += 4
+                walk(body, body_end)
+
+    walk(0, size)
+    return result
+
+
+def _syncsafe(data: bytes) -> int:
+    """Decode an ID3 syncsafe integer"""
+    value = 0
+    for byte in data:
+        value = (value << 7) | (byte & 0x7F)
+    return value
+
+
+def _id3_text(data: bytes) -> str:
+    """Decode an ID3 text frame"""
+    if not data:
+        return ""
+    text = data[1:].decode(ID3_ENCODINGS.get(data[0], "latin-1"), "replace")
+    return text.split("\x00")[0].strip()
+
+
+def _id3_picture(data: bytes) -> Optional[bytes]:
+    """Image bytes of an APIC frame"""
+    encoding = data[0]
+    mime_end = data.index(b"\x00", 1)
+    # Description follows the picture type byte, NUL-terminated in its encoding
+    start = mime_end + 2
+    if encoding in (1, 2):
+        end = start
+        while end + 1 < len(data) and data[end:end + 2] != b"\x00\x00":
+            end += 2
+        return data[end + 2:]
+    return data[data.index(b"\x00", start) + 1:]
+
+
+def _vbr_frames(frame: bytes, mono: bool) -> Optional[int]:
+    """Frame count from a Xing/Info or VBRI header in the first MPEG-1 Layer III frame"""
+    # Xing follows the side information, 17 bytes for mono and 32 otherwise
+    xing = 4 + (17 if mono else 32)
+    if frame[xing:xing + 4] in (b"Xing", b"Info") and len(frame) >= xing + 12:
+        if struct.unpack(">I", frame[xing + 4:xing + 8])[0] & 0x01:
+            return struct.unpack(">I", frame[xing + 8:xing + 12])[0] or None
+    # VBRI is always 32 bytes after the header: tag, version, delay, quality, bytes, frames
+    if frame[36:40] == b"VBRI" and len(frame) >= 54:
+        return struct.unpack(">I", frame[50:54])[0] or None
+    return None
+
+
+def _mp3_duration(f, offset: int, size: int) -> Tuple[Optional[float], bool]:
+    """
+    Duration from the first MPEG frame, returns (seconds, exact).
+
+    A Xing/Info or VBRI header gives the frame count, exact for VBR files too.
+    Without one, constant bitrate is assumed, which is only an estimate.
+    """
+    f.seek(offset)
+    window = f.read(64 * 1024)
+    for i in range(len(window) - 3):
+        if window[i] != 0xFF or window[i + 1] & 0xE0 != 0xE0:
+            continue
+        index = window[i + 2] >> 4
+        rate = (window[i + 2] >> 2) & 0x03
+        # MPEG-1 Layer III only, anything else is left to the duration hint
+        if window[i + 1] & 0x1E != 0x1A or not 0 < index < len(MP3_BITRATES) or rate >= len(MP3_SAMPLE_RATES):
+            continue
+        frames = _vbr_frames(window[i:i + 64], mono=window[i + 3] >> 6 == 3)
+        if frames:
+            return frames * MP3_FRAME_SAMPLES / MP3_SAMPLE_RATES[rate], True
+        return (size - offset - i) * 8 / (MP3_BITRATES[index] * 1000), False
+    return None, False
+
+
+def _id3_frames(tag: bytes, version: int):
+    """Yield (frame ID, data) of the plain frames in an ID3v2.3/2.4 tag body"""
+    offset = 0
+    while offset + 10 <= len(tag) and tag[offset:offset + 4].strip(b"\x00"):
+        frame_id = tag[offset:offset + 4].decode("latin-1")
+        raw_size = tag[offset + 4:offset + 8]
+        frame_size = _syncsafe(raw_size) if version == 4 else struct.unpack(">I", raw_size)[0]
+        encoded = tag[offset + 9] & ID3_FRAME_ENCODED[version]
+        data = tag[offset + 10:offset + 10 + frame_size]
+        offset += 10 + frame_size
+        if len(data) < frame_size:
+            # Truncated file or bad size: a partial title or picture is worse than none
+            return
+        # Compressed, encrypted or otherwise wrapped data is not worth decoding here
+        if not encoded:
+            yield frame_id, data
+
+
+def _probe_mp3(f, size: int) -> Dict[str, Any]:
+    """Title, performer, length and cover art from an ID3v2.3/2.4 tag"""
+    result: Dict[str, Any] = {}
+    f.seek(0)
+    header = f.read(10)
+    audio_start = 0
+    if header[:3] == b"ID3" and header[3] in (3, 4):
+        version, flags = header[3], header[5]
+        tag_size = _syncsafe(header[6:10])
+        audio_start = 10 + tag_size + (10 if flags & ID3_FOOTER else 0)
+        tag = f.read(tag_size)
+        if flags & ID3_EXTENDED_HEADER:
+            # 2.3 counts the size field out, 2.4 counts it in and makes it syncsafe
+            if version == 4:
+                tag = tag[_syncsafe(tag[:4]):]
+            else:
+                tag = tag[4 + struct.unpack(">I", tag[:4])[0]:]
+
+        # An unsynchronised tag has to be decoded as a whole, rare enough to leave to the hints
+        if not flags & ID3_UNSYNCHRONISED:
+            for frame_id, data in _id3_frames(tag, version):
+                if frame_id in ID3_TEXT_FRAMES and ID3_TEXT_FRAMES[frame_id] not in result:
+                    result[ID3_TEXT_FRAMES[frame_id]] = _id3_text(data)
+                elif frame_id == "APIC" and "cover" not in result:
+                    try:
+                        result["cover"] = _id3_picture(data)
+                    except (ValueError, IndexError):
+                        pass
+
+    length = result.pop("length", "")
+    if length.isdigit():
+        result["duration"] = int(length) / 1000
+    else:
+        duration, exact = _mp3_duration(f, audio_start, size)
+        if duration:
+            result["duration" if exact else "duration_estimate"] = duration
+    return result
+
+
+def _probe(path: str) -> Dict[str, Any]:
+    """Read duration, title, performer and embedded cover art from an audio file"""
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        head = f.read(12)
+        try:
+            if head[4:8] == b"ftyp":
+                return _probe_mp4(f, size)
+            if head[:3] == b"ID3" or head[:2] in (b"\xff\xfb", b"\xff\xfa", b"\xff\xf3", b"\xff\xf2"):
+                return _probe_mp3(f, size)
+        except (struct.error, IndexError, OSError):
+            # Truncated or unusual file: keep whatever the hints provide
+            pass
+    return {}
+
+
+def _thumbnail(data: bytes, size: int, quality: int) -> Optional[bytes]:
+    """Square JPEG thumbnail of `size` pixels, under Telegram's size limit"""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            image = ImageOps.fit(image.convert("RGB"), (size, size), Image.Resampling.LANCZOS)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+
+    while quality >= 30:
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=quality, optimize=True)
+        if output.tell() <= THUMB_MAX_BYTES:
+            return output.getvalue()
+        quality -= 15
+    return None
+
+
+# ==================== SERVICE ====================
+
+class AudioPostProcessor:
+    """Builds upload metadata for audio files in worker processes"""
+
+    def __init__(self):
+        """Initialize post-processor"""
+        self.workers = config.POSTPROCESS_WORKERS
+        self.timeout = config.POSTPROCESS_TIMEOUT
+        self.thumb_size = config.THUMB_SIZE
+        self.thumb_quality = config.THUMB_QUALITY
+        self.thumbnails = is_available("PIL")
+        # File tags by content hash, remote thumbnails by URL
+        self._results = TTLCache("audio_tags", ttl=config.POSTPROCESS_CACHE_TTL, maxsize=512)
+        self._thumbs = TTLCache("audio_thumbnails", ttl=config.POSTPROCESS_CACHE_TTL, maxsize=256)
+        self._workers = WorkerPool("Post-processing", self.workers, initializer=_init_worker)
+        if not self.thumbnails:
+            bot_logger.warning("Pillow is not installed, audio will be uploaded without thumbnails")
+
+    async def _call(self, func, *args):
+        """Run a worker function with a deadline, killing its worker if it hangs"""
+        return await self._workers.run(func, *args, timeout=self.timeout)
+
+    async def _cover_from_url(self, url: str) -> Optional[bytes]:
+        """Download a remote thumbnail"""
+        try:
+            status, data = await http_client.get_bytes(url, max_size=SOURCE_MAX_BYTES)
+        except Exception as e:
+            bot_logger.debug(f"Thumbnail download failed for {url}: {e}")
+            return None
+        return data
+
+    async def _read_file(self, path: str) -> Dict[str, Any]:
+        """Duration, title and performer from the file's tags, and a thumbnail of its embedded art"""
+        start = time.perf_counter()
+        tags = await self._call(_probe, path)
+        cover = tags.pop("cover", None)
+        tags["thumb"] = None
+        if cover and self.thumbnails:
+            tags["thumb"] = await self._call(_thumbnail, cover, self.thumb_size, self.thumb_quality)
+        POSTPROCESS_SECONDS.observe(time.perf_counter() - start)
+        return tags
+
+    async def _thumb_from_url(self, url: str) -> Optional[bytes]:
+        """Thumbnail of a remote image"""
+        cover = await self._cover_from_url(url)
+        if not cover:
+            return None
+        return await self._call(_thumbnail, cover, self.thumb_size, self.thumb_quality)
+
+    async def process(self, path: str, hints: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Upload metadata of an audio file: duration (seconds), title, performer
+        and thumb (JPEG bytes or None).
+
+        Tags in the file win over `hints` (duration, title, performer and a
+        thumbnail URL, e.g. from the download backend), except a duration
+        estimated from the bitrate of an MP3 without a length. What is read from the
+        file is cached by content hash, so the same file is only processed
+        once; hints are applied on every call.
+        """
+        hints = hints or {}
+        tags: Dict[str, Any] = {}
+        try:
+            digest = await self._call(_digest, path)
+            tags = await self._results.get_or_fetch(digest, lambda: self._read_file(path))
+        except Exception as e:
+            bot_logger.warning(f"Post-processing failed for {path}: {e}")
+
+        # A constant-bitrate estimate can be far off for VBR files, a hinted duration is not
+        duration = tags.get("duration") or hints.get("duration") or tags.get("duration_estimate")
+        result: Dict[str, Any] = {
+            "duration": int(round(duration)) if duration else 0,
+            "title": tags.get("title") or hints.get("title"),
+            "performer": tags.get("performer") or hints.get("performer"),
+            "thumb": tags.get("thumb")
+        }
+
+        url = hints.get("thumbnail")
+        if not result["thumb"] and url and self.thumbnails:
+            try:
+                result["thumb"] = await self._thumbs.get_or_fetch(
+                    url, lambda: self._thumb_from_url(url), should_cache=lambda thumb: thumb is not None
+                )
+            except Exception as e:
+                bot_logger.debug(f"Thumbnail failed for {url}: {e}")
+        return result
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self._workers.shutdown()
+
+
+# Create post-processor instance
+postprocessor = AudioPostProcessor()
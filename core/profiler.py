@@ -0,0 +1,166 @@
+"""
+Profiler Module
+In-process statistical CPU sampling and tracemalloc allocation diffs
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Optional
+
+# Leaf frames that mean the event loop is waiting for I/O
+IDLE_FUNCTIONS = {"select", "poll"}
+
+
+def _frame_key(frame) -> str:
+    """Readable location for a frame"""
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class StackSampler(threading.Thread):
+    """Background thread that periodically samples another thread's stack"""
+
+    def __init__(self, target_thread: int, interval: float = 0.005, max_depth: int = 64):
+        """Initialize sampler"""
+        super().__init__(name="stack-sampler", daemon=True)
+        self.target_thread = target_thread
+        self.interval = interval
+        self.max_depth = max_depth
+        self.samples = 0
+        self.idle = 0
+        self.self_counts: Counter = Counter()
+        self.total_counts: Counter = Counter()
+        self.stacks: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def _sample(self):
+        """Record the target thread's current stack"""
+        frame = sys._current_frames().get(self.target_thread)
+        if frame is None:
+            return
+
+        self.samples += 1
+        if frame.f_code.co_name in IDLE_FUNCTIONS:
+            self.idle += 1
+            return
+
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(_frame_key(frame))
+            frame = frame.f_back
+
+        self.self_counts[stack[0]] += 1
+        for key in set(stack):
+            self.total_counts[key] += 1
+        self.stacks[";".join(reversed(stack))] += 1
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        """Stop sampling"""
+        self._stop_event.set()
+
+
+def _format_cpu(sampler: StackSampler, duration: float, top: int) -> str:
+    """Render the CPU section of the report"""
+    busy = sampler.samples - sampler.idle
+    lines = [
+        "=== CPU (event loop thread) ===",
+        f"Samples: {sampler.samples} over {duration:.1f}s "
+        f"(interval {sampler.interval * 1000:.0f}ms)",
+        f"Busy: {busy} ({busy / sampler.samples * 100 if sampler.samples else 0:.1f}%), "
+        f"Idle: {sampler.idle}",
+        "",
+        "-- Top functions by self samples --",
+    ]
+    for key, count in sampler.self_counts.most_common(top):
+        lines.append(f"{count:>7} {count / max(busy, 1) * 100:6.2f}%  {key}")
+
+    lines += ["", "-- Top functions by cumulative samples --"]
+    for key, count in sampler.total_counts.most_common(top):
+        lines.append(f"{count:>7} {count / max(busy, 1) * 100:6.2f}%  {key}")
+
+    lines += ["", "-- Collapsed stacks (flamegraph input) --"]
+    for stack, count in sampler.stacks.most_common(top * 4):
+        lines.append(f"{stack} {count}")
+    return "\n".join(lines)
+
+
+def _format_memory(before, after, top: int) -> str:
+    """Render the allocation section of the report"""
+    ignore = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    growth = sum(stat.size_diff for stat in stats)
+    lines = [
+        "=== Allocations (tracemalloc diff) ===",
+        f"Net change: {growth / 1024:+.1f} KiB",
+        "",
+        "-- Top allocation sites by size change --",
+    ]
+    for stat in stats[:top]:
+        frame = stat.traceback[0]
+        lines.append(
+            f"{stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    return "\n".join(lines)
+
+
+_lock = asyncio.Lock()
+
+
+def is_running() -> bool:
+    """Whether a profiling session is in progress"""
+    return _lock.locked()
+
+
+async def profile(duration: float, cpu: bool = True, memory: bool = True,
+                  interval: float = 0.005, top: int = 30) -> str:
+    """Profile the running process for `duration` seconds and return a text report"""
+    async with _lock:
+        sampler: Optional[StackSampler] = None
+        started_tracing = False
+        before = None
+
+        if memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(1)
+                started_tracing = True
+            before = await asyncio.to_thread(tracemalloc.take_snapshot)
+
+        if cpu:
+            sampler = StackSampler(threading.get_ident(), interval=interval)
+            sampler.start()
+
+        start = time.perf_counter()
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            elapsed = time.perf_counter() - start
+            if sampler:
+                sampler.stop()
+                await asyncio.to_thread(sampler.join)
+
+        sections = [f"Profile report, pid {os.getpid()}, {time.strftime('%Y-%m-%d %H:%M:%S')}"]
+        if sampler:
+            sections.append(_format_cpu(sampler, elapsed, top))
+
+        if memory:
+            try:
+                after = await asyncio.to_thread(tracemalloc.take_snapshot)
+                sections.append(_format_memory(before, after, top))
+            finally:
+                if started_tracing:
+                    tracemalloc.stop()
+
+        return "\n\n".join(sections) + "\n"
@@ -0,0 +1,113 @@
+"""
+Reloader Module
+Hot reload of a single plugin module without restarting the client
+"""
+import importlib
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+from pyrogram import Client
+from pyrogram.handlers.handler import Handler
+from core.instrumentation import instrument_handler
+from core.logger import bot_logger
+from core.state import state_registry
+
+PLUGIN_ROOT = "plugins"
+
+
+class ReloadError(Exception):
+    """Raised when a plugin cannot be reloaded; the old handlers stay active"""
+
+
+def plugin_module(name: str) -> str:
+    """Resolve a plugin name ('admin' or 'plugins.admin') to its module path"""
+    name = name.strip()
+    if name.endswith(".py"):
+        name = name[:-len(".py")]
+    if not name.startswith(f"{PLUGIN_ROOT}."):
+        name = f"{PLUGIN_ROOT}.{name}"
+    return name
+
+
+def _registered_handlers(app: Client, module_name: str) -> List[Tuple[Handler, int]]:
+    """Handlers currently in the dispatcher whose callback comes from a module"""
+    return [
+        (handler, group)
+        for group, handlers in app.dispatcher.groups.items()
+        for handler in handlers
+        if getattr(handler.callback, "__module__", None) == module_name
+    ]
+
+
+def _module_handlers(module) -> List[Tuple[Handler, int]]:
+    """Handlers declared with Client.on_* decorators, collected the way the client loads plugins"""
+    found = []
+    for name in vars(module).keys():
+        for handler, group in getattr(getattr(module, name), "handlers", None) or []:
+            if isinstance(handler, Handler) and isinstance(group, int):
+                found.append((handler, group))
+    return found
+
+
+def reload_plugin(app: Client, name: str) -> Dict[str, object]:
+    """
+    Re-import one plugin and swap its handlers in the dispatcher.
+
+    The module is executed before any handler is removed, so a plugin that
+    fails to import keeps serving with its old handlers. State the plugin
+    registered with the state registry is carried over to the new module.
+    Reloaded handlers are appended to the end of their groups.
+    """
+    module_name = plugin_module(name)
+    path = os.path.join(*module_name.split(".")) + ".py"
+    if not os.path.isfile(path):
+        raise ReloadError(f"Plugin not found: {module_name}")
+
+    start = time.perf_counter()
+    old_handlers = _registered_handlers(app, module_name)
+    old_providers = state_registry.providers()
+    saved_state = state_registry.dump()
+
+    try:
+        module = sys.modules.get(module_name)
+        if module is None:
+            module = importlib.import_module(module_name)
+        else:
+            module = importlib.reload(module)
+    except Exception as e:
+        # The old handlers keep running, so point the registry back at their state
+        for key, provider in old_providers.items():
+            state_registry.register(key, *provider)
+        raise ReloadError(f"{type(e).__name__}: {e}") from e
+
+    new_handlers = _module_handlers(module)
+
+    # Providers the module re-registered get the state their predecessors held
+    providers = state_registry.providers()
+    replaced = {
+        key: data for key, data in saved_state.items()
+        if key in providers and providers[key] is not old_providers.get(key)
+    }
+    restored = state_registry.load(replaced)
+
+    # The dispatcher applies these in order, so the old handlers go first
+    for handler, group in old_handlers:
+        app.remove_handler(handler, group)
+    for handler, group in new_handlers:
+        instrument_handler(handler)
+        app.add_handler(handler, group)
+
+    elapsed = time.perf_counter() - start
+    bot_logger.info(
+        f"♻️ Reloaded {module_name} in {elapsed * 1000:.0f}ms "
+        f"({len(old_handlers)} → {len(new_handlers)} handlers)"
+    )
+
+    return {
+        "module": module_name,
+        "removed": len(old_handlers),
+        "added": len(new_handlers),
+        "state": restored,
+        "seconds": elapsed
+    }
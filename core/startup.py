@@ -0,0 +1,81 @@
+"""
+Startup Module
+Phase timing for the startup pipeline and background plugin pre-import
+"""
+import importlib
+import os
+import time
+from typing import Dict, List
+from core.logger import bot_logger
+from core.metrics import metrics
+from core.lazy import record_import
+
+STARTUP_PHASE = metrics.gauge(
+    "bot_startup_phase_seconds", "Duration of each startup phase", ["phase"]
+)
+STARTUP_TOTAL = metrics.gauge("bot_startup_seconds", "Total cold-start time")
+
+
+class StartupTimer:
+    """Records how long each (possibly concurrent) startup phase took"""
+
+    def __init__(self):
+        """Start the clock"""
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    async def run(self, name: str, awaitable):
+        """Await a phase and record its duration"""
+        start = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            STARTUP_PHASE.set(self.phases[name], phase=name)
+
+    def measure(self, name: str, func, *args, **kwargs):
+        """Run a synchronous phase and record its duration"""
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.phases[name] = time.perf_counter() - start
+            STARTUP_PHASE.set(self.phases[name], phase=name)
+
+    @property
+    def total(self) -> float:
+        """Seconds since the timer started"""
+        return time.perf_counter() - self.started
+
+    def report(self) -> str:
+        """One-line breakdown, slowest phase first"""
+        STARTUP_TOTAL.set(self.total)
+        phases = sorted(self.phases.items(), key=lambda item: item[1], reverse=True)
+        breakdown = " | ".join(f"{name} {seconds:.2f}s" for name, seconds in phases)
+        return f"total {self.total:.2f}s | {breakdown}"
+
+
+def preload_plugins(root: str = "plugins") -> List[str]:
+    """
+    Import every plugin module so the client's own plugin loading is a cache hit.
+
+    Each import is timed and checked against the import budget.
+    """
+    loaded = []
+    if not os.path.isdir(root):
+        return loaded
+
+    for filename in sorted(os.listdir(root)):
+        name, extension = os.path.splitext(filename)
+        if extension != ".py" or name.startswith("_"):
+            continue
+        module = f"{root.replace('/', '.')}.{name}"
+        try:
+            start = time.perf_counter()
+            importlib.import_module(module)
+            record_import(module, time.perf_counter() - start)
+            loaded.append(module)
+        except Exception as e:
+            # The client reports plugin errors itself when it loads them
+            bot_logger.warning(f"Could not preload {module}: {e}")
+    return loaded
@@ -0,0 +1,85 @@
+"""
+State Module
+Snapshot and restore of in-memory state across restarts
+"""
+import os
+import pickle
+import time
+from typing import Any, Callable, Dict, Tuple
+from core.logger import bot_logger
+
+
+class StateRegistry:
+    """Named providers of state that should survive a restart"""
+
+    def __init__(self):
+        """Initialize an empty registry"""
+        self._providers: Dict[str, Tuple[Callable[[], Any], Callable[[Any], None]]] = {}
+
+    def register(self, name: str, dump: Callable[[], Any], load: Callable[[Any], None]):
+        """Register a provider; dump() returns picklable data, load(data) restores it"""
+        self._providers[name] = (dump, load)
+
+    def providers(self) -> Dict[str, Tuple[Callable[[], Any], Callable[[Any], None]]]:
+        """Copy of the registered providers, by name"""
+        return dict(self._providers)
+
+    def dump(self) -> Dict[str, Any]:
+        """Collect every provider's state in memory"""
+        state = {}
+        for name, (dump, _) in self._providers.items():
+            try:
+                state[name] = dump()
+            except Exception as e:
+                bot_logger.warning(f"Could not snapshot state '{name}': {e}")
+        return state
+
+    def load(self, state: Dict[str, Any]) -> int:
+        """Hand saved state to the registered providers, returns how many accepted it"""
+        restored = 0
+        for name, data in state.items():
+            provider = self._providers.get(name)
+            if not provider:
+                continue
+            try:
+                provider[1](data)
+                restored += 1
+            except Exception as e:
+                bot_logger.warning(f"Could not restore state '{name}': {e}")
+        return restored
+
+    def snapshot(self, path: str, **extra) -> int:
+        """Write every provider's state to `path` atomically, returns provider count"""
+        state = self.dump()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump({"saved_at": time.time(), "state": state, **extra}, f)
+        os.replace(temp_path, path)
+        return len(state)
+
+    def restore(self, path: str) -> Dict[str, Any]:
+        """Load a snapshot into registered providers and delete it, returns its extras"""
+        if not os.path.exists(path):
+            return {}
+
+        try:
+            with open(path, "rb") as f:
+                snapshot = pickle.load(f)
+        except Exception as e:
+            bot_logger.warning(f"Could not read state snapshot: {e}")
+            return {}
+        finally:
+            os.remove(path)
+
+        restored = self.load(snapshot.pop("state", {}))
+        bot_logger.info(f"♻️ Restored {restored} state provider(s) from snapshot")
+        return snapshot
+
+
+# Create state registry instance
+state_registry = StateRegistry()
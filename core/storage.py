@@ -0,0 +1,275 @@
+"""
+Storage Module
+Download area manager: in-flight tracking, byte quota with LRU eviction and orphan sweeping
+"""
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Optional, Set
+from config import config
+from core.logger import bot_logger
+from core.metrics import metrics
+from core.transfer import STATE_SUFFIX
+
+INDEX_FILE = ".cache_index.json"
+# Interrupted ranged downloads, kept for a later attempt to resume
+RESUME_PREFIX = "resume-"
+RESUME_MAX_AGE = 24 * 3600
+# Names this module writes: "<job id>_<name>", "<job id>.<ext>", resumable partials
+# and their sidecars; anything else in the directory is never deleted
+MANAGED_FILE = re.compile(rf"^(?:[0-9a-f]{{8}}[._]|{RESUME_PREFIX}[0-9a-f]{{16}}_)")
+
+DOWNLOADS_BYTES = metrics.gauge(
+    "bot_downloads_bytes", "Bytes used in the downloads directory", ["kind"]
+)
+DOWNLOADS_EVICTED = metrics.counter(
+    "bot_downloads_evicted_total", "Cached media files evicted to stay under the quota"
+)
+
+
+class DownloadStorage:
+    """Owns every file in the downloads directory"""
+
+    def __init__(self, directory: str = None, quota: int = None):
+        """Initialize storage manager"""
+        self.directory = directory or config.DOWNLOAD_DIR
+        self.quota = quota if quota is not None else config.DOWNLOAD_QUOTA_MB * 1024 * 1024
+        # Job IDs whose files are being written; file names start with the ID
+        self._inflight: Set[str] = set()
+        # Cached files being uploaded right now, never evicted
+        self._pinned: Dict[str, int] = {}
+        # Replaced or invalidated cached files, deleted once the last pin is gone
+        self._retired: Set[str] = set()
+        # Cached media by key: {"path", "size", "last_used", "hints"}
+        self._cached: Dict[str, dict] = {}
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.directory, INDEX_FILE)
+
+    def owns(self, path: str) -> bool:
+        """Whether a path lies inside the downloads directory"""
+        directory = os.path.abspath(self.directory)
+        return os.path.commonpath([directory, os.path.abspath(path)]) == directory
+
+    # ==================== IN-FLIGHT ====================
+
+    def begin(self, job_id: str):
+        """Mark files starting with `job_id` as being written"""
+        self._inflight.add(job_id)
+
+    def end(self, job_id: str):
+        """
+        Job is over: delete whatever it left in the directory except cached media.
+
+        This catches partial files from failed or cancelled downloads that the
+        backend did not clean up itself.
+        """
+        self._inflight.discard(job_id)
+        if not os.path.isdir(self.directory):
+            return
+        cached = self._cached_paths()
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(job_id) and os.path.abspath(entry.path) not in cached:
+                self.remove(entry.path)
+
+    def remove(self, path: str):
+        """Delete a file that is not worth keeping"""
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError as e:
+                bot_logger.warning(f"Could not remove {path}: {e}")
+
+    def pin(self, path: str):
+        """Protect a cached file from eviction while it is in use"""
+        self._pinned[path] = self._pinned.get(path, 0) + 1
+
+    def unpin(self, path: str):
+        """Undo one pin()"""
+        count = self._pinned.get(path, 0) - 1
+        if count > 0:
+            self._pinned[path] = count
+            return
+        self._pinned.pop(path, None)
+        if path in self._retired:
+            self._retired.discard(path)
+            if os.path.abspath(path) not in self._cached_paths():
+                self.remove(path)
+
+    def _retire(self, path: str):
+        """Delete a file that left the cache, or defer it while an upload still reads it"""
+        if path in self._pinned:
+            self._retired.add(path)
+        else:
+            self.remove(path)
+
+    # ==================== CACHE ====================
+
+    def store(self, key: str, path: str, hints: Dict[str, Any] = None):
+        """Keep a completed file as cached media with its download metadata, then enforce the quota"""
+        if not self.owns(path) or not os.path.exists(path):
+            return
+        previous = self._cached.get(key)
+        if previous and previous["path"] != path:
+            self._retire(previous["path"])
+        self._cached[key] = {
+            "path": path, "size": os.path.getsize(path), "last_used": time.time(), "hints": hints or {}
+        }
+        self.enforce()
+        self._save_index()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Path of cached media, or None"""
+        entry = self._cached.get(key)
+        if entry is None:
+            return None
+        if not os.path.exists(entry["path"]):
+            del self._cached[key]
+            self._save_index()
+            return None
+        entry["last_used"] = time.time()
+        # Otherwise eviction order after a restart ignores every hit since the last store
+        self._save_index()
+        return entry["path"]
+
+    def hints(self, key: str) -> Dict[str, Any]:
+        """Download metadata stored with cached media"""
+        entry = self._cached.get(key) or {}
+        return dict(entry.get("hints") or {})
+
+    def invalidate(self, key: str):
+        """Drop cached media"""
+        entry = self._cached.pop(key, None)
+        if entry:
+            self._retire(entry["path"])
+            self._save_index()
+
+    def enforce(self) -> int:
+        """Evict least recently used cached media until usage fits the quota, returns bytes freed"""
+        if not self.quota:
+            return 0
+        used = self.usage()["total"]
+        freed = 0
+        for key, entry in sorted(self._cached.items(), key=lambda item: item[1]["last_used"]):
+            if used - freed <= self.quota:
+                break
+            if entry["path"] in self._pinned:
+                continue
+            self.remove(entry["path"])
+            del self._cached[key]
+            freed += entry["size"]
+            DOWNLOADS_EVICTED.inc()
+
+        if used - freed > self.quota:
+            bot_logger.warning(
+                f"📦 Downloads use {used - freed} bytes, over the {self.quota} byte quota with nothing left to evict"
+            )
+        if freed:
+            bot_logger.info(f"📦 Evicted {freed} bytes of cached media")
+            self._save_index()
+        return freed
+
+    # ==================== USAGE ====================
+
+    def _cached_paths(self) -> Set[str]:
+        return {os.path.abspath(entry["path"]) for entry in self._cached.values()}
+
+    def _resumable_paths(self) -> Set[str]:
+        """Recent resumable partials and their resume state"""
+        paths = set()
+        if not os.path.isdir(self.directory):
+            return paths
+        now = time.time()
+        for entry in os.scandir(self.directory):
+            if not entry.name.startswith(RESUME_PREFIX) or not entry.name.endswith(STATE_SUFFIX):
+                continue
+            partial = entry.path[:-len(STATE_SUFFIX)]
+            if os.path.isfile(partial) and now - entry.stat().st_mtime < RESUME_MAX_AGE:
+                paths.update((os.path.abspath(partial), os.path.abspath(entry.path)))
+        return paths
+
+    def usage(self) -> Dict[str, int]:
+        """Bytes and file counts in the downloads directory"""
+        cached_paths = self._cached_paths()
+        usage = {
+            "total": 0, "inflight": 0, "cached": 0, "other": 0,
+            "files": 0, "cached_files": len(self._cached), "quota": self.quota
+        }
+        if not os.path.isdir(self.directory):
+            return usage
+
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or entry.name == INDEX_FILE:
+                continue
+            size = entry.stat().st_size
+            usage["total"] += size
+            usage["files"] += 1
+            if os.path.abspath(entry.path) in cached_paths:
+                usage["cached"] += size
+            elif any(entry.name.startswith(job_id) for job_id in self._inflight):
+                usage["inflight"] += size
+            else:
+                usage["other"] += size
+
+        for kind in ("inflight", "cached", "other"):
+            DOWNLOADS_BYTES.set(usage[kind], kind=kind)
+        return usage
+
+    # ==================== PERSISTENCE ====================
+
+    def _save_index(self):
+        """Persist the cache index so cached media survives restarts"""
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            temp_path = self.index_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self._cached, f)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            bot_logger.warning(f"Could not save download cache index: {e}")
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        Startup cleanup: reload the cache index and delete abandoned downloads.
+
+        Nothing is in flight before the bot starts, so a download file that is
+        not indexed cached media is a partial or abandoned one. Resumable
+        partials are kept for RESUME_MAX_AGE after their last progress. Only
+        names matching MANAGED_FILE are touched, whatever else the directory holds.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+
+        self._cached = {
+            key: entry for key, entry in index.items()
+            if isinstance(entry, dict) and os.path.isfile(entry.get("path", "")) and self.owns(entry["path"])
+        }
+        keep = self._cached_paths() | self._resumable_paths()
+
+        removed = freed = 0
+        for entry in os.scandir(self.directory):
+            if not entry.is_file() or not MANAGED_FILE.match(entry.name) or os.path.abspath(entry.path) in keep:
+                continue
+            try:
+                size = entry.stat().st_size
+                os.remove(entry.path)
+                removed += 1
+                freed += size
+            except OSError as e:
+                bot_logger.warning(f"Could not remove orphaned {entry.path}: {e}")
+
+        self._save_index()
+        self.enforce()
+        if removed:
+            bot_logger.info(f"🧹 Removed {removed} orphaned download file(s), {freed} bytes")
+        return {"removed": removed, "freed": freed, "cached": len(self._cached)}
+
+
+# Create storage instance
+storage = DownloadStorage()
@@ -0,0 +1,269 @@
+"""
+Tracing Module
+Lightweight span tracer exporting sampled traces as OTLP JSON lines
+"""
+import asyncio
+import contextvars
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+from config import config
+from core.logger import bot_logger
+
+# OTLP span kinds
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+KIND_CLIENT = 3
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+def _otlp_value(value: Any) -> dict:
+    """Convert a Python value to an OTLP AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    """Convert a dict to a list of OTLP KeyValues"""
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+class _Trace:
+    """Spans collected for one trace until its root finishes"""
+
+    __slots__ = ("trace_id", "sampled", "spans")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """A timed operation within a trace"""
+
+    __slots__ = (
+        "tracer", "trace", "name", "kind", "span_id", "parent", "attributes",
+        "start_ns", "end_ns", "error", "_token"
+    )
+
+    def __init__(self, tracer: "Tracer", name: str, kind: int, attributes: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes
+        self.parent: Optional[Span] = _current_span.get()
+        self.trace = self.parent.trace if self.parent else tracer._new_trace()
+        self.span_id = os.urandom(8).hex()
+        self.start_ns = 0
+        self.end_ns = 0
+        self.error: Optional[str] = None
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        """Span duration in seconds"""
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        """Attach an attribute to the span"""
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self.start_ns = time.time_ns()
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end_ns = time.time_ns()
+        _current_span.reset(self._token)
+
+        # Propagation signals are control flow, not failures
+        if exc is not None and not isinstance(exc, (StopIteration, StopAsyncIteration)):
+            self.error = f"{exc_type.__name__}: {exc}"
+
+        self.trace.spans.append(self)
+        if self.parent is None:
+            self.tracer._finish(self)
+        return False
+
+    def to_otlp(self) -> dict:
+        """Serialize as an OTLP JSON span"""
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": _otlp_attributes(self.attributes),
+            "status": {"code": STATUS_ERROR, "message": self.error} if self.error else {"code": STATUS_OK}
+        }
+        if self.parent:
+            span["parentSpanId"] = self.parent.span_id
+        return span
+
+
+class _NoopSpan:
+    """Stand-in used while tracing is disabled"""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class TraceExporter:
+    """Buffered writer to a size-rotated JSON lines file"""
+
+    def __init__(self, path: str, max_bytes: int, backups: int, flush_interval: float = 5.0):
+        """Initialize exporter"""
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_interval = flush_interval
+        self._buffer: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def export(self, record: dict):
+        """Queue one OTLP request for writing"""
+        self._buffer.append(json.dumps(record, separators=(",", ":"), ensure_ascii=False))
+
+    def _rotate(self):
+        """Shift path -> path.1 -> ... -> path.N"""
+        for index in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+    def _write(self, lines: List[str]):
+        """Append lines to the file, rotating when it grows too large"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            self._rotate()
+
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    def _take(self) -> List[str]:
+        """Swap out the pending buffer"""
+        lines, self._buffer = self._buffer, []
+        return lines
+
+    async def flush(self):
+        """Write pending traces off the event loop"""
+        lines = self._take()
+        if lines:
+            await asyncio.to_thread(self._write, lines)
+
+    async def _run(self):
+        """Periodically flush the buffer"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                bot_logger.warning(f"Could not write traces: {e}")
+
+    def start(self):
+        """Start the background flusher"""
+        if not self._task:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write what is left"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+class Tracer:
+    """Creates spans and exports finished, sampled traces"""
+
+    def __init__(self):
+        """Initialize tracer from configuration"""
+        self.enabled = config.ENABLE_TRACING
+        self.sample_rate = config.TRACE_SAMPLE_RATE
+        self.slow_threshold = config.TRACE_SLOW_THRESHOLD
+        self.exporter = TraceExporter(
+            config.TRACE_FILE,
+            max_bytes=config.TRACE_MAX_BYTES,
+            backups=config.TRACE_BACKUPS
+        )
+        self.exported = 0
+
+    def _new_trace(self) -> _Trace:
+        """Start a trace, making the head sampling decision"""
+        return _Trace(sampled=random.random() < self.sample_rate)
+
+    def span(self, name: str, kind: int = KIND_INTERNAL, **attributes):
+        """Create a span context manager, a child of the current span if any"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, kind, attributes)
+
+    def current_span(self) -> Optional[Span]:
+        """Get the active span"""
+        return _current_span.get()
+
+    def _finish(self, root: Span):
+        """Export a finished trace if sampled, slow or failed"""
+        trace = root.trace
+        if not (trace.sampled or root.error or root.duration >= self.slow_threshold):
+            return
+
+        self.exporter.export({
+            "resourceSpans": [{
+                "resource": {"attributes": _otlp_attributes({
+                    "service.name": config.BOT_NAME,
+                    "service.version": config.BOT_VERSION
+                })},
+                "scopeSpans": [{
+                    "scope": {"name": "bot.tracing"},
+                    "spans": [span.to_otlp() for span in trace.spans]
+                }]
+            }]
+        })
+        self.exported += 1
+
+    def start(self):
+        """Start exporting traces"""
+        if self.enabled:
+            self.exporter.start()
+            bot_logger.info(f"🔍 Tracing enabled, writing to {self.exporter.path}")
+
+    async def stop(self):
+        """Flush remaining traces"""
+        if self.enabled:
+            await self.exporter.stop()
+
+
+# Create tracer instance
+tracer = Tracer()
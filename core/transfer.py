@@ -0,0 +1,267 @@
+"""
+Transfer Module
+Parallel HTTP range downloads into a preallocated file, with resume and single-stream fallback
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
+from config import config
+from core.http import http_client, HTTP_REQUESTS, HTTP_LATENCY
+from core.logger import bot_logger
+
+CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+STATE_SUFFIX = ".parts"
+
+# Attempts per segment before the whole download fails
+SEGMENT_RETRIES = 3
+# Seconds between writes of the resume state
+STATE_INTERVAL = 1.0
+# Seconds before the first segment retry, doubled for each further one
+RETRY_BACKOFF = 1.0
+
+
+class TransferError(Exception):
+    """Raised when a download cannot be completed or fails verification"""
+
+
+class _Segment:
+    """Byte range [start, end] of the file and how much of it is on disk"""
+
+    __slots__ = ("start", "end", "done")
+
+    def __init__(self, start: int, end: int, done: int = 0):
+        self.start = start
+        self.end = end
+        self.done = done
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start + 1
+
+    @property
+    def complete(self) -> bool:
+        return self.done >= self.size
+
+
+def _split(total: int, count: int) -> List[_Segment]:
+    """Split [0, total) into `count` contiguous segments"""
+    size = -(-total // count)
+    return [_Segment(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+
+class RangedDownload:
+    """One file fetched as concurrent byte ranges"""
+
+    def __init__(
+        self,
+        url: str,
+        path: str,
+        segments: int = None,
+        min_segment_size: int = None,
+        chunk_size: int = None,
+        progress: Callable[[int, Optional[int]], None] = None,
+        timeout=None
+    ):
+        """Initialize download"""
+        self.url = url
+        self.path = path
+        self.segment_count = segments or config.DOWNLOAD_SEGMENTS
+        self.min_segment_size = min_segment_size or config.DOWNLOAD_MIN_SEGMENT
+        self.chunk_size = chunk_size or config.DOWNLOAD_CHUNK_SIZE
+        self.progress = progress
+        self.timeout = timeout
+        self.host = urlsplit(url).hostname or "unknown"
+        self.total: Optional[int] = None
+        self.validator: Optional[str] = None
+        self.segments: List[_Segment] = []
+        self._state_saved = 0.0
+
+    @property
+    def state_path(self) -> str:
+        return self.path + STATE_SUFFIX
+
+    @property
+    def downloaded(self) -> int:
+        return sum(segment.done for segment in self.segments)
+
+    async def _probe(self) -> Tuple[bool, Optional[int]]:
+        """Ask for the first byte to learn the length and whether ranges work"""
+        session = await http_client.session()
+        headers = {"Range": "bytes=0-0", "Accept-Encoding": "identity"}
+        start = time.perf_counter()
+        status = "error"
+        try:
+            async with session.get(self.url, headers=headers, timeout=self.timeout) as resp:
+                status = str(resp.status)
+                if resp.status != 206:
+                    return False, resp.content_length if resp.status == 200 else None
+                match = CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+                if not match or match.group(3) == "*":
+                    return False, None
+                self.validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+                return True, int(match.group(3))
+        finally:
+            HTTP_REQUESTS.inc(host=self.host, status=status)
+            HTTP_LATENCY.observe(time.perf_counter() - start, host=self.host)
+
+    def _load_state(self) -> bool:
+        """Resume segments from a previous interrupted run of the same file"""
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("url") != self.url or state.get("total") != self.total:
+            return False
+        if state.get("validator") != self.validator or not os.path.exists(self.path):
+            return False
+        self.segments = [_Segment(*segment) for segment in state["segments"]]
+        return True
+
+    def _save_state(self, force: bool = False):
+        """Persist segment progress, at most every STATE_INTERVAL seconds"""
+        now = time.monotonic()
+        if not force and now - self._state_saved < STATE_INTERVAL:
+            return
+        self._state_saved = now
+        state = {
+            "url": self.url,
+            "total": self.total,
+            "validator": self.validator,
+            "segments": [[segment.start, segment.end, segment.done] for segment in self.segments]
+        }
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _preallocate(self):
+        """Create the target file at its final size"""
+        with open(self.path, "wb") as f:
+            if hasattr(os, "posix_fallocate"):
+                try:
+                    os.posix_fallocate(f.fileno(), 0, self.total)
+                    return
+                except OSError:
+                    pass
+            f.truncate(self.total)
+
+    async def _fetch_segment(self, segment: _Segment, fd: int):
+        """Download the rest of one segment, retrying from where it stopped"""
+        session = await http_client.session()
+        for attempt in range(SEGMENT_RETRIES):
+            if segment.complete:
+                return
+            headers = {
+                "Range": f"bytes={segment.start + segment.done}-{segment.end}",
+                "Accept-Encoding": "identity"
+            }
+            if self.validator:
+                # Full body instead of a range if the file changed underneath us
+                headers["If-Range"] = self.validator
+
+            start = time.perf_counter()
+            status = "error"
+            try:
+                async with session.get(self.url, headers=headers, timeout=self.timeout) as resp:
+                    status = str(resp.status)
+                    if resp.status != 206:
+                        raise TransferError(f"Range request answered with HTTP {resp.status}")
+                    match = CONTENT_RANGE.match(resp.headers.get("Content-Range", ""))
+                    if not match or int(match.group(1)) != segment.start + segment.done:
+                        raise TransferError("Server returned a different range than requested")
+                    async for chunk in resp.content.iter_chunked(self.chunk_size):
+                        remaining = segment.size - segment.done
+                        chunk = chunk[:remaining]
+                        await asyncio.to_thread(os.pwrite, fd, chunk, segment.start + segment.done)
+                        segment.done += len(chunk)
+                        if self.progress:
+                            self.progress(self.downloaded, self.total)
+                        self._save_state()
+                        if segment.complete:
+                            break
+                if segment.complete:
+                    return
+                raise TransferError(f"Segment {segment.start}-{segment.end} ended early")
+            except TransferError:
+                if attempt == SEGMENT_RETRIES - 1:
+                    raise
+            except Exception as e:
+                if attempt == SEGMENT_RETRIES - 1:
+                    raise TransferError(f"Segment {segment.start}-{segment.end} failed: {e}") from e
+            finally:
+                HTTP_REQUESTS.inc(host=self.host, status=status)
+                HTTP_LATENCY.observe(time.perf_counter() - start, host=self.host)
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+    async def _single_stream(self) -> int:
+        """Plain download for servers without range support"""
+        written = await http_client.download(
+            self.url, self.path, progress=self.progress, chunk_size=self.chunk_size, timeout=self.timeout
+        )
+        self.total = written if self.total is None else self.total
+        return written
+
+    async def run(self) -> int:
+        """Download the file, returns its size"""
+        ranged, self.total = await self._probe()
+        if not ranged or self.total < 2 * self.min_segment_size:
+            # State from an earlier ranged attempt no longer describes the file
+            if os.path.exists(self.state_path):
+                os.remove(self.state_path)
+            return await self._single_stream()
+
+        if self._load_state():
+            bot_logger.info(f"Resuming {self.path} at {self.downloaded}/{self.total} bytes")
+        else:
+            count = max(1, min(self.segment_count, self.total // self.min_segment_size))
+            self.segments = _split(self.total, count)
+            self._preallocate()
+            self._save_state(force=True)
+
+        fd = os.open(self.path, os.O_WRONLY)
+        try:
+            tasks = [
+                asyncio.ensure_future(self._fetch_segment(segment, fd))
+                for segment in self.segments if not segment.complete
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+            finally:
+                self._save_state(force=True)
+        finally:
+            os.close(fd)
+
+        # Every byte must be accounted for before the file is used
+        if self.downloaded != self.total or os.path.getsize(self.path) != self.total:
+            raise TransferError(
+                f"Size mismatch: got {self.downloaded} bytes, expected {self.total}"
+            )
+        os.remove(self.state_path)
+        return self.total
+
+
+async def download(url: str, path: str, progress: Callable[[int, Optional[int]], None] = None, **kwargs) -> int:
+    """Download `url` to `path`, in parallel ranges when the server allows it"""
+    return await RangedDownload(url, path, progress=progress, **kwargs).run()
+
+
+def resumable(path: str) -> bool:
+    """Whether a failed download left resume state for another attempt"""
+    return os.path.exists(path + STATE_SUFFIX)
+
+
+def discard(path: str):
+    """Remove a partial download and its resume state"""
+    for leftover in (path, path + STATE_SUFFIX):
+        if os.path.exists(leftover):
+            os.remove(leftover)
@@ -0,0 +1,95 @@
+"""
+Translation Module
+Async translation service: worker threads, a content-hash cache and coalescing of identical requests
+"""
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from config import config
+from core.cache import TTLCache
+from core.lazy import lazy_import, is_available
+from core.metrics import metrics
+
+deep_translator = lazy_import("deep_translator")
+
+TRANSLATE_LATENCY = metrics.histogram(
+    "bot_translate_seconds", "Upstream translation latency", ["outcome"]
+)
+
+
+class TranslationError(Exception):
+    """Raised when the upstream translator fails or times out"""
+
+
+def _translate(target: str, text: str) -> str:
+    """Blocking provider call, runs in a worker thread"""
+    return deep_translator.GoogleTranslator(source="auto", target=target).translate(text)
+
+
+class TranslationService:
+    """Translates text off the event loop, caching results by content hash"""
+
+    def __init__(self):
+        """Initialize translation service"""
+        self.available = is_available("deep_translator")
+        self.timeout = config.TRANSLATE_TIMEOUT
+        self.cache = TTLCache("translate", ttl=config.TRANSLATE_CACHE_TTL, maxsize=2048)
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @staticmethod
+    def cache_key(text: str, target: str) -> str:
+        """Content hash of a text and its target language"""
+        return hashlib.sha256(f"{target}\0{text}".encode("utf-8")).hexdigest()
+
+    def _ensure_executor(self) -> ThreadPoolExecutor:
+        """Dedicated threads, so a slow provider cannot starve asyncio.to_thread users"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=config.TRANSLATE_WORKERS, thread_name_prefix="translate"
+            )
+        return self._executor
+
+    async def translate(self, text: str, target: str = "en") -> str:
+        """Translate text; identical concurrent requests share one upstream call"""
+        if not self.available:
+            raise TranslationError("deep-translator is not installed")
+        return await self.cache.get_or_fetch(
+            self.cache_key(text, target), lambda: self._fetch(text, target)
+        )
+
+    async def _fetch(self, text: str, target: str) -> str:
+        """
+        Translate one text upstream with its own deadline.
+
+        The provider has no batch endpoint, so distinct texts run in parallel
+        on the worker threads instead of being batched.
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            result = await asyncio.wait_for(
+                loop.run_in_executor(self._ensure_executor(), _translate, target, text),
+                self.timeout
+            )
+            return result or ""
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            raise TranslationError(f"Translation timed out after {self.timeout:g}s")
+        except Exception as e:
+            outcome = "error"
+            raise TranslationError(str(e) or type(e).__name__) from e
+        finally:
+            TRANSLATE_LATENCY.observe(time.perf_counter() - start, outcome=outcome)
+
+    def shutdown(self):
+        """Stop the worker threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Create translation service instance
+translator = TranslationService()
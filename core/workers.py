@@ -0,0 +1,105 @@
+"""
+Workers Module
+Process pools whose stuck or abandoned calls are stopped without touching other calls
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, List, Set
+from core.logger import bot_logger
+
+
+class WorkerTimeout(Exception):
+    """Raised when a call runs past its deadline; its worker has been killed"""
+
+
+class WorkerCrashed(Exception):
+    """Raised when the worker running a call died, e.g. from a memory limit"""
+
+
+class WorkerPool:
+    """
+    Up to `size` worker processes, each running one call at a time.
+
+    Every worker is a single-process executor, so a call that times out or is
+    cancelled is stopped by killing its own process while other calls carry
+    on. The deadline starts once the call has a worker, not while it waits.
+    """
+
+    def __init__(self, name: str, size: int, initializer: Callable = None, initargs: tuple = ()):
+        """Initialize pool, workers are started on first use"""
+        self.name = name
+        self.size = size
+        self.initializer = initializer
+        self.initargs = initargs
+        self._idle: List[ProcessPoolExecutor] = []
+        self._busy: Set[ProcessPoolExecutor] = set()
+        self._slots = asyncio.Semaphore(size)
+
+    def _spawn(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=1, initializer=self.initializer, initargs=self.initargs)
+
+    @staticmethod
+    def _kill(worker: ProcessPoolExecutor):
+        """Terminate a worker's process, including one stuck in C code"""
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list((getattr(worker, "_processes", None) or {}).values()):
+            process.terminate()
+        worker.shutdown(wait=False, cancel_futures=True)
+
+    async def start(self) -> float:
+        """Spawn every worker now so the first call does not pay for it, returns seconds taken"""
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        workers = [self._spawn() for _ in range(self.size - len(self._idle) - len(self._busy))]
+        await asyncio.gather(*(loop.run_in_executor(worker, os.getpid) for worker in workers))
+        self._idle.extend(workers)
+        return time.perf_counter() - start
+
+    async def run(self, func: Callable, *args, timeout: float = None):
+        """Run `func(*args)` in a free worker, killing that worker if it overruns `timeout` or the caller gives up"""
+        async with self._slots:
+            worker = self._idle.pop() if self._idle else self._spawn()
+            self._busy.add(worker)
+            healthy = False
+            try:
+                future = asyncio.get_running_loop().run_in_executor(worker, func, *args)
+                try:
+                    done, _ = await asyncio.wait({future}, timeout=timeout)
+                except asyncio.CancelledError:
+                    # Otherwise the worker keeps running for nobody
+                    future.cancel()
+                    bot_logger.debug(f"{self.name} worker killed, its caller was cancelled")
+                    raise
+                if not done:
+                    future.cancel()
+                    bot_logger.warning(f"{self.name} worker killed after {timeout:g}s")
+                    raise WorkerTimeout(f"{self.name} call took longer than {timeout:g}s")
+                try:
+                    result = future.result()
+                except BrokenProcessPool:
+                    bot_logger.warning(f"{self.name} worker died, a new one will be started")
+                    raise WorkerCrashed(f"{self.name} worker died") from None
+                except Exception:
+                    # The call failed, the worker is fine
+                    healthy = True
+                    raise
+                healthy = True
+                return result
+            finally:
+                # Not busy any more means shutdown() already killed it
+                if worker in self._busy:
+                    self._busy.discard(worker)
+                    if healthy:
+                        self._idle.append(worker)
+                    else:
+                        self._kill(worker)
+
+    def shutdown(self):
+        """Stop every worker, including busy ones"""
+        for worker in self._idle + list(self._busy):
+            self._kill(worker)
+        self._idle.clear()
+        self._busy.clear()
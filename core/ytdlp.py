@@ -0,0 +1,158 @@
+"""
+yt-dlp Module
+Local download backend running yt-dlp in a process pool, with a metadata cache
+"""
+import asyncio
+import os
+import signal
+from typing import Any, Dict, Optional
+from config import config
+from core.cache import TTLCache
+from core.downloads import DownloadJob, DownloadError
+from core.lazy import is_available
+from core.media_cache import youtube_id
+from core.workers import WorkerPool, WorkerCrashed, WorkerTimeout
+
+# Smallest useful audio: no re-encoding, so no ffmpeg needed
+AUDIO_FORMAT = "bestaudio[ext=m4a]/bestaudio[ext=webm]/bestaudio/best"
+
+# Extracted stream URLs expire after a few hours
+METADATA_TTL = 1800
+
+# How often the parent checks the size of the file being written
+PROGRESS_INTERVAL = 1.0
+
+
+# ==================== WORKER SIDE ====================
+
+def _init_worker():
+    """Import yt-dlp once per worker"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    import yt_dlp  # noqa: F401
+
+
+def _options(**extra) -> Dict[str, Any]:
+    """Common yt-dlp options"""
+    return {
+        "quiet": True,
+        "no_warnings": True,
+        "noprogress": True,
+        "noplaylist": True,
+        "cachedir": False,
+        "socket_timeout": 30,
+        **extra
+    }
+
+
+def _extract(url: str, fmt: str) -> Dict[str, Any]:
+    """Resolve metadata and the selected format without downloading"""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(_options(format=fmt)) as ydl:
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+
+def _download(info: Dict[str, Any], fmt: str, outtmpl: str) -> str:
+    """Download an already extracted video, returns the file path"""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL(_options(format=fmt, outtmpl=outtmpl)) as ydl:
+        result = ydl.process_ie_result(dict(info), download=True)
+        downloads = result.get("requested_downloads") or []
+        if downloads and downloads[0].get("filepath"):
+            return downloads[0]["filepath"]
+        return ydl.prepare_filename(result)
+
+
+# ==================== BACKEND ====================
+
+class LocalBackend:
+    """Downloads with yt-dlp in worker processes, same interface as RemoteBackend"""
+
+    name = "local"
+
+    def __init__(self, workers: int = None, fmt: str = AUDIO_FORMAT):
+        """Initialize backend"""
+        if not is_available("yt_dlp"):
+            raise RuntimeError("yt-dlp is not installed")
+        self.workers = workers or config.YT_WORKERS
+        self.format = fmt
+        self.metadata = TTLCache("ytdlp_metadata", ttl=METADATA_TTL, maxsize=256)
+        # One process per call, so a stuck download can be killed on its own
+        self._workers = WorkerPool("yt-dlp", self.workers, initializer=_init_worker)
+
+    async def _call(self, func, *args):
+        """Run a worker function, stopping it after DOWNLOAD_TIMEOUT or when the job is cancelled"""
+        try:
+            return await self._workers.run(func, *args, timeout=config.DOWNLOAD_TIMEOUT)
+        except WorkerTimeout:
+            raise DownloadError(f"yt-dlp took longer than {config.DOWNLOAD_TIMEOUT:g}s")
+        except WorkerCrashed:
+            raise DownloadError("yt-dlp worker crashed")
+
+    async def metadata_for(self, url: str) -> Dict[str, Any]:
+        """Extracted metadata, shared between concurrent and repeated requests"""
+        key = youtube_id(url) or url
+        try:
+            return await self.metadata.get_or_fetch(key, lambda: self._call(_extract, url, self.format))
+        except DownloadError:
+            raise
+        except Exception as e:
+            raise DownloadError(f"Could not extract video info: {e}") from e
+
+    async def _watch(self, job: DownloadJob, directory: str, total: Optional[int]):
+        """Report the size of the file the worker is writing"""
+        prefix = f"{job.id}."
+        while True:
+            await asyncio.sleep(PROGRESS_INTERVAL)
+            try:
+                sizes = [entry.stat().st_size for entry in os.scandir(directory) if entry.name.startswith(prefix)]
+            except OSError:
+                continue
+            if sizes:
+                job.set_progress(max(sizes), total)
+
+    async def fetch(self, job: DownloadJob, directory: str) -> str:
+        """Download the audio of `job.url` into `directory`, returns the local path"""
+        info = await self.metadata_for(job.url)
+        job.title = info.get("track") or info.get("title")
+        job.performer = info.get("artist") or info.get("uploader") or info.get("channel")
+        job.duration = info.get("duration")
+        job.thumbnail = info.get("thumbnail")
+        requested = (info.get("requested_formats") or [info])[0]
+        total = requested.get("filesize") or requested.get("filesize_approx")
+
+        outtmpl = os.path.join(directory, f"{job.id}.%(ext)s")
+        watcher = asyncio.create_task(self._watch(job, directory, total))
+        path = None
+        try:
+            path = await self._call(_download, info, self.format, outtmpl)
+        except DownloadError:
+            raise
+        except Exception as e:
+            # A stale stream URL is the usual cause, extract again next time
+            self.metadata.invalidate(youtube_id(job.url) or job.url)
+            raise DownloadError(str(e)) from e
+        finally:
+            watcher.cancel()
+            if path is None:
+                self._remove_partials(job, directory)
+
+        size = os.path.getsize(path)
+        job.set_progress(size, size)
+        return path
+
+    @staticmethod
+    def _remove_partials(job: DownloadJob, directory: str):
+        """Delete whatever a failed download left behind"""
+        prefix = f"{job.id}."
+        for entry in os.scandir(directory):
+            if entry.name.startswith(prefix):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        """Stop the worker pool"""
+        self._workers.shutdown()
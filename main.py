@@ -40,7 +40,7 @@ def main():
         sys.exit(1)
     
     # Create necessary directories
-    os.makedirs("logs", exist_ok=True)
+    os.makedirs(config.LOG_DIR, exist_ok=True)
     os.makedirs("sessions", exist_ok=True)
     os.makedirs("downloads", exist_ok=True)
     
@@ -13,6 +13,7 @@ from typing import Optional, Dict
 from config import config
 from utils.decorators import log_errors, admin_only, group_only
 from core.logger import bot_logger
+from core.state import state_registry
 
 # Try to import extract_args, provide fallback if it fails
 try:
@@ -29,6 +30,9 @@ except:
 user_warnings: Dict[int, Dict[int, int]] = {}  # {chat_id: {user_id: warning_count}}
 MAX_WARNINGS = 3
 
+# Keep warnings across graceful restarts
+state_registry.register("admin.warnings", lambda: user_warnings, user_warnings.update)
+
 
 def safe_extract_args(message: Message) -> str:
     """Safely extract arguments from message"""
@@ -10,6 +10,7 @@ from config import config
 from utils.decorators import log_errors
 from utils.helpers import get_readable_time, get_system_stats, get_uptime
 from core.database import db
+from core.accounting import api_accounting
 
 # Bot start time
 START_TIME = time.time()
@@ -69,6 +70,11 @@ async def stats_command(client: Client, message: Message):
         users = await db.get_all_users()
         users_count = len(users)
     
+    api_totals = api_accounting.totals()
+    top_methods = ", ".join(
+        f"{name} ({stats['calls']})" for name, stats in api_accounting.top_methods(limit=3)
+    ) or "None"
+    
     stats_text = (
         f"📊 **Bot Statistics**\n\n"
         f"**Bot Info:**\n"
@@ -83,6 +89,11 @@ async def stats_command(client: Client, message: Message):
         f"**Database:**\n"
         f"• Status: {'✅ Connected' if db.connected else '❌ Disconnected'}\n"
         f"• Users: `{users_count}`\n\n"
+        f"**Telegram API:**\n"
+        f"• Calls: `{api_totals['calls']}` ({api_totals['rpcs']} RPCs)\n"
+        f"• Errors: `{api_totals['errors']}`\n"
+        f"• FloodWait: `{api_totals['flood_wait_s']}s`\n"
+        f"• Top: {top_methods}\n\n"
         f"**Configuration:**\n"
         f"• Plugins: {'✅ Enabled' if config.ENABLE_PLUGINS else '❌ Disabled'}\n"
         f"• Database: {'✅ Enabled' if config.ENABLE_DATABASE else '❌ Disabled'}\n"
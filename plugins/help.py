@@ -28,6 +28,8 @@ HELP_TEXT = f"""
 • `{config.COMMAND_PREFIX}download <url>` - Download media from URL
 • `{config.COMMAND_PREFIX}yt <url>` - Download YouTube video
 • `{config.COMMAND_PREFIX}ytaudio <url>` - Download YouTube audio
+• `/yta <url>` - Queue a YouTube audio download
+• `/yqueue` - Show the download queue and your downloads
 
 **👥 Group Admin Commands** (Requires Admin)
 • `{config.COMMAND_PREFIX}ban <reply/username>` - Ban a user
@@ -41,10 +43,17 @@ HELP_TEXT = f"""
 • `{config.COMMAND_PREFIX}unpin <reply>` - Unpin a message
 
 **👤 Owner Commands** (Owner Only)
-• `{config.COMMAND_PREFIX}restart` - Restart the bot
+• `{config.COMMAND_PREFIX}restart [now]` - Restart the bot (graceful unless `now`)
+• `{config.COMMAND_PREFIX}reload <plugin>` - Reload a plugin without restarting
 • `{config.COMMAND_PREFIX}broadcast <message>` - Broadcast to all users
+• `{config.COMMAND_PREFIX}bcast [status|pause|resume|cancel]` - Control broadcasts
+• `{config.COMMAND_PREFIX}reach` - Reachable vs unreachable users
 • `{config.COMMAND_PREFIX}shell <command>` - Execute shell command
-• `{config.COMMAND_PREFIX}logs` - Get bot logs
+• `{config.COMMAND_PREFIX}logs [lines] [errors] [level=] [grep=] [since=] [until=]` - Search bot logs
+• `{config.COMMAND_PREFIX}perf [window]` - Show slowest commands
+• `{config.COMMAND_PREFIX}disk [clean]` - Downloads disk usage and cache eviction
+• `{config.COMMAND_PREFIX}apistats` - Export Telegram API usage
+• `{config.COMMAND_PREFIX}profile [seconds] [all|cpu|mem]` - Profile the running bot
 
 **ℹ️ Info**
 • **Bot Version:** {config.BOT_VERSION}
@@ -2,16 +2,29 @@
 Owner Commands Plugin
 Commands restricted to bot owner only
 """
-import os
-import sys
+import io
+import codecs
+import re
+import time
+import shlex
 import asyncio
+from datetime import datetime
+from typing import Optional
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from config import config
 from utils.decorators import log_errors, owner_only
-from utils.helpers import extract_args
+from utils.helpers import extract_args, parse_duration, get_readable_time, get_readable_bytes
+from core.client import bot
 from core.database import db
+from core.broadcast import broadcaster
+from core.lifecycle import lifecycle
 from core.logger import bot_logger
+from core.perf import perf_tracker, MAX_WINDOW
+from core.accounting import api_accounting
+from core import profiler, logsearch
+from core.reloader import reload_plugin, ReloadError
+from core.storage import storage
 
 
 @Client.on_message(filters.command("restart", prefixes=config.COMMAND_PREFIX))
@@ -19,17 +32,90 @@ from core.logger import bot_logger
 @log_errors
 async def restart_bot(client: Client, message: Message):
     """Restart the bot"""
-    await message.reply_text("🔄 **Restarting bot...**")
+    graceful = extract_args(message).strip().lower() != "now"
     
-    bot_logger.info("Bot restart requested by owner")
+    status_msg = await message.reply_text(
+        "🔄 **Restarting bot...**" if graceful else "🔄 **Restarting bot immediately...**"
+    )
+    
+    bot_logger.info(f"Bot restart requested by owner ({'graceful' if graceful else 'immediate'})")
+    
+    # Run outside this handler so draining does not wait for it; a task lifecycle
+    # tracks is also kept referenced until it finishes
+    lifecycle.create_task(
+        bot.graceful_restart(status_msg.chat.id, status_msg.id, graceful=graceful), name="restart"
+    )
+
+
+@Client.on_message(filters.command("reload", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def reload_plugin_command(client: Client, message: Message):
+    """Reload a single plugin without restarting the bot"""
+    name = extract_args(message).strip()
+    
+    if not name:
+        await message.reply_text(
+            f"❌ **Usage:** `{config.COMMAND_PREFIX}reload <plugin>`\n\n"
+            f"**Example:** `{config.COMMAND_PREFIX}reload admin`"
+        )
+        return
     
-    # Save restart message info
-    if db.connected:
-        await db.set_data("bot_state", "restart_chat", message.chat.id)
-        await db.set_data("bot_state", "restart_message", message.id)
+    try:
+        result = reload_plugin(client, name)
+    except ReloadError as e:
+        await message.reply_text(
+            f"❌ **Reload failed, old handlers kept**\n\n```\n{str(e)[:3000]}\n```"
+        )
+        return
     
-    # Restart
-    os.execv(sys.executable, ['python'] + sys.argv)
+    await message.reply_text(
+        f"♻️ **Reloaded** `{result['module']}`\n\n"
+        f"**Handlers:** {result['removed']} → {result['added']}\n"
+        f"**State carried over:** {result['state']}\n"
+        f"**Time:** {result['seconds'] * 1000:.0f}ms"
+    )
+
+
+# Shell output limits
+SHELL_EDIT_INTERVAL = 2
+SHELL_TAIL_CHARS = 3000
+SHELL_MAX_LOG_BYTES = 10 * 1024 * 1024
+
+
+class _ShellOutput:
+    """Bounded tail of recent output plus a size-capped copy of the full log"""
+    
+    def __init__(self):
+        self.tail = ""
+        self.total = 0
+        self.changed = False
+        # Output no longer fits in the tail, only the document has all of it
+        self.tail_truncated = False
+        self.truncated = False
+        self._log = io.BytesIO()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    
+    def feed(self, chunk: bytes):
+        """Add a chunk of raw process output"""
+        room = SHELL_MAX_LOG_BYTES - self._log.tell()
+        if room > 0:
+            self._log.write(chunk[:room])
+        if len(chunk) > room:
+            self.truncated = True
+        
+        text = self._decoder.decode(chunk)
+        self.total += len(text)
+        if len(self.tail) + len(text) > SHELL_TAIL_CHARS:
+            self.tail_truncated = True
+        self.tail = (self.tail + text)[-SHELL_TAIL_CHARS:]
+        self.changed = True
+    
+    def document(self) -> io.BytesIO:
+        """Full log as an uploadable in-memory file"""
+        document = io.BytesIO(self._log.getvalue())
+        document.name = "shell_output.txt"
+        return document
 
 
 @Client.on_message(filters.command("shell", prefixes=config.COMMAND_PREFIX))
@@ -48,35 +134,77 @@ async def shell_command(client: Client, message: Message):
     
     status_msg = await message.reply_text(f"🖥️ **Executing:**\n`{command}`")
     
+    output = _ShellOutput()
+    
+    def render(state: str) -> str:
+        tail = output.tail.strip()
+        if output.tail_truncated:
+            header = f"**Output** (last {len(output.tail)} of {output.total} chars):"
+        else:
+            header = "**Output:**"
+        body = f"{header}\n```\n{tail}\n```" if tail else "✅ Command executed (no output)"
+        return (
+            f"🖥️ **Shell Command**\n\n"
+            f"**Command:** `{command}`\n"
+            f"**Status:** `{state}`\n\n"
+            f"{body}"
+        )
+    
+    async def refresh():
+        # Coalesce output into one edit per interval
+        while True:
+            await asyncio.sleep(SHELL_EDIT_INTERVAL)
+            if output.changed:
+                output.changed = False
+                try:
+                    await status_msg.edit_text(render("running"))
+                except Exception:
+                    pass
+    
+    refresher = None
     try:
         process = await asyncio.create_subprocess_shell(
             command,
             stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE
+            stderr=asyncio.subprocess.STDOUT
         )
         
-        stdout, stderr = await process.communicate()
+        refresher = asyncio.create_task(refresh())
+        while True:
+            chunk = await process.stdout.read(4096)
+            if not chunk:
+                break
+            output.feed(chunk)
         
-        output = stdout.decode('utf-8') if stdout else ""
-        error = stderr.decode('utf-8') if stderr else ""
+        await process.wait()
+        refresher.cancel()
         
-        result = f"**Output:**\n```\n{output[:3000]}\n```" if output else ""
+        await status_msg.edit_text(render(f"exited {process.returncode}"))
         
-        if error:
-            result += f"\n\n**Error:**\n```\n{error[:1000]}\n```"
-        
-        if not output and not error:
-            result = "✅ Command executed (no output)"
-        
-        await status_msg.edit_text(
-            f"🖥️ **Shell Command**\n\n"
-            f"**Command:** `{command}`\n"
-            f"**Return Code:** `{process.returncode}`\n\n"
-            f"{result}"
-        )
+        # Upload the full log when the message could only show its tail
+        if output.tail_truncated:
+            document = output.document()
+            caption = "📄 **Full output**"
+            if output.truncated:
+                caption += f" (first {get_readable_bytes(SHELL_MAX_LOG_BYTES)})"
+            await message.reply_document(document, caption=caption)
         
     except Exception as e:
         await status_msg.edit_text(f"❌ **Error:** {str(e)}")
+    finally:
+        if refresher:
+            refresher.cancel()
+
+
+def _parse_log_time(value: str) -> Optional[float]:
+    """Parse a relative duration ('2h' ago) or an ISO date/time"""
+    seconds = parse_duration(value)
+    if seconds > 0:
+        return time.time() - seconds
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
 
 
 @Client.on_message(filters.command("logs", prefixes=config.COMMAND_PREFIX))
@@ -84,49 +212,72 @@ async def shell_command(client: Client, message: Message):
 @log_errors
 async def get_logs(client: Client, message: Message):
     """Get bot logs"""
-    args = extract_args(message)
+    try:
+        args = shlex.split(extract_args(message))
+    except ValueError:
+        args = extract_args(message).split()
+    
     lines = 50
+    prefix = "bot_"
+    options = {}
     
-    try:
-        if args and args.isdigit():
-            lines = int(args)
-            lines = min(lines, 200)  # Max 200 lines
-    except:
-        pass
+    for arg in args:
+        if arg.isdigit():
+            lines = min(int(arg), 200)  # Max 200 entries
+        elif arg.lower() == "errors":
+            prefix = "errors_"
+        elif "=" in arg:
+            key, value = arg.split("=", 1)
+            options[key.lower()] = value
     
-    try:
-        # Get latest log file
-        log_dir = "logs"
-        if not os.path.exists(log_dir):
-            await message.reply_text("❌ No logs found")
+    min_level = 0
+    if "level" in options:
+        min_level = logsearch.LEVELS.get(options["level"].upper(), 0)
+        if not min_level:
+            await message.reply_text(f"❌ Unknown level. Use one of: {', '.join(logsearch.LEVELS)}")
             return
-        
-        log_files = [f for f in os.listdir(log_dir) if f.endswith('.log')]
-        if not log_files:
-            await message.reply_text("❌ No log files found")
-            return
-        
-        latest_log = max([os.path.join(log_dir, f) for f in log_files], key=os.path.getctime)
-        
-        # Read last N lines
-        with open(latest_log, 'r', encoding='utf-8', errors='ignore') as f:
-            log_lines = f.readlines()
-            last_lines = log_lines[-lines:]
-            log_text = ''.join(last_lines)
-        
-        # Send as file if too long
-        if len(log_text) > 4000:
-            await message.reply_document(
-                latest_log,
-                caption=f"📄 **Bot Logs** (Last {lines} lines)"
-            )
-        else:
-            await message.reply_text(
-                f"📋 **Bot Logs** (Last {lines} lines)\n\n"
-                f"```\n{log_text}\n```"
-            )
-    except Exception as e:
-        await message.reply_text(f"❌ **Error:** {str(e)}")
+    
+    since = _parse_log_time(options["since"]) if "since" in options else None
+    until = _parse_log_time(options["until"]) if "until" in options else None
+    if ("since" in options and since is None) or ("until" in options and until is None):
+        await message.reply_text(
+            f"❌ **Usage:** `{config.COMMAND_PREFIX}logs [lines] [errors] [level=WARNING] "
+            f"[grep=pattern] [since=2h] [until=2024-01-01T12:00]`"
+        )
+        return
+    
+    try:
+        entries = await asyncio.to_thread(
+            logsearch.search,
+            config.LOG_DIR,
+            prefix,
+            limit=lines,
+            min_level=min_level,
+            pattern=options.get("grep"),
+            since=since,
+            until=until
+        )
+    except re.error as e:
+        await message.reply_text(f"❌ **Invalid pattern:** {str(e)}")
+        return
+    
+    if not entries:
+        await message.reply_text("❌ No matching log entries found")
+        return
+    
+    log_text = "\n".join(entries)
+    title = f"{'Error' if prefix == 'errors_' else 'Bot'} Logs (Last {len(entries)} entries)"
+    
+    # Send as file if too long
+    if len(log_text) > 4000:
+        document = io.BytesIO(log_text.encode("utf-8"))
+        document.name = f"{prefix}tail.log"
+        await message.reply_document(document, caption=f"📄 **{title}**")
+    else:
+        await message.reply_text(
+            f"📋 **{title}**\n\n"
+            f"```\n{log_text}\n```"
+        )
 
 
 @Client.on_message(filters.command("broadcast", prefixes=config.COMMAND_PREFIX))
@@ -147,51 +298,92 @@ async def broadcast_message(client: Client, message: Message):
         )
         return
     
-    # Get message to broadcast
+    if not await db.get_users_after(limit=1):
+        await message.reply_text("❌ No users found in database")
+        return
+    
+    status_msg = await message.reply_text("📢 **Starting broadcast...**")
+    
+    # Forward the replied message, otherwise send the text
     if message.reply_to_message:
-        msg_to_forward = message.reply_to_message
+        job = await broadcaster.create(
+            client,
+            status_msg,
+            source_chat=message.chat.id,
+            source_message=message.reply_to_message.id
+        )
     else:
-        msg_to_forward = None
+        job = await broadcaster.create(client, status_msg, text=broadcast_msg)
+    
+    await status_msg.edit_text(
+        f"{job.progress_text()}\n\n"
+        f"Control with `{config.COMMAND_PREFIX}bcast pause|resume|cancel {job.id}`"
+    )
+
+
+@Client.on_message(filters.command("bcast", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def broadcast_control(client: Client, message: Message):
+    """Show, pause, resume or cancel broadcast jobs"""
+    args = extract_args(message).split()
+    action = args[0].lower() if args else "status"
+    job_id = args[1] if len(args) > 1 else None
     
-    # Get all users
-    users = await db.get_all_users()
+    if action not in ("status", "pause", "resume", "cancel"):
+        await message.reply_text(
+            f"❌ **Usage:** `{config.COMMAND_PREFIX}bcast [status|pause|resume|cancel] [job_id]`"
+        )
+        return
     
-    if not users:
-        await message.reply_text("❌ No users found in database")
+    if action == "status" and not job_id:
+        jobs = broadcaster.active()
+        if not jobs:
+            await message.reply_text("📢 No active broadcasts")
+            return
+        await message.reply_text("\n\n".join(job.progress_text() for job in jobs))
         return
     
-    status_msg = await message.reply_text(
-        f"📢 **Broadcasting to {len(users)} users...**"
-    )
+    job = broadcaster.get(job_id)
+    if not job:
+        await message.reply_text("❌ Broadcast job not found")
+        return
     
-    success = 0
-    failed = 0
-    
-    for user in users:
-        try:
-            if msg_to_forward:
-                await msg_to_forward.forward(user['user_id'])
-            else:
-                await client.send_message(user['user_id'], broadcast_msg)
-            success += 1
-        except Exception:
-            failed += 1
-        
-        # Update status every 10 users
-        if (success + failed) % 10 == 0:
-            await status_msg.edit_text(
-                f"📢 **Broadcasting...**\n\n"
-                f"✅ Success: {success}\n"
-                f"❌ Failed: {failed}\n"
-                f"📊 Progress: {success + failed}/{len(users)}"
-            )
+    if action == "pause":
+        await broadcaster.pause(job)
+    elif action == "resume":
+        await broadcaster.resume(job)
+    elif action == "cancel":
+        await broadcaster.cancel(job)
     
-    await status_msg.edit_text(
-        f"📢 **Broadcast Complete**\n\n"
-        f"✅ **Success:** {success}\n"
-        f"❌ **Failed:** {failed}\n"
-        f"📊 **Total:** {len(users)}"
+    await message.reply_text(job.progress_text())
+
+
+@Client.on_message(filters.command("reach", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def reachability_report(client: Client, message: Message):
+    """Report how many users broadcasts can still reach"""
+    if not db.connected:
+        await message.reply_text("❌ Database is not connected")
+        return
+    
+    report = await db.get_reachability()
+    total = report["reachable"] + report["unreachable"]
+    
+    reach_text = (
+        f"📬 **Broadcast Reach**\n\n"
+        f"✅ **Reachable:** {report['reachable']}\n"
+        f"🚫 **Unreachable:** {report['unreachable']}\n"
+        f"📊 **Reach:** {report['reachable'] / total * 100 if total else 0:.1f}%\n"
     )
+    
+    if report["reasons"]:
+        reach_text += "\n**Unreachable by reason:**\n"
+        for reason, count in sorted(report["reasons"].items(), key=lambda item: -item[1]):
+            reach_text += f"• {reason}: {count}\n"
+    
+    await message.reply_text(reach_text)
 
 
 @Client.on_message(filters.command("eval", prefixes=config.COMMAND_PREFIX))
@@ -223,6 +415,41 @@ async def eval_code(client: Client, message: Message):
         )
 
 
+@Client.on_message(filters.command("profile", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def profile_bot(client: Client, message: Message):
+    """Sample CPU and allocations of the running bot"""
+    args = extract_args(message).split()
+    duration = parse_duration(args[0]) if args else 10
+    mode = args[1].lower() if len(args) > 1 else "all"
+    
+    if duration <= 0 or duration > 300 or mode not in ("all", "cpu", "mem"):
+        await message.reply_text(
+            f"❌ **Usage:** `{config.COMMAND_PREFIX}profile [seconds] [all|cpu|mem]`\n\n"
+            f"**Example:** `{config.COMMAND_PREFIX}profile 30s cpu` (max 5 minutes)"
+        )
+        return
+    
+    if profiler.is_running():
+        await message.reply_text("❌ A profiling session is already running")
+        return
+    
+    status_msg = await message.reply_text(f"🔬 **Profiling for {duration}s...**")
+    
+    report = await profiler.profile(
+        duration,
+        cpu=mode in ("all", "cpu"),
+        memory=mode in ("all", "mem")
+    )
+    
+    document = io.BytesIO(report.encode("utf-8"))
+    document.name = f"profile_{int(time.time())}.txt"
+    
+    await message.reply_document(document, caption=f"🔬 **Profile Report** ({duration}s, {mode})")
+    await status_msg.delete()
+
+
 @Client.on_message(filters.command("stats_db", prefixes=config.COMMAND_PREFIX))
 @owner_only
 @log_errors
@@ -232,22 +459,138 @@ async def database_stats(client: Client, message: Message):
         await message.reply_text("❌ Database is not connected")
         return
     
+    exact = extract_args(message).strip().lower() == "exact"
+    
     try:
-        users = await db.get_all_users()
+        collections = await db.get_storage_stats(exact=exact)
+        collections.sort(key=lambda col: col.get("storage_size", 0), reverse=True)
         
-        # Get collection stats
-        collections = await db.db.list_collection_names()
+        users = next((col.get("count", 0) for col in collections if col["name"] == "users"), 0)
+        data_size = sum(col.get("size", 0) for col in collections)
+        storage_size = sum(col.get("storage_size", 0) for col in collections)
+        index_size = sum(col.get("index_size", 0) for col in collections)
         
         stats_text = "📊 **Database Statistics**\n\n"
-        stats_text += f"**Users:** {len(users)}\n"
-        stats_text += f"**Collections:** {len(collections)}\n\n"
+        stats_text += f"**Users:** {users}\n"
+        stats_text += f"**Collections:** {len(collections)}\n"
+        stats_text += f"**Counts:** {'Exact' if exact else 'Estimated'}\n"
+        stats_text += f"**Data Size:** {get_readable_bytes(data_size)}\n"
+        stats_text += f"**Storage Size:** {get_readable_bytes(storage_size)}\n"
+        stats_text += f"**Index Size:** {get_readable_bytes(index_size)}\n\n"
         stats_text += "**Collection Names:**\n"
         
         for col in collections:
-            count = await db.db[col].count_documents({})
-            stats_text += f"• {col}: {count} documents\n"
+            if "error" in col:
+                stats_text += f"• {col['name']}: ❌ {col['error']}\n"
+                continue
+            
+            stats_text += f"• {col['name']}: {col.get('count', 0)} documents"
+            if "storage_size" in col:
+                stats_text += (
+                    f"\n  └ {get_readable_bytes(col['storage_size'])} storage, "
+                    f"{get_readable_bytes(col['index_size'])} in {col['indexes']} indexes, "
+                    f"avg {get_readable_bytes(col['avg_obj_size'])}/doc"
+                )
+            stats_text += "\n"
+        
+        if not exact:
+            stats_text += f"\nUse `{config.COMMAND_PREFIX}stats_db exact` for exact counts"
         
         await message.reply_text(stats_text)
         
     except Exception as e:
         await message.reply_text(f"❌ **Error:** {str(e)}")
+
+
+@Client.on_message(filters.command("disk", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def disk_usage(client: Client, message: Message):
+    """Show downloads directory usage, `clean` evicts down to the quota"""
+    freed = 0
+    if extract_args(message).strip().lower() == "clean":
+        freed = storage.enforce()
+    
+    usage = storage.usage()
+    quota = get_readable_bytes(usage["quota"]) if usage["quota"] else "unlimited"
+    
+    disk_text = (
+        f"💾 **Downloads Directory**\n\n"
+        f"**Used:** {get_readable_bytes(usage['total'])} of {quota}\n"
+        f"**Files:** {usage['files']}\n"
+        f"**In Progress:** {get_readable_bytes(usage['inflight'])}\n"
+        f"**Cached Media:** {get_readable_bytes(usage['cached'])} in {usage['cached_files']} files\n"
+        f"**Untracked:** {get_readable_bytes(usage['other'])}\n"
+    )
+    if freed:
+        disk_text += f"\n🧹 Evicted {get_readable_bytes(freed)}"
+    
+    await message.reply_text(disk_text)
+
+
+@Client.on_message(filters.command("perf", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def performance_stats(client: Client, message: Message):
+    """Show the slowest commands over a sliding window"""
+    args = extract_args(message)
+    window = parse_duration(args.strip()) if args else 300
+    
+    if window <= 0:
+        await message.reply_text(
+            f"❌ **Usage:** `{config.COMMAND_PREFIX}perf [window]`\n\n"
+            f"**Example:** `{config.COMMAND_PREFIX}perf 15m` (max {get_readable_time(MAX_WINDOW)})"
+        )
+        return
+    
+    window = min(window, MAX_WINDOW)
+    slowest = perf_tracker.slowest(window=window, limit=10)
+    
+    if not slowest:
+        await message.reply_text(f"📉 No commands handled in the last {get_readable_time(window)}")
+        return
+    
+    perf_text = f"⏱️ **Slowest Commands** (last {get_readable_time(window)})\n\n"
+    
+    for name, stats in slowest:
+        perf_text += (
+            f"**{name}** — {stats['count']} calls, "
+            f"{stats['error_rate'] * 100:.1f}% errors\n"
+            f"`p50 {stats['p50'] * 1000:.0f}ms | "
+            f"p95 {stats['p95'] * 1000:.0f}ms | "
+            f"p99 {stats['p99'] * 1000:.0f}ms`\n\n"
+        )
+    
+    await message.reply_text(perf_text)
+
+
+@Client.on_message(filters.command("apistats", prefixes=config.COMMAND_PREFIX))
+@owner_only
+@log_errors
+async def api_stats(client: Client, message: Message):
+    """Show Telegram API usage by method and handler"""
+    totals = api_accounting.totals()
+    
+    stats_text = (
+        f"📡 **Telegram API Usage**\n\n"
+        f"**Calls:** `{totals['calls']}` ({totals['rpcs']} RPCs)\n"
+        f"**Errors:** `{totals['errors']}`\n"
+        f"**FloodWait:** `{totals['flood_wait_s']}s`\n\n"
+        f"**Top Methods:**\n"
+    )
+    
+    for name, stats in api_accounting.top_methods(limit=8):
+        stats_text += (
+            f"• `{name}`: {stats['calls']} calls, avg {stats['avg_ms']:.0f}ms, "
+            f"{stats['error_count']} errors\n"
+        )
+    
+    stats_text += "\n**Top Handlers:**\n"
+    for name, calls in api_accounting.top_handlers(limit=5):
+        stats_text += f"• `{name}`: {calls} calls\n"
+    
+    # Full machine-readable export
+    export = io.BytesIO(api_accounting.export_json().encode("utf-8"))
+    export.name = "api_usage.json"
+    
+    await message.reply_document(export, caption=stats_text[:1024])
@@ -2,24 +2,19 @@
 Utility Commands Plugin
 Calculator, weather, translation, and other utility commands
 """
-import re
 from pyrogram import Client, filters
 from pyrogram.types import Message
 from config import config
 from utils.decorators import log_errors, rate_limit
 from utils.helpers import extract_args
+from core.calculator import calculator
+from core.cache import TTLCache
+from core.http import http_client
+from core.translation import translator, TranslationError
+from core import langid
 
-try:
-    import sympy
-    SYMPY_AVAILABLE = True
-except ImportError:
-    SYMPY_AVAILABLE = False
-
-try:
-    from deep_translator import GoogleTranslator
-    TRANSLATOR_AVAILABLE = True
-except ImportError:
-    TRANSLATOR_AVAILABLE = False
+# Weather responses by normalized city name
+weather_cache = TTLCache("weather", ttl=config.WEATHER_CACHE_TTL, maxsize=512)
 
 
 @Client.on_message(filters.command("calc", prefixes=config.COMMAND_PREFIX))
@@ -40,35 +35,18 @@ async def calculate(client: Client, message: Message):
         )
         return
     
-    if not SYMPY_AVAILABLE:
-        # Fallback to eval (limited)
-        try:
-            # Security: Only allow safe characters
-            if re.search(r'[^0-9+\-*/().\s]', expression):
-                await message.reply_text("❌ Only basic arithmetic operations are allowed")
-                return
-            
-            result = eval(expression)
-            await message.reply_text(
-                f"🧮 **Calculator**\n\n"
-                f"**Expression:** `{expression}`\n"
-                f"**Result:** `{result}`"
-            )
-        except Exception as e:
-            await message.reply_text(f"❌ **Error:** {str(e)}")
-    else:
-        # Use sympy for advanced math
-        try:
-            result = sympy.sympify(expression)
-            evaluated = result.evalf()
-            
-            await message.reply_text(
-                f"🧮 **Calculator**\n\n"
-                f"**Expression:** `{expression}`\n"
-                f"**Result:** `{evaluated}`"
-            )
-        except Exception as e:
-            await message.reply_text(f"❌ **Error:** Invalid expression")
+    # Evaluated in a worker process, sympy when installed, basic arithmetic otherwise
+    ok, result = await calculator.evaluate(expression)
+    
+    if not ok:
+        await message.reply_text(f"❌ **Error:** {result}")
+        return
+    
+    await message.reply_text(
+        f"🧮 **Calculator**\n\n"
+        f"**Expression:** `{expression}`\n"
+        f"**Result:** `{result}`"
+    )
 
 
 @Client.on_message(filters.command("weather", prefixes=config.COMMAND_PREFIX))
@@ -93,38 +71,39 @@ async def weather(client: Client, message: Message):
         return
     
     try:
-        import aiohttp
-        
-        url = f"http://api.openweathermap.org/data/2.5/weather"
+        url = "http://api.openweathermap.org/data/2.5/weather"
         params = {
             "q": city,
             "appid": config.WEATHER_API_KEY,
             "units": "metric"
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url, params=params) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    
-                    weather_text = (
-                        f"🌤️ **Weather in {data['name']}, {data['sys']['country']}**\n\n"
-                        f"🌡️ **Temperature:** {data['main']['temp']}°C\n"
-                        f"🤔 **Feels Like:** {data['main']['feels_like']}°C\n"
-                        f"📊 **Condition:** {data['weather'][0]['description'].title()}\n"
-                        f"💧 **Humidity:** {data['main']['humidity']}%\n"
-                        f"💨 **Wind Speed:** {data['wind']['speed']} m/s\n"
-                        f"☁️ **Cloudiness:** {data['clouds']['all']}%\n"
-                        f"🔽 **Min Temp:** {data['main']['temp_min']}°C\n"
-                        f"🔼 **Max Temp:** {data['main']['temp_max']}°C"
-                    )
-                    
-                    await message.reply_text(weather_text)
-                elif resp.status == 404:
-                    await message.reply_text(f"❌ City '{city}' not found")
-                else:
-                    await message.reply_text("❌ Failed to fetch weather data")
-                    
+        # Concurrent requests for the same city share one upstream call
+        status, data = await weather_cache.get_or_fetch(
+            " ".join(city.lower().split()),
+            lambda: http_client.get_json(url, params=params),
+            should_cache=lambda result: result[0] in (200, 404)
+        )
+        
+        if status == 200:
+            weather_text = (
+                f"🌤️ **Weather in {data['name']}, {data['sys']['country']}**\n\n"
+                f"🌡️ **Temperature:** {data['main']['temp']}°C\n"
+                f"🤔 **Feels Like:** {data['main']['feels_like']}°C\n"
+                f"📊 **Condition:** {data['weather'][0]['description'].title()}\n"
+                f"💧 **Humidity:** {data['main']['humidity']}%\n"
+                f"💨 **Wind Speed:** {data['wind']['speed']} m/s\n"
+                f"☁️ **Cloudiness:** {data['clouds']['all']}%\n"
+                f"🔽 **Min Temp:** {data['main']['temp_min']}°C\n"
+                f"🔼 **Max Temp:** {data['main']['temp_max']}°C"
+            )
+            
+            await message.reply_text(weather_text)
+        elif status == 404:
+            await message.reply_text(f"❌ City '{city}' not found")
+        else:
+            await message.reply_text("❌ Failed to fetch weather data")
+            
     except Exception as e:
         await message.reply_text(f"❌ **Error:** {str(e)}")
 
@@ -147,34 +126,32 @@ async def translate_text(client: Client, message: Message):
         )
         return
     
-    if not TRANSLATOR_AVAILABLE:
+    if not translator.available:
         await message.reply_text(
             "❌ Translation module not available.\n"
             "Install with: `pip install deep-translator`"
         )
         return
     
+    # Local detection, no network round-trip
+    source, confidence = langid.detect(text)
+    source_lang = (
+        f"{langid.language_name(source)} ({confidence:.0%})" if source else "Unknown"
+    )
+    
     try:
-        # Detect language and translate to English
-        translator = GoogleTranslator(source='auto', target='en')
-        translated = translator.translate(text)
-        
-        # Try to detect source language
-        from deep_translator import single_detection
-        try:
-            source_lang = single_detection(text, api_key='free')
-        except:
-            source_lang = "Unknown"
-        
-        await message.reply_text(
-            f"🌐 **Translation**\n\n"
-            f"**From:** {source_lang}\n"
-            f"**To:** English\n\n"
-            f"**Original:**\n{text[:500]}\n\n"
-            f"**Translated:**\n{translated[:500]}"
-        )
-    except Exception as e:
+        translated = await translator.translate(text, "en")
+    except TranslationError as e:
         await message.reply_text(f"❌ **Translation Error:** {str(e)}")
+        return
+    
+    await message.reply_text(
+        f"🌐 **Translation**\n\n"
+        f"**From:** {source_lang}\n"
+        f"**To:** English\n\n"
+        f"**Original:**\n{text[:500]}\n\n"
+        f"**Translated:**\n{translated[:500]}"
+    )
 
 
 @Client.on_message(filters.command("echo", prefixes=config.COMMAND_PREFIX))
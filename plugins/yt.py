@@ -1,59 +1,124 @@
-import os
-import requests
+import io
 from pyrogram import Client, filters
+from pyrogram.errors import BadRequest
+from pyrogram.types import Message
+from core.downloads import downloads, DownloadJob, QuotaExceeded, QUEUED, DOWNLOADING, FAILED
+from core.logger import bot_logger
+from core.media_cache import media_cache, youtube_id
+from core.postprocess import postprocessor
+from utils.helpers import get_readable_bytes, progress_bar
 
-# CHANGE THIS TO YOUR REAL IP
-API = "http://103.25.175.231:5000"
+# Media cache format of /yta uploads
+AUDIO_FORMAT = "audio"
 
 
-def download_audio(url):
+def job_status(job: DownloadJob) -> str:
+    """Status line for a download job"""
+    if job.status == QUEUED:
+        return f"⏳ Queued (position {downloads.position(job)})"
 
-    try:
-        r = requests.post(
-            f"{API}/download",
-            json={"url": url},
-            timeout=600
-        )
-
-        data = r.json()
-
-        if data.get("status") == "ok":
-            return data["file"]
-
-        print("API Error:", data)
+    if job.status == DOWNLOADING:
+        if not job.downloaded:
+            return "⏳ Downloading..."
+        if job.total:
+            return (
+                f"⬇️ Downloading...\n"
+                f"{progress_bar(job.downloaded, job.total)}\n"
+                f"{get_readable_bytes(job.downloaded)} / {get_readable_bytes(job.total)}"
+                f" at {get_readable_bytes(job.speed)}/s"
+            )
+        return f"⬇️ Downloading... {get_readable_bytes(job.downloaded)}"
 
-    except Exception as e:
-        print("Request Error:", e)
+    if job.status == FAILED:
+        return f"❌ Download failed: {job.error}"
 
-    return None
+    return "⏫ Uploading..."
 
 
 @Client.on_message(filters.command("yta"))
-async def yt_audio(client, msg):
+async def yt_audio(client: Client, msg: Message):
 
     if len(msg.command) < 2:
         return await msg.reply("❌ Use: /yta <youtube link>")
 
     url = msg.command[1]
+    user_id = msg.from_user.id if msg.from_user else msg.chat.id
+    video_id = youtube_id(url)
+
+    # Already uploaded once: re-send by file_id, no download or upload
+    cached = await media_cache.get(video_id, AUDIO_FORMAT) if video_id else None
+    if cached:
+        try:
+            return await msg.reply_audio(cached["file_id"])
+        except (BadRequest, ValueError) as e:
+            bot_logger.warning(f"Cached file_id for {video_id} failed: {e}")
+            await media_cache.invalidate(video_id, AUDIO_FORMAT)
+
+    status = await msg.reply("⏳ Queued...")
+    last_text = status.text
+
+    async def update(job: DownloadJob):
+        nonlocal last_text
+        text = job_status(job)
+        if text != last_text:
+            last_text = text
+            await status.edit(text)
+
+    async def deliver(job: DownloadJob):
+        await update(job)
+
+        # Duration, title, performer and thumbnail so clients need not probe the file
+        meta = await postprocessor.process(job.path, job.hints)
+        thumb = None
+        if meta["thumb"]:
+            thumb = io.BytesIO(meta["thumb"])
+            thumb.name = "thumb.jpg"
+
+        sent = await msg.reply_audio(
+            job.path,
+            duration=meta["duration"],
+            title=meta["title"],
+            performer=meta["performer"],
+            thumb=thumb
+        )
+        await status.delete()
+
+        if video_id and sent and sent.audio:
+            await media_cache.put(
+                video_id,
+                AUDIO_FORMAT,
+                sent.audio.file_id,
+                file_unique_id=sent.audio.file_unique_id,
+                title=meta["title"],
+                size=sent.audio.file_size
+            )
+
+    # The handler returns right away, the queue downloads in the background
+    try:
+        cache_key = media_cache.key(video_id, AUDIO_FORMAT) if video_id else None
+        downloads.submit(user_id, url, deliver, update, cache_key=cache_key)
+    except QuotaExceeded as e:
+        await status.edit(f"❌ {e}")
 
-    status = await msg.reply("⏳ Downloading...")
-
-    path = download_audio(url)
-    print("FILE PATH:", path)
-
-    print("🎵 FILE:", path)
 
-    if not path or not os.path.exists(path):
-        return await status.edit("❌ Download failed")
+@Client.on_message(filters.command("yqueue"))
+async def yt_queue(client: Client, msg: Message):
 
-    await status.edit("⏫ Uploading...")
+    user_id = msg.from_user.id if msg.from_user else msg.chat.id
+    jobs = downloads.jobs()
+    running = sum(1 for job in jobs if job.status != QUEUED)
 
-    await msg.reply_audio(path)
+    text = (
+        f"📥 **Download Queue**\n\n"
+        f"**Running:** {running}/{downloads.concurrency}\n"
+        f"**Waiting:** {len(jobs) - running}\n"
+    )
 
-    # Clean up
-    try:
-        os.remove(path)
-    except:
-        pass
+    mine = downloads.jobs(user_id)
+    if mine:
+        text += "\n**Your downloads:**\n"
+        text += "\n".join(f"`{job.id}` {job_status(job)}" for job in mine)
+    else:
+        text += "\nYou have no downloads in progress."
 
-    await status.delete()
\ No newline at end of file
+    await msg.reply(text)
@@ -0,0 +1,8 @@
+"""
+Test configuration: keep log files written on import out of the repository
+"""
+import os
+import tempfile
+
+# Read by config at import time, before any test module imports core
+os.environ["LOG_DIR"] = tempfile.mkdtemp(prefix="bot-test-logs-")
@@ -0,0 +1,34 @@
+"""
+Tests for the calculator's result cache
+"""
+import asyncio
+from core.calculator import Calculator
+
+
+def run(test, timeout: float = 1):
+    async def wrapper():
+        calculator = Calculator()
+        calculator.timeout = timeout
+        calculator._cache.clear()
+        try:
+            await test(calculator)
+        finally:
+            calculator.shutdown()
+    asyncio.run(wrapper())
+
+
+def test_results_and_invalid_expressions_are_cached():
+    async def test(calculator):
+        ok, result = await calculator.evaluate("2 +  3")
+        assert ok and float(result) == 5
+        ok, error = await calculator.evaluate("1/0")
+        assert not ok
+        assert set(calculator._cache) == {"2 + 3", "1/0"}
+    run(test)
+
+
+def test_time_limit_is_not_cached():
+    async def test(calculator):
+        assert await calculator.evaluate("9**9**9") == (False, "Evaluation took longer than 0.5s")
+        assert "9**9**9" not in calculator._cache
+    run(test, timeout=0.5)
@@ -0,0 +1,249 @@
+"""
+Tests for the download queue and the remote backend against a local stand-in download API
+"""
+import asyncio
+import os
+import pytest
+from aiohttp import web
+from core import downloads as downloads_module
+from core.downloads import (
+    DownloadError,
+    DownloadJob,
+    DownloadQueue,
+    QuotaExceeded,
+    RemoteBackend,
+    DONE,
+    FAILED,
+)
+from core.http import http_client
+from core.storage import DownloadStorage
+
+AUDIO = os.urandom(300 * 1024)
+PIECE = 16 * 1024
+
+
+async def serve(routes) -> tuple:
+    """Start a stand-in API on a free local port, returns (runner, base URL)"""
+    app = web.Application()
+    app.add_routes(routes)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def run(test):
+    """Run a coroutine test, closing the shared HTTP session bound to its loop"""
+    async def wrapper():
+        try:
+            await test()
+        finally:
+            await http_client.close()
+    asyncio.run(wrapper())
+
+
+async def stream_file(request):
+    """Serve AUDIO in small pieces, without range support"""
+    response = web.StreamResponse()
+    response.content_length = len(AUDIO)
+    await response.prepare(request)
+    for offset in range(0, len(AUDIO), PIECE):
+        await response.write(AUDIO[offset:offset + PIECE])
+    return response
+
+
+async def drop_halfway(request):
+    """Promise AUDIO, then close the connection after half of it"""
+    response = web.StreamResponse()
+    response.content_length = len(AUDIO)
+    await response.prepare(request)
+    await response.write(AUDIO[:len(AUDIO) // 2])
+    request.transport.close()
+    return response
+
+
+def api_routes(file_handler=stream_file, reply=None, status=200):
+    """Stand-in for the download API: POST /download, then GET /files/audio.mp3"""
+    async def download(request):
+        body = await request.json()
+        assert body["url"]
+        data = reply or {"status": "ok", "title": "Song", "file": "/srv/audio.mp3", "url": "/files/audio.mp3"}
+        return web.json_response(data, status=status)
+
+    return [web.post("/download", download), web.get("/files/audio.mp3", file_handler)]
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Point the queue's storage manager at a temporary directory"""
+    manager = DownloadStorage(str(tmp_path), quota=0)
+    monkeypatch.setattr(downloads_module, "storage", manager)
+    return manager
+
+
+def make_queue(backend, directory: str, per_user: int = 2) -> DownloadQueue:
+    queue = DownloadQueue(backend)
+    queue.directory = directory
+    queue.per_user = per_user
+    queue.update_interval = 0.01
+    return queue
+
+
+def test_streams_file_with_progress(tmp_path):
+    async def test():
+        runner, base = await serve(api_routes())
+        try:
+            job = DownloadJob("job1", 1, "https://youtu.be/dQw4w9WgXcQ")
+            progress = []
+            job.set_progress = lambda downloaded, total=None: progress.append((downloaded, total))
+
+            path = await RemoteBackend(base).fetch(job, str(tmp_path))
+
+            assert os.path.basename(path) == "job1_audio.mp3"
+            with open(path, "rb") as f:
+                assert f.read() == AUDIO
+            assert job.title == "Song"
+            assert len(progress) > 1
+            assert progress[-1] == (len(AUDIO), len(AUDIO))
+            assert [downloaded for downloaded, _ in progress] == sorted(downloaded for downloaded, _ in progress)
+        finally:
+            await runner.cleanup()
+    run(test)
+
+
+@pytest.mark.parametrize("status, reply, message", [
+    (500, {"status": "error", "error": "Video unavailable"}, "Video unavailable"),
+    (502, None, "HTTP 502"),
+    (200, {"status": "ok", "title": "Song"}, "no file"),
+])
+def test_api_error_replies(tmp_path, status, reply, message):
+    async def test():
+        routes = api_routes(reply=reply or {}, status=status)
+        runner, base = await serve(routes)
+        try:
+            job = DownloadJob("job2", 1, "https://youtu.be/dQw4w9WgXcQ")
+            with pytest.raises(DownloadError, match=message):
+                await RemoteBackend(base).fetch(job, str(tmp_path))
+            assert os.listdir(tmp_path) == []
+        finally:
+            await runner.cleanup()
+    run(test)
+
+
+def test_partial_file_removed_on_failure(tmp_path, storage):
+    async def test():
+        runner, base = await serve(api_routes(file_handler=drop_halfway))
+        try:
+            queue = make_queue(RemoteBackend(base), str(tmp_path))
+            delivered = []
+
+            async def deliver(job):
+                delivered.append(job)
+
+            job = queue.submit(1, "https://youtu.be/dQw4w9WgXcQ", deliver)
+            await job.task
+
+            assert job.status == FAILED
+            assert not delivered
+            assert [name for name in os.listdir(tmp_path) if not name.startswith(".")] == []
+            assert queue.jobs() == []
+        finally:
+            await runner.cleanup()
+    run(test)
+
+
+def test_queue_delivers_then_removes_file(tmp_path, storage):
+    async def test():
+        runner, base = await serve(api_routes())
+        try:
+            queue = make_queue(RemoteBackend(base), str(tmp_path))
+            received = []
+            updates = []
+
+            async def deliver(job):
+                with open(job.path, "rb") as f:
+                    received.append(f.read())
+
+            async def on_update(job):
+                updates.append(job.status)
+
+            job = queue.submit(1, "https://youtu.be/dQw4w9WgXcQ", deliver, on_update)
+            await job.task
+
+            assert job.status == DONE
+            assert received == [AUDIO]
+            assert updates
+            assert not os.path.exists(job.path)
+        finally:
+            await runner.cleanup()
+    run(test)
+
+
+def test_per_user_quota(tmp_path, storage):
+    class BlockedBackend:
+        name = "blocked"
+
+        def __init__(self):
+            self.release = asyncio.Event()
+
+        async def fetch(self, job, directory):
+            await self.release.wait()
+            path = os.path.join(directory, f"{job.id}.mp3")
+            with open(path, "wb") as f:
+                f.write(b"audio")
+            return path
+
+    async def test():
+        backend = BlockedBackend()
+        queue = make_queue(backend, str(tmp_path), per_user=1)
+
+        async def deliver(job):
+            pass
+
+        first = queue.submit(1, "https://youtu.be/aaaaaaaaaaa", deliver)
+        with pytest.raises(QuotaExceeded):
+            queue.submit(1, "https://youtu.be/bbbbbbbbbbb", deliver)
+
+        # Other users are not affected, and the quota frees up once a job ends
+        other = queue.submit(2, "https://youtu.be/ccccccccccc", deliver)
+        backend.release.set()
+        await asyncio.gather(first.task, other.task)
+        again = queue.submit(1, "https://youtu.be/bbbbbbbbbbb", deliver)
+        await again.task
+
+        assert [first.status, other.status, again.status] == [DONE, DONE, DONE]
+    run(test)
+
+
+def test_disk_cache_hit_carries_metadata(tmp_path, storage):
+    class TaggingBackend:
+        name = "tagging"
+        calls = 0
+
+        async def fetch(self, job, directory):
+            self.calls += 1
+            job.title, job.performer, job.duration = "Song", "Artist", 200
+            path = os.path.join(directory, f"{job.id}_audio.mp3")
+            with open(path, "wb") as f:
+                f.write(AUDIO)
+            return path
+
+    async def test():
+        backend = TaggingBackend()
+        queue = make_queue(backend, str(tmp_path))
+        hints = []
+
+        async def deliver(job):
+            hints.append(job.hints)
+
+        first = queue.submit(1, "https://youtu.be/dQw4w9WgXcQ", deliver, cache_key="dQw4w9WgXcQ:audio")
+        await first.task
+        second = queue.submit(2, "https://youtu.be/dQw4w9WgXcQ", deliver, cache_key="dQw4w9WgXcQ:audio")
+        await second.task
+
+        assert backend.calls == 1
+        assert second.cached and second.path == first.path
+        assert hints[0] == hints[1] == {"title": "Song", "performer": "Artist", "duration": 200, "thumbnail": None}
+    run(test)
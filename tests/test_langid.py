@@ -0,0 +1,72 @@
+"""
+Tests for offline language identification
+"""
+import pytest
+from core import langid
+
+
+# Held out from langid.SAMPLES, so these test the model rather than recall of its training text
+@pytest.mark.parametrize("text, expected", [
+    ("Unser Nachbar repariert heute sein Fahrrad.", "de"),
+    ("Warum ist der Kühlschrank schon wieder leer?", "de"),
+    ("Yarın sabah erkenden yola çıkacağız.", "tr"),
+    ("Kedim bütün gün pencerenin önünde uyuyor.", "tr"),
+    ("Notre voisin répare son vélo ce matin.", "fr"),
+    ("Pourquoi le frigo est-il déjà vide ?", "fr"),
+    ("Mi vecino arregla su bicicleta esta mañana.", "es"),
+    ("¿Por qué la nevera ya está vacía?", "es"),
+    ("Il nostro vicino ripara la bicicletta stamattina.", "it"),
+    ("Perché il frigorifero è già vuoto?", "it"),
+    ("Nosso vizinho está consertando a bicicleta hoje.", "pt"),
+    ("Waarom is de koelkast alweer leeg?", "nl"),
+    ("Kenapa kulkasnya sudah kosong lagi?", "id"),
+    ("Nasz sąsiad naprawia dziś rano rower.", "pl"),
+    ("Varför är kylskåpet redan tomt?", "sv"),
+    ("Tại sao tủ lạnh lại trống rồi?", "vi"),
+    ("Why is the fridge empty again?", "en"),
+    ("Our neighbour is fixing his bike this morning.", "en"),
+])
+def test_short_sentences(text, expected):
+    language, confidence = langid.detect(text)
+    assert language == expected
+    assert 0.5 <= confidence <= 1.0
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Kupiłem wczoraj nowe buty", "pl"),
+    ("Meu gato dorme no sofá o dia todo.", "pt"),
+    ("Vår granne lagar sin cykel i morse.", "sv"),
+    ("Katten sover i soffan hela dagen.", "sv"),
+    ("Mon chat dort sur le canapé toute la journée.", "fr"),
+])
+def test_uncertain_sentences_are_never_wrong(text, expected):
+    # Close calls may come back unknown, but must not name another language
+    language, confidence = langid.detect(text)
+    assert language in (expected, None)
+    if language is None:
+        assert confidence == 0.0
+
+
+@pytest.mark.parametrize("text", ["", "ok", "lol", "12345", "🙂🙂", "Köszönöm szépen a segítséget."])
+def test_undecidable_text_is_unknown(text):
+    assert langid.detect(text) == (None, 0.0)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Привет, как дела?", "ru"),
+    ("Привіт, як справи? Їжак", "uk"),
+    ("Καλημέρα, τι κάνεις;", "el"),
+    ("مرحبا كيف حالك", "ar"),
+    ("こんにちは、元気ですか", "ja"),
+    ("今天天气很好", "zh"),
+    ("안녕하세요", "ko"),
+    ("नमस्ते, आप कैसे हैं?", "hi"),
+])
+def test_script_languages(text, expected):
+    assert langid.detect(text)[0] == expected
+
+
+def test_language_name():
+    assert langid.language_name("de") == "German"
+    assert langid.language_name(None) == "Unknown"
+    assert langid.language_name("xx") == "xx"
@@ -0,0 +1,218 @@
+"""
+Tests for audio metadata probing, on hand-built ID3 and MP4 fixtures
+"""
+import asyncio
+import struct
+import time
+import pytest
+from core.postprocess import AudioPostProcessor, _probe
+from core.workers import WorkerTimeout
+
+COVER = b"\x89PNG\r\n\x1a\nnot really a picture"
+
+# One second of 128 kbit/s MPEG-1 Layer III: a frame header, then filler
+MP3_AUDIO = b"\xff\xfb\x90\x00" + b"\x00" * 15996
+
+
+def syncsafe(value: int) -> bytes:
+    return bytes((value >> shift) & 0x7F for shift in (21, 14, 7, 0))
+
+
+def id3_frame(frame_id: str, data: bytes, version: int, flags: int = 0) -> bytes:
+    size = syncsafe(len(data)) if version == 4 else struct.pack(">I", len(data))
+    return frame_id.encode() + size + bytes((0, flags)) + data
+
+
+def id3_text(frame_id: str, text: str, version: int, flags: int = 0) -> bytes:
+    # UTF-16 with BOM in 2.3, UTF-8 in 2.4
+    data = b"\x01" + text.encode("utf-16") if version == 3 else b"\x03" + text.encode()
+    return id3_frame(frame_id, data, version, flags)
+
+
+def id3_tag(frames: bytes, version: int, flags: int = 0, extended: bytes = b"") -> bytes:
+    body = extended + frames + b"\x00" * 32
+    return b"ID3" + bytes((version, 0, flags)) + syncsafe(len(body)) + body
+
+
+def apic(version: int) -> bytes:
+    return id3_frame("APIC", b"\x00image/png\x00\x03cover\x00" + COVER, version)
+
+
+def mp4_atom(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def mp4_item(kind: bytes, value: bytes) -> bytes:
+    return mp4_atom(kind, mp4_atom(b"data", b"\x00\x00\x00\x01\x00\x00\x00\x00" + value))
+
+
+def m4a(ilst: bool = True) -> bytes:
+    # Version 0 mvhd: flags, creation and modification time, then timescale and duration
+    mvhd = mp4_atom(b"mvhd", b"\x00" * 12 + struct.pack(">II", 1000, 183500) + b"\x00" * 80)
+    moov = mvhd
+    if ilst:
+        items = mp4_item(b"\xa9nam", "Café del Mar".encode()) + mp4_item(b"\xa9ART", b"Energy 52")
+        items += mp4_item(b"covr", COVER)
+        hdlr = mp4_atom(b"hdlr", b"\x00" * 8 + b"mdirappl" + b"\x00" * 9)
+        meta = mp4_atom(b"meta", b"\x00\x00\x00\x00" + hdlr + mp4_atom(b"ilst", items))
+        moov += mp4_atom(b"udta", meta)
+    ftyp = mp4_atom(b"ftyp", b"M4A \x00\x00\x00\x00isomM4A ")
+    return ftyp + mp4_atom(b"moov", moov) + mp4_atom(b"mdat", b"\x00" * 4096)
+
+
+def probe_bytes(tmp_path, data: bytes, name: str = "audio"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return _probe(str(path))
+
+
+@pytest.mark.parametrize("version", [3, 4])
+def test_id3_tags(tmp_path, version):
+    frames = id3_text("TIT2", "Sandstorm", version) + id3_text("TPE1", "Darude", version)
+    frames += id3_text("TLEN", "225000", version) + apic(version)
+    tags = probe_bytes(tmp_path, id3_tag(frames, version) + MP3_AUDIO)
+
+    assert tags == {"title": "Sandstorm", "performer": "Darude", "duration": 225.0, "cover": COVER}
+
+
+@pytest.mark.parametrize("version, extended", [
+    # 2.3: size without itself, flags, padding size
+    (3, struct.pack(">I", 6) + b"\x00\x00" + b"\x00" * 4),
+    # 2.4: syncsafe size including itself, one flag byte, no flags set
+    (4, syncsafe(6) + b"\x01\x00"),
+])
+def test_id3_extended_header_is_skipped(tmp_path, version, extended):
+    frames = id3_text("TIT2", "Sandstorm", version) + id3_text("TPE1", "Darude", version)
+    tags = probe_bytes(tmp_path, id3_tag(frames, version, flags=0x40, extended=extended) + MP3_AUDIO)
+
+    assert tags["title"] == "Sandstorm"
+    assert tags["performer"] == "Darude"
+
+
+def test_id3_duration_estimated_from_bitrate_without_tlen(tmp_path):
+    tags = probe_bytes(tmp_path, id3_tag(id3_text("TIT2", "Sandstorm", 4), 4) + MP3_AUDIO)
+    assert "duration" not in tags
+    assert tags["duration_estimate"] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("header", [b"Xing", b"Info"])
+def test_mp3_duration_from_xing_frame_count(tmp_path, header):
+    # First frame written at 32 kbit/s as LAME does, the rest of the file is at a much higher bitrate
+    frame = b"\xff\xfb\x10\x00" + b"\x00" * 32 + header + struct.pack(">II", 0x01, 2000)
+    tags = probe_bytes(tmp_path, frame + b"\x00" * 64 + MP3_AUDIO * 20)
+    assert tags == {"duration": pytest.approx(2000 * 1152 / 44100)}
+
+
+def test_mp3_duration_from_vbri_frame_count(tmp_path):
+    vbri = b"VBRI" + struct.pack(">HHHII", 1, 0, 75, 500000, 1000)
+    frame = b"\xff\xfb\x90\x00" + b"\x00" * 32 + vbri
+    tags = probe_bytes(tmp_path, id3_tag(id3_text("TIT2", "Sandstorm", 3), 3) + frame + MP3_AUDIO)
+    assert tags["duration"] == pytest.approx(1000 * 1152 / 44100)
+
+
+def test_id3_unsynchronised_tag_is_not_decoded(tmp_path):
+    frames = id3_text("TIT2", "Sandstorm", 3) + apic(3)
+    tags = probe_bytes(tmp_path, id3_tag(frames, 3, flags=0x80) + MP3_AUDIO)
+
+    assert tags == {"duration_estimate": pytest.approx(1.0)}
+
+
+@pytest.mark.parametrize("version, flags", [
+    (4, 0x01),  # data length indicator
+    (4, 0x08 | 0x01),  # compressed
+    (4, 0x02),  # unsynchronised frame
+    (3, 0x80),  # compressed
+    (3, 0x40),  # encrypted
+])
+def test_id3_encoded_frames_are_skipped(tmp_path, version, flags):
+    frames = id3_frame("TIT2", b"\x00\x00\x00\x10garbled", version, flags)
+    frames += id3_text("TPE1", "Darude", version)
+    tags = probe_bytes(tmp_path, id3_tag(frames, version) + MP3_AUDIO)
+
+    assert "title" not in tags
+    assert tags["performer"] == "Darude"
+
+
+def test_m4a_with_ilst(tmp_path):
+    tags = probe_bytes(tmp_path, m4a())
+    assert tags == {"duration": 183.5, "title": "Café del Mar", "performer": "Energy 52", "cover": COVER}
+
+
+def test_m4a_without_ilst(tmp_path):
+    assert probe_bytes(tmp_path, m4a(ilst=False)) == {"duration": 183.5}
+
+
+@pytest.mark.parametrize("data", [
+    id3_tag(id3_text("TIT2", "Sandstorm", 3) + apic(3), 3) + MP3_AUDIO,
+    id3_tag(id3_text("TIT2", "Sandstorm", 4), 4, flags=0x40, extended=syncsafe(6) + b"\x01\x00") + MP3_AUDIO,
+    m4a(),
+], ids=["id3v2.3", "id3v2.4-extended", "m4a"])
+def test_truncated_files_do_not_raise(tmp_path, data):
+    for cut in (4, 10, 12, 20, 40, 80, 160, 400, len(data) // 2):
+        tags = probe_bytes(tmp_path, data[:cut], name=f"cut{cut}")
+        assert isinstance(tags, dict)
+        assert tags.get("title") in (None, "Sandstorm", "Café del Mar")
+
+
+def test_hints_apply_per_call_on_cached_tags(tmp_path):
+    path = tmp_path / "untagged.m4a"
+    path.write_bytes(m4a(ilst=False))
+    tagged = tmp_path / "tagged.m4a"
+    tagged.write_bytes(m4a())
+
+    async def test():
+        processor = AudioPostProcessor()
+        processor.thumbnails = False
+        try:
+            first = await processor.process(str(path), {"title": "First", "performer": "One"})
+            second = await processor.process(str(path), {"title": "Second", "duration": 999})
+            own = await processor.process(str(tagged), {"title": "Hint", "performer": "Hint"})
+        finally:
+            processor.shutdown()
+
+        assert (first["title"], first["performer"], first["duration"]) == ("First", "One", 184)
+        assert (second["title"], second["performer"], second["duration"]) == ("Second", None, 184)
+        assert (own["title"], own["performer"]) == ("Café del Mar", "Energy 52")
+        assert len(processor._results) == 2
+
+    asyncio.run(test())
+
+
+def test_duration_hint_beats_bitrate_estimate(tmp_path):
+    path = tmp_path / "vbr.mp3"
+    path.write_bytes(id3_tag(id3_text("TIT2", "Sandstorm", 4), 4) + MP3_AUDIO)
+    exact = tmp_path / "tlen.mp3"
+    exact.write_bytes(id3_tag(id3_text("TLEN", "225000", 4), 4) + MP3_AUDIO)
+
+    async def test():
+        processor = AudioPostProcessor()
+        processor.thumbnails = False
+        try:
+            hinted = await processor.process(str(path), {"duration": 225})
+            unhinted = await processor.process(str(path))
+            tagged = await processor.process(str(exact), {"duration": 100})
+        finally:
+            processor.shutdown()
+
+        assert (hinted["duration"], unhinted["duration"], tagged["duration"]) == (225, 1, 225)
+
+    asyncio.run(test())
+
+
+def test_hung_worker_is_replaced(tmp_path):
+    path = tmp_path / "audio.m4a"
+    path.write_bytes(m4a())
+
+    async def test():
+        processor = AudioPostProcessor()
+        processor.thumbnails = False
+        processor.timeout = 0.5
+        try:
+            with pytest.raises(WorkerTimeout):
+                await processor._call(time.sleep, 30)
+            meta = await processor.process(str(path))
+        finally:
+            processor.shutdown()
+        assert meta["title"] == "Café del Mar"
+
+    asyncio.run(test())
@@ -0,0 +1,123 @@
+"""
+Tests for the download area manager
+"""
+import json
+import os
+import time
+from core.storage import DownloadStorage, RESUME_PREFIX, RESUME_MAX_AGE
+from core.transfer import STATE_SUFFIX
+
+
+def make_file(directory, name: str, size: int = 10) -> str:
+    path = os.path.join(str(directory), name)
+    with open(path, "wb") as f:
+        f.write(b"x" * size)
+    return path
+
+
+def test_store_keeps_pinned_previous_file_until_unpinned(tmp_path):
+    storage = DownloadStorage(str(tmp_path), quota=0)
+    old = make_file(tmp_path, "aaaaaaaa_song.mp3")
+    storage.store("yt:song", old)
+
+    # An upload of the cached file is running while a new download replaces it
+    assert storage.lookup("yt:song") == old
+    storage.pin(old)
+    new = make_file(tmp_path, "bbbbbbbb_song.mp3")
+    storage.store("yt:song", new)
+
+    assert os.path.exists(old)
+    assert storage.lookup("yt:song") == new
+    storage.unpin(old)
+    assert not os.path.exists(old)
+    assert os.path.exists(new)
+
+
+def test_invalidate_defers_pinned_file(tmp_path):
+    storage = DownloadStorage(str(tmp_path), quota=0)
+    path = make_file(tmp_path, "aaaaaaaa_song.mp3")
+    storage.store("yt:song", path)
+    storage.pin(path)
+    storage.pin(path)
+
+    storage.invalidate("yt:song")
+    assert storage.lookup("yt:song") is None
+    storage.unpin(path)
+    assert os.path.exists(path)
+    storage.unpin(path)
+    assert not os.path.exists(path)
+
+
+def test_store_removes_unpinned_previous_file(tmp_path):
+    storage = DownloadStorage(str(tmp_path), quota=0)
+    old = make_file(tmp_path, "aaaaaaaa_song.mp3")
+    storage.store("yt:song", old)
+    storage.store("yt:song", make_file(tmp_path, "bbbbbbbb_song.mp3"))
+    assert not os.path.exists(old)
+
+
+def test_sweep_only_deletes_download_files(tmp_path):
+    storage = DownloadStorage(str(tmp_path), quota=0)
+    cached = make_file(tmp_path, "aaaaaaaa_cached.mp3")
+    storage.store("yt:cached", cached)
+    partial = make_file(tmp_path, "bbbbbbbb_audio.mp3")
+    local_partial = make_file(tmp_path, "cccccccc.m4a.part")
+    foreign = [make_file(tmp_path, name) for name in ("config.py", "notes.txt", "README.md", "bot.session")]
+    os.mkdir(tmp_path / "plugins")
+
+    result = DownloadStorage(str(tmp_path), quota=0).sweep()
+
+    assert result["removed"] == 2
+    assert result["cached"] == 1
+    assert os.path.exists(cached)
+    assert not os.path.exists(partial)
+    assert not os.path.exists(local_partial)
+    assert all(os.path.exists(path) for path in foreign)
+    assert os.path.isdir(tmp_path / "plugins")
+
+
+def test_sweep_keeps_recent_resumable_partials(tmp_path):
+    recent = make_file(tmp_path, f"{RESUME_PREFIX}{'1' * 16}_audio.mp3")
+    recent_state = make_file(tmp_path, os.path.basename(recent) + STATE_SUFFIX)
+    stale = make_file(tmp_path, f"{RESUME_PREFIX}{'2' * 16}_audio.mp3")
+    stale_state = make_file(tmp_path, os.path.basename(stale) + STATE_SUFFIX)
+    expired = time.time() - RESUME_MAX_AGE - 60
+    os.utime(stale_state, (expired, expired))
+    # Without resume state a partial cannot be resumed
+    orphan = make_file(tmp_path, f"{RESUME_PREFIX}{'3' * 16}_audio.mp3")
+
+    DownloadStorage(str(tmp_path), quota=0).sweep()
+
+    assert os.path.exists(recent) and os.path.exists(recent_state)
+    assert not any(os.path.exists(path) for path in (stale, stale_state, orphan))
+
+
+def test_sweep_ignores_index_entries_outside_directory(tmp_path):
+    directory = tmp_path / "downloads"
+    directory.mkdir()
+    outside = make_file(tmp_path, "aaaaaaaa_elsewhere.mp3")
+    with open(directory / ".cache_index.json", "w") as f:
+        json.dump({"yt:x": {"path": outside, "size": 10, "last_used": 0}}, f)
+
+    storage = DownloadStorage(str(directory), quota=0)
+    storage.sweep()
+    storage.invalidate("yt:x")
+
+    assert storage.lookup("yt:x") is None
+    assert os.path.exists(outside)
+
+
+def test_lookup_persists_last_used(tmp_path):
+    storage = DownloadStorage(str(tmp_path), quota=0)
+    first = make_file(tmp_path, "aaaaaaaa_first.mp3", size=100)
+    storage.store("yt:first", first)
+    second = make_file(tmp_path, "bbbbbbbb_second.mp3", size=100)
+    storage.store("yt:second", second)
+    time.sleep(0.01)
+    storage.lookup("yt:first")
+
+    # After a restart the hit still counts: the other file is the least recently used
+    restarted = DownloadStorage(str(tmp_path), quota=150)
+    restarted.sweep()
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
@@ -0,0 +1,178 @@
+"""
+Tests for ranged downloads and resume against a local stand-in file server
+"""
+import asyncio
+import os
+import re
+import pytest
+from aiohttp import web
+from config import config
+from core import transfer
+from core.downloads import DownloadJob, RemoteBackend
+from core.http import http_client
+from core.storage import RESUME_PREFIX
+from core.transfer import STATE_SUFFIX, TransferError
+
+DATA = os.urandom(512 * 1024)
+ETAG = '"v1"'
+RANGE = re.compile(r"bytes=(\d+)-(\d+)")
+
+
+class FileServer:
+    """Serves DATA, optionally honouring Range and cutting range replies short"""
+
+    def __init__(self, ranges: bool = True, drops: int = 0):
+        self.ranges = ranges
+        self.drops = drops
+        self.requested = []
+        self.runner = None
+        self.base = None
+
+    async def handle(self, request):
+        match = RANGE.fullmatch(request.headers.get("Range", ""))
+        if not self.ranges or not match:
+            return web.Response(body=DATA, headers={"ETag": ETAG})
+
+        start, end = int(match.group(1)), int(match.group(2))
+        self.requested.append((start, end))
+        response = web.StreamResponse(status=206, headers={
+            "Content-Range": f"bytes {start}-{end}/{len(DATA)}", "ETag": ETAG
+        })
+        response.content_length = end - start + 1
+        await response.prepare(request)
+        body = DATA[start:end + 1]
+        if self.drops and end > start:
+            self.drops -= 1
+            await response.write(body[:len(body) // 2])
+            request.transport.close()
+            return response
+        await response.write(body)
+        return response
+
+    async def api(self, request):
+        return web.json_response({"status": "ok", "file": "/srv/audio.mp3", "url": "/files/audio.mp3"})
+
+    async def __aenter__(self):
+        app = web.Application()
+        app.add_routes([web.get("/files/audio.mp3", self.handle), web.post("/download", self.api)])
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.runner.cleanup()
+
+    @property
+    def url(self) -> str:
+        return f"{self.base}/files/audio.mp3"
+
+
+@pytest.fixture(autouse=True)
+def small_segments(monkeypatch):
+    """Split DATA into several segments and retry without waiting"""
+    monkeypatch.setattr(config, "DOWNLOAD_MIN_SEGMENT", 64 * 1024)
+    monkeypatch.setattr(config, "DOWNLOAD_CHUNK_SIZE", 16 * 1024)
+    monkeypatch.setattr(transfer, "RETRY_BACKOFF", 0)
+
+
+def run(test):
+    """Run a coroutine test, closing the shared HTTP session bound to its loop"""
+    async def wrapper():
+        try:
+            await test()
+        finally:
+            await http_client.close()
+    asyncio.run(wrapper())
+
+
+def read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_ranged_download(tmp_path):
+    async def test():
+        async with FileServer() as server:
+            path = str(tmp_path / "audio.mp3")
+            progress = []
+            size = await transfer.download(
+                server.url, path, progress=lambda done, total: progress.append(done)
+            )
+
+            assert size == len(DATA)
+            assert read(path) == DATA
+            assert not os.path.exists(path + STATE_SUFFIX)
+            # Probe plus one request per segment
+            segments = [r for r in server.requested if r != (0, 0)]
+            assert len(segments) == config.DOWNLOAD_SEGMENTS
+            assert sum(end - start + 1 for start, end in segments) == len(DATA)
+            assert progress[-1] == len(DATA)
+    run(test)
+
+
+def test_connection_drop_mid_segment_resumes_segment(tmp_path):
+    async def test():
+        async with FileServer(drops=1) as server:
+            path = str(tmp_path / "audio.mp3")
+            await transfer.download(server.url, path)
+
+            assert read(path) == DATA
+            segments = [r for r in server.requested if r != (0, 0)]
+            starts = {start for start, _ in segments}
+            boundaries = {start for start, _ in segments[:config.DOWNLOAD_SEGMENTS]}
+            # The retry asked only for the bytes after the cut
+            assert len(segments) == config.DOWNLOAD_SEGMENTS + 1
+            assert starts - boundaries
+    run(test)
+
+
+def test_server_without_range_support(tmp_path):
+    async def test():
+        async with FileServer(ranges=False) as server:
+            path = str(tmp_path / "audio.mp3")
+            # Left over by an earlier ranged attempt against a different server
+            with open(path + STATE_SUFFIX, "w") as f:
+                f.write("{}")
+
+            progress = []
+            size = await transfer.download(
+                server.url, path, progress=lambda done, total: progress.append(done)
+            )
+
+            assert size == len(DATA)
+            assert read(path) == DATA
+            assert not os.path.exists(path + STATE_SUFFIX)
+            assert progress[-1] == len(DATA)
+    run(test)
+
+
+def test_failed_download_resumes_on_next_job(tmp_path):
+    async def test():
+        async with FileServer(drops=100) as server:
+            backend = RemoteBackend(server.base)
+            url = "https://youtu.be/dQw4w9WgXcQ"
+
+            first = DownloadJob("aaaaaaaa", 1, url)
+            with pytest.raises(TransferError):
+                await backend.fetch(first, str(tmp_path))
+            leftovers = sorted(os.listdir(tmp_path))
+            assert len(leftovers) == 2
+            assert all(name.startswith(RESUME_PREFIX) for name in leftovers)
+            assert leftovers[1].endswith(STATE_SUFFIX)
+
+            server.drops = 0
+            server.requested.clear()
+            second = DownloadJob("bbbbbbbb", 2, url)
+            path = await backend.fetch(second, str(tmp_path))
+
+            assert os.path.basename(path) == "bbbbbbbb_audio.mp3"
+            assert read(path) == DATA
+            assert os.listdir(tmp_path) == ["bbbbbbbb_audio.mp3"]
+            # Only the bytes the first job did not get were fetched again
+            fetched = sum(end - start + 1 for start, end in server.requested if (start, end) != (0, 0))
+            assert 0 < fetched < len(DATA)
+    run(test)
+
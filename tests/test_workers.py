@@ -0,0 +1,72 @@
+"""
+Tests for worker pools that stop stuck or abandoned calls
+"""
+import asyncio
+import os
+import time
+import pytest
+from core.workers import WorkerPool, WorkerCrashed, WorkerTimeout
+
+
+def run(test, size: int = 2):
+    async def wrapper():
+        pool = WorkerPool("test", size)
+        try:
+            await test(pool)
+        finally:
+            pool.shutdown()
+    asyncio.run(wrapper())
+
+
+def test_timeout_kills_only_its_own_worker():
+    async def test(pool):
+        stuck, other = await asyncio.gather(
+            pool.run(time.sleep, 30, timeout=0.5),
+            pool.run(time.sleep, 1, timeout=5),
+            return_exceptions=True
+        )
+        assert isinstance(stuck, WorkerTimeout)
+        assert other is None
+    run(test)
+
+
+def test_deadline_starts_when_a_worker_is_free():
+    async def test(pool):
+        # The second call waits about a second for the only worker, then runs well within its deadline
+        results = await asyncio.gather(
+            pool.run(time.sleep, 1, timeout=5),
+            pool.run(time.sleep, 0.1, timeout=0.5)
+        )
+        assert results == [None, None]
+    run(test, size=1)
+
+
+def test_cancelled_call_stops_its_worker():
+    async def test(pool):
+        task = asyncio.create_task(pool.run(time.sleep, 30))
+        await asyncio.sleep(0.5)
+        processes = [process for worker in pool._busy for process in worker._processes.values()]
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.3)
+        assert processes and not any(process.is_alive() for process in processes)
+        assert await pool.run(os.getpid) > 0
+    run(test)
+
+
+def test_crashed_worker_is_replaced():
+    async def test(pool):
+        with pytest.raises(WorkerCrashed):
+            await pool.run(os._exit, 1)
+        assert await pool.run(os.getpid) > 0
+    run(test)
+
+
+def test_failing_call_keeps_its_worker():
+    async def test(pool):
+        pid = await pool.run(os.getpid)
+        with pytest.raises(ValueError):
+            await pool.run(int, "not a number")
+        assert await pool.run(os.getpid) == pid
+    run(test)
@@ -7,6 +7,7 @@ from pyrogram import Client
 from pyrogram.types import Message
 from config import config
 from core.logger import bot_logger
+from core.state import state_registry
 
 
 def owner_only(func):
@@ -51,6 +52,13 @@ def rate_limit(seconds: int = 5):
     user_last_used = {}
     
     def decorator(func):
+        # Keep rate-limit buckets across graceful restarts
+        state_registry.register(
+            f"rate_limit.{func.__module__}.{func.__name__}",
+            lambda: user_last_used,
+            user_last_used.update
+        )
+        
         @wraps(func)
         async def wrapper(client: Client, message: Message):
             user_id = message.from_user.id
@@ -4,11 +4,13 @@ Utility functions used across the bot
 """
 import os
 import time
-import psutil
-import humanize
 from datetime import datetime, timedelta
 from typing import Union
 from pyrogram.types import Message
+from core.lazy import lazy_import
+
+psutil = lazy_import("psutil")
+humanize = lazy_import("humanize")
 
 
 def get_readable_time(seconds: int) -> str: